@@ -0,0 +1,56 @@
+'''
+Compares two JSON outputs of `run_benchmarks.py` (for eg., of two commits).
+
+Usage:
+    python benchmarks/compare.py baseline.json results.json [--threshold 0.1]
+'''
+import sys
+import json
+import argparse
+
+# (path to the metric, whether higher is better)
+def iter_metrics(results):
+    if 'import' in results:
+        yield ('import', 'min_seconds'), results['import']['min_seconds'], False
+    for class_name, modes in results.get('construction', {}).items():
+        for mode, result in modes.items():
+            yield ('construction', class_name, mode, 'construction_seconds'), result['construction_seconds'], False
+            yield ('construction', class_name, mode, 'rss_increase_kb'), result['rss_increase_kb'], False
+    for pair, corpora in results.get('throughput', {}).items():
+        for corpus_name, corpus_results in corpora.items():
+            for mode in ('single', 'batch'):
+                if mode in corpus_results:
+                    yield ('throughput', pair, corpus_name, mode, 'chars_per_second'), corpus_results[mode]['chars_per_second'], True
+    for pair, pair_results in results.get('passes', {}).items():
+        yield ('passes', pair, 'total_seconds'), pair_results['total_seconds'], False
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare two benchmark results')
+    parser.add_argument('baseline', help='JSON results of the baseline')
+    parser.add_argument('results', help='JSON results to compare')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Relative change to report as a regression/improvement')
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = {path: (value, higher_is_better) for path, value, higher_is_better in iter_metrics(json.load(f))}
+    with open(args.results, encoding='utf-8') as f:
+        results = list(iter_metrics(json.load(f)))
+
+    regressions = 0
+    for path, value, higher_is_better in results:
+        if path not in baseline or not baseline[path][0]:
+            continue
+        change = value / baseline[path][0] - 1
+        improvement = change if higher_is_better else -change
+        status = ''
+        if improvement <= -args.threshold:
+            status = 'REGRESSION'
+            regressions += 1
+        elif improvement >= args.threshold:
+            status = 'improved'
+        print('%-70s %14.4g -> %14.4g  %+7.1f%%  %s' % ('/'.join(path), baseline[path][0], value, 100 * change, status))
+
+    sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+'''
+Benchmarks of the rule-based conversion, written as JSON to compare between commits.
+
+Measures:
+- Cold import time of `indo_arabic_transliteration.mapper` (in fresh interpreters)
+- Construction time and RSS of each transliterator (in fresh interpreters, with and without the table cache)
+- Throughput (chars/sec and words/sec) of all the `DELEGATES` pairs, on the checked-in real-text corpora
+  and on synthetic (seeded Zipfian) corpora of small, medium and large sizes
+- Time spent in each pass of the pipeline
+
+Usage:
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/compare.py baseline.json results.json
+'''
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from importlib import import_module
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPORA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpora')
+sys.path.insert(0, ROOT_DIR)
+
+from indo_arabic_transliteration import __version__
+from indo_arabic_transliteration.mapper import DELEGATES, CONVERTER_CLASSES, CONVERTERS, script_convert, script_convert_batch
+from indo_arabic_transliteration.instrumentation import Instrumentation
+
+# Number of lines of each synthetic corpus
+SYNTHETIC_SIZES = {
+    'small': 100,
+    'medium': 2000,
+    'large': 20000,
+}
+REAL_CORPUS_LINES = 2000
+SEED = 42
+
+def run_python(code, env=None):
+    '''
+    Runs the given code in a fresh interpreter, and returns its JSON output
+    '''
+    process_env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT_DIR, os.environ.get('PYTHONPATH')])))
+    process_env.update(env or {})
+    output = subprocess.run([sys.executable, '-c', code], env=process_env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+IMPORT_CODE = '''
+import time, json
+start = time.perf_counter()
+import indo_arabic_transliteration.mapper
+print(json.dumps(time.perf_counter() - start))
+'''
+
+def benchmark_import(repeat):
+    timings = [run_python(IMPORT_CODE) for _ in range(repeat)]
+    return {'min_seconds': min(timings), 'median_seconds': statistics.median(timings)}
+
+CONSTRUCTION_CODE = '''
+import time, json, resource
+from importlib import import_module
+start = time.perf_counter()
+converter_class = getattr(import_module(%r, 'indo_arabic_transliteration'), %r)
+import_seconds = time.perf_counter() - start
+rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+converter_class(compiled=%r)
+construction_seconds = time.perf_counter() - start
+rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'import_seconds': import_seconds, 'construction_seconds': construction_seconds, 'peak_rss_kb': rss_after, 'rss_increase_kb': rss_after - rss_before}))
+'''
+
+def benchmark_construction(repeat, compiled):
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for language, (module_name, class_name) in CONVERTER_CLASSES.items():
+            code = CONSTRUCTION_CODE % (module_name, class_name, compiled)
+            # Table cache disabled, i.e. tables built from the CSVs
+            uncached = [run_python(code, {'INDO_ARABIC_TRANSLITERATION_CACHE_DIR': ''}) for _ in range(repeat)]
+            # Table cache warmed up by the first run
+            run_python(code, {'INDO_ARABIC_TRANSLITERATION_CACHE_DIR': cache_dir})
+            cached = [run_python(code, {'INDO_ARABIC_TRANSLITERATION_CACHE_DIR': cache_dir}) for _ in range(repeat)]
+            results[class_name] = {
+                'uncached': min(uncached, key=lambda result: result['construction_seconds']),
+                'cached': min(cached, key=lambda result: result['construction_seconds']),
+            }
+    return results
+
+def read_corpus(script):
+    with open(os.path.join(CORPORA_DIR, script + '.txt'), encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+def get_corpora(script):
+    '''
+    Returns the real-text corpus (repeated up to `REAL_CORPUS_LINES`),
+    and synthetic corpora of lines sampled from its vocabulary with Zipfian frequencies
+    '''
+    lines = read_corpus(script)
+    corpora = {'real': [lines[i % len(lines)] for i in range(REAL_CORPUS_LINES)]}
+
+    vocabulary = sorted(set(word for line in lines for word in line.split()))
+    rng = random.Random(SEED)
+    rng.shuffle(vocabulary)
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    for size_name, num_lines in SYNTHETIC_SIZES.items():
+        corpora[size_name] = [' '.join(rng.choices(vocabulary, weights, k=rng.randint(4, 20))) for _ in range(num_lines)]
+    return corpora
+
+def time_best(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def benchmark_throughput(repeat, corpus_names):
+    results = {}
+    for from_script, to_script in DELEGATES:
+        corpora = get_corpora(from_script)
+        # Warm up: build the converter (and compile the lazy matchers) before timing
+        script_convert_batch(corpora['real'][:10], from_script, to_script)
+
+        pair_results = {}
+        for corpus_name in corpus_names:
+            texts = corpora[corpus_name]
+            num_chars = sum(map(len, texts))
+            num_words = sum(len(text.split()) for text in texts)
+            modes = {
+                'single': lambda: [script_convert(text, from_script, to_script) for text in texts],
+                'batch': lambda: script_convert_batch(texts, from_script, to_script),
+            }
+            pair_results[corpus_name] = {'lines': len(texts), 'chars': num_chars, 'words': num_words}
+            for mode, function in modes.items():
+                seconds = time_best(function, repeat)
+                pair_results[corpus_name][mode] = {
+                    'seconds': seconds,
+                    'chars_per_second': num_chars / seconds,
+                    'words_per_second': num_words / seconds,
+                }
+        results['%s>%s' % (from_script, to_script)] = pair_results
+    return results
+
+def benchmark_passes(compiled):
+    '''
+    Returns the self time (excluding the nested passes) of each pass of the pipelines, as recorded by `Instrumentation`
+    '''
+    results = {}
+    for (from_script, to_script), delegate in DELEGATES.items():
+        module_name, class_name = CONVERTER_CLASSES[delegate.language]
+        converter = getattr(import_module(module_name, 'indo_arabic_transliteration'), class_name)(compiled=compiled)
+        texts = get_corpora(from_script)['medium']
+        getattr(converter, delegate.method_name + '_batch')(texts[:10]) # Warm up
+
+        # Timing only, since finding the matches would take longer than the translators themselves
+        instrumentation = Instrumentation(count_keys=False, count_matches=False)
+        instrumentation.instrument(converter)
+        transliterate_batch = getattr(converter, delegate.method_name + '_batch')
+        instrumentation.time_stage((class_name, delegate.method_name + '_batch'), transliterate_batch, texts)
+
+        stage_seconds = instrumentation.stage_self_seconds
+        total_seconds = sum(stage_seconds.values())
+        passes = {
+            '.'.join(stage): {'seconds': seconds, 'fraction': seconds / total_seconds, 'calls': instrumentation.stage_seconds[(converter_name, *stage)].count}
+            for (converter_name, *stage), seconds in sorted(stage_seconds.items(), key=lambda item: -item[1])
+        }
+        results['%s>%s' % (from_script, to_script)] = {'total_seconds': total_seconds, 'passes': passes}
+    return results
+
+def get_git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR, check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the rule-based transliteration')
+    parser.add_argument('--output', default='-', help='JSON file to write the results to (default: stdout)')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of runs of each measurement (best/median reported)')
+    parser.add_argument('--corpora', nargs='+', default=['real'] + list(SYNTHETIC_SIZES), choices=['real'] + list(SYNTHETIC_SIZES))
+    parser.add_argument('--compiled', action='store_true', help='Use the compiled translators (`compiled=True`)')
+    parser.add_argument('--skip', nargs='*', default=[], choices=['import', 'construction', 'throughput', 'passes'], help='Benchmarks to skip')
+    args = parser.parse_args()
+
+    if args.compiled:
+        for language, (module_name, class_name) in CONVERTER_CLASSES.items():
+            CONVERTERS[language] = getattr(import_module(module_name, 'indo_arabic_transliteration'), class_name)(compiled=True)
+
+    results = {
+        'meta': {
+            'version': __version__,
+            'git_commit': get_git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'repeat': args.repeat,
+            'compiled': args.compiled,
+            'seed': SEED,
+        },
+    }
+    if 'import' not in args.skip:
+        results['import'] = benchmark_import(args.repeat)
+    if 'construction' not in args.skip:
+        results['construction'] = benchmark_construction(args.repeat, args.compiled)
+    if 'throughput' not in args.skip:
+        results['throughput'] = benchmark_throughput(args.repeat, args.corpora)
+    if 'passes' not in args.skip:
+        results['passes'] = benchmark_passes(args.compiled)
+
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+
+if __name__ == '__main__':
+    main()
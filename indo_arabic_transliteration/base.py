@@ -1,10 +1,11 @@
 import os
 import re
-import pandas as pd
-from .str_mapper import StringTranslator
-from .common import devanagari_preprocessor, devanagari_short_vowels_remover, devanagari_initial_vowels_abjadify, devanagari_nuqta_consonants_simplifier, devanagari_non_initial_vowels_abjadifier
-
-from urduhack.normalization.character import remove_diacritics, normalize_characters, normalize_combine_characters
+import threading
+from functools import lru_cache
+from itertools import islice
+from . import table_cache
+from .str_mapper import StringTranslator, CompiledStringTranslator, InfixTranslator
+from .common import ARABIC_COMBINE_MAP, ARABIC_COMBINE_REGEX, ARABIC_IMPROPER_HAMZA_REGEX, ARABIC_SPACED_HAMZA_REGEX, arabic_normalizer, DEVANAGARI_PREPROCESS_MAP, DEVANAGARI_MEDIAL_VOWELS_MAP, DEVANAGARI_NUQTA_CONSONANTS_SIMPLIFY_MAP, devanagari_normalizer, devanagari_preprocessor, devanagari_short_vowels_remover, devanagari_initial_vowels_abjadify, devanagari_nuqta_consonants_simplifier, devanagari_non_initial_vowels_abjadifier
 
 INITIAL_MAP_FILES = ['initial_vowels.csv']
 MAIN_MAP_FILES = ['vowels.csv']
@@ -15,116 +16,201 @@ ARABIC_MAP_FILES = ['arabic.csv']
 HAMZA_FILES = ['hamza.csv']
 HAMZA_COMBO_FILES = ['hamza_combo.csv']
 
+# Directions of the lexicons of whole words (`words_map_files`), whose conversion is not derivable by the letter rules
+ARABIC_TO_DEVANAGARI = 'arabic_to_devanagari'
+DEVANAGARI_TO_ARABIC = 'devanagari_to_arabic'
+# Characters of the words of the source script of each direction (the Devanagari vowel-signs are not \w)
+WORD_CHAR_REGEXES = {
+    ARABIC_TO_DEVANAGARI: r'\w',
+    DEVANAGARI_TO_ARABIC: r'[\w\u0900-\u0963\u0972-\u097f]',
+}
+WORD_BOUNDARY_REGEXES = {
+    ARABIC_TO_DEVANAGARI: r'\b',
+    DEVANAGARI_TO_ARABIC: r'(?:(?<!{0})(?={0})|(?<={0})(?!{0}))'.format(WORD_CHAR_REGEXES[DEVANAGARI_TO_ARABIC]),
+}
+
+@lru_cache(maxsize=None)
+def read_mapping_file(map_file_path):
+    '''
+    Returns the (arabic, roman, devanagari) letters in each column of the given mapping file.
+    Cached, since the same files are read by every transliterator.
+    '''
+    import pandas as pd # Only needed when the tables are not already in the table_cache
+    df = pd.read_csv(map_file_path, header=None)
+    return tuple((str(df[i][0]).strip(), str(df[i][1]).strip(), str(df[i][2]).strip()) for i in df.columns)
+
+# Joins the texts of a batch. No rule matches it, and it is a non-word char like the start/end of text
+BATCH_SEPARATOR = '\x00'
+DEFAULT_BATCH_SIZE = 1000
+
+# Tables built per (language-specific builders, mapping files, compiled) and data folder, shared by all instances
+SHARED_TABLES = {}
+shared_tables_lock = threading.Lock()
+
 class BaseIndoArabicTransliterator:
     '''
     Common processing for all supported Indo-Pakistani languages (except Kashmiri)
+    Pass `compiled=True` to use CompiledStringTranslator for all the passes (same output, faster)
+    `words_map_files` are the lexicons of whole words for each direction (ARABIC_TO_DEVANAGARI, DEVANAGARI_TO_ARABIC),
+    in the same format as the other mapping files (the words of the source script are converted to the ones of the other).
+    All the tables are derived before their translators are built, and are not changed afterwards;
+    hence a converter (and the tables it shares with the others) is safe for concurrent use by many threads.
     '''
-    def __init__(self, consonants_map_files, data_dir=os.path.dirname(__file__) + '/data/'):
+    def __init__(self, consonants_map_files, data_dir=table_cache.DATA_DIR, compiled=False, words_map_files=None):
         self.data_dir = data_dir
-        self.initial_arabic_to_devanagari_map = {}
-        self.final_arabic_to_devanagari_map = {}
-        self.arabic_to_devanagari_map_pass1 = {}
-        self.arabic_to_devanagari_map_pass2 = {}
-        self.arabic_to_devanagari_cleanup_pass = {} # To handle chars at erraneous/unconventional places
-        self.hamza_to_devanagari_map = {}
-        self.hamza_combo_to_devanagari_map = {}
-        self.devanagari_postprocess_map = {}
+        self.consonants_map_files = consonants_map_files
+        self.words_map_files = words_map_files or {}
+        self.compiled = compiled
+        self.translator_class = CompiledStringTranslator if compiled else StringTranslator
+        self.__dict__.update(self.load_tables())
+        self.devanagari_normalizer = devanagari_normalizer
+
+    def get_tables_key(self):
+        cls = type(self)
+        words_map_files = tuple(sorted((direction, tuple(map_files)) for direction, map_files in self.words_map_files.items()))
+        return (cls.load_maps.__qualname__, cls.compile_maps.__qualname__, tuple(self.consonants_map_files), words_map_files, self.compiled)
+
+    def get_table_layers(self):
+        '''
+        Returns the (key, build_tables) of each group of tables used, for eg., extended by a language over the tables of another
+        '''
+        return [(self.get_tables_key(), self.build_tables)]
+
+    def load_tables(self):
+        '''
+        Returns all the maps and translators as a dict of attributes.
+        Each layer is built only once per process; for eg., all the Hindustani transliterators share the same tables.
+        Across processes, they are loaded from the table_cache when available.
+        '''
+        tables = {}
+        with shared_tables_lock:
+            for key, build_tables in self.get_table_layers():
+                if (key, self.data_dir) not in SHARED_TABLES:
+                    SHARED_TABLES[(key, self.data_dir)] = table_cache.load_tables(key, self.data_dir, build_tables)
+                tables.update(SHARED_TABLES[(key, self.data_dir)])
+        return tables
+
+    def build_tables(self):
+        maps = self.load_maps()
+        # Translators are serialized uncompiled, each process compiles only the directions it uses
+        return {**maps, **self.compile_maps(maps)}
+
+    def load_maps(self):
+        maps = {
+            'initial_arabic_to_devanagari_map': {},
+            'final_arabic_to_devanagari_map': {},
+            'arabic_to_devanagari_map_pass1': {},
+            'arabic_to_devanagari_map_pass2': {},
+            'arabic_to_devanagari_cleanup_pass': {}, # To handle chars at erraneous/unconventional places
+            'hamza_to_devanagari_map': {},
+            'hamza_combo_to_devanagari_map': {},
+        }
 
         for map_file in MISC_MAP_FILES:
-            df = pd.read_csv(data_dir+map_file, header=None)
-            for i in df.columns:
-                arabic_letter, roman_letter, devanagari_letter = str(df[i][0]).strip(), str(df[i][1]).strip(), str(df[i][2]).strip()
-                self.arabic_to_devanagari_map_pass1[arabic_letter] = devanagari_letter
+            for arabic_letter, roman_letter, devanagari_letter in read_mapping_file(self.data_dir+map_file):
+                maps['arabic_to_devanagari_map_pass1'][arabic_letter] = devanagari_letter
 
         for map_file in INITIAL_MAP_FILES:
-            df = pd.read_csv(data_dir+map_file, header=None)
-            for i in df.columns:
-                arabic_letter, roman_letter, devanagari_letter = str(df[i][0]).strip(), str(df[i][1]).strip(), str(df[i][2]).strip()
-                self.initial_arabic_to_devanagari_map[arabic_letter] = devanagari_letter
-                self.arabic_to_devanagari_cleanup_pass[arabic_letter] = devanagari_letter
+            for arabic_letter, roman_letter, devanagari_letter in read_mapping_file(self.data_dir+map_file):
+                maps['initial_arabic_to_devanagari_map'][arabic_letter] = devanagari_letter
+                maps['arabic_to_devanagari_cleanup_pass'][arabic_letter] = devanagari_letter
         
         for map_file in FINAL_MAP_FILES:
-            df = pd.read_csv(data_dir+map_file, header=None)
-            for i in df.columns:
-                arabic_letter, roman_letter, devanagari_letter = str(df[i][0]).strip(), str(df[i][1]).strip(), str(df[i][2]).strip()
-                self.final_arabic_to_devanagari_map[arabic_letter] = devanagari_letter
-                self.arabic_to_devanagari_cleanup_pass[arabic_letter] = devanagari_letter # Sometimes, Devanagari vowel-marks doesn't work without this
+            for arabic_letter, roman_letter, devanagari_letter in read_mapping_file(self.data_dir+map_file):
+                maps['final_arabic_to_devanagari_map'][arabic_letter] = devanagari_letter
+                maps['arabic_to_devanagari_cleanup_pass'][arabic_letter] = devanagari_letter # Sometimes, Devanagari vowel-marks doesn't work without this
         
         for map_file in ARABIC_MAP_FILES:
-            df = pd.read_csv(data_dir+map_file, header=None)
-            for i in df.columns:
-                arabic_letter, roman_letter, devanagari_letter = str(df[i][0]).strip(), str(df[i][1]).strip(), str(df[i][2]).strip()
+            for arabic_letter, roman_letter, devanagari_letter in read_mapping_file(self.data_dir+map_file):
                 # TODO: Some of these are initial_only matchers. Handle them
-                self.arabic_to_devanagari_cleanup_pass[arabic_letter] = devanagari_letter
+                maps['arabic_to_devanagari_cleanup_pass'][arabic_letter] = devanagari_letter
         
         for map_file in HAMZA_FILES:
-            df = pd.read_csv(data_dir+map_file, header=None)
-            for i in df.columns:
-                arabic_letter, roman_letter, devanagari_letter = str(df[i][0]).strip(), str(df[i][1]).strip(), str(df[i][2]).strip()
-                self.hamza_to_devanagari_map[arabic_letter] = devanagari_letter
+            for arabic_letter, roman_letter, devanagari_letter in read_mapping_file(self.data_dir+map_file):
+                maps['hamza_to_devanagari_map'][arabic_letter] = devanagari_letter
         
         for map_file in HAMZA_COMBO_FILES:
-            df = pd.read_csv(data_dir+map_file, header=None)
-            for i in df.columns:
-                arabic_letter, roman_letter, devanagari_letter = str(df[i][0]).strip(), str(df[i][1]).strip(), str(df[i][2]).strip()
-                self.hamza_combo_to_devanagari_map[arabic_letter] = devanagari_letter
+            for arabic_letter, roman_letter, devanagari_letter in read_mapping_file(self.data_dir+map_file):
+                maps['hamza_combo_to_devanagari_map'][arabic_letter] = devanagari_letter
 
         for map_file in MAIN_MAP_FILES:
-            df = pd.read_csv(data_dir+map_file, header=None)
-            for i in df.columns:
-                arabic_letter, roman_letter, devanagari_letter = str(df[i][0]).strip(), str(df[i][1]).strip(), str(df[i][2]).strip()
-                self.arabic_to_devanagari_map_pass2[arabic_letter] = devanagari_letter
+            for arabic_letter, roman_letter, devanagari_letter in read_mapping_file(self.data_dir+map_file):
+                maps['arabic_to_devanagari_map_pass2'][arabic_letter] = devanagari_letter
         
-        consonants = []
-        for map_file in consonants_map_files:
-            df = pd.read_csv(data_dir+map_file, header=None)
-            for i in df.columns:
-                arabic_letter, roman_letter, devanagari_letter = str(df[i][0]).strip(), str(df[i][1]).strip(), str(df[i][2]).strip()
-                self.arabic_to_devanagari_map_pass2[arabic_letter] = devanagari_letter
+        maps['devanagari_consonants'] = []
+        for map_file in self.consonants_map_files:
+            for arabic_letter, roman_letter, devanagari_letter in read_mapping_file(self.data_dir+map_file):
+                maps['arabic_to_devanagari_map_pass2'][arabic_letter] = devanagari_letter
 
                 # Non-initial forms: Consonant+ا to Consonant+ा
-                self.arabic_to_devanagari_map_pass2[arabic_letter+'ا'] = devanagari_letter+'ा'
+                maps['arabic_to_devanagari_map_pass2'][arabic_letter+'ا'] = devanagari_letter+'ा'
                 if arabic_letter not in {'ی', 'و', 'ھ'}:
-                    consonants.append((arabic_letter, roman_letter, devanagari_letter))
+                    maps['devanagari_consonants'].append(devanagari_letter)
 
                 arabic_shadda, devanagari_shadda = arabic_letter+" ّ".strip(), devanagari_letter+'्'+devanagari_letter
-                self.arabic_to_devanagari_map_pass1[arabic_shadda] = devanagari_shadda
-                self.arabic_to_devanagari_map_pass1[arabic_shadda+'ا'] = devanagari_shadda+'ा'
+                maps['arabic_to_devanagari_map_pass1'][arabic_shadda] = devanagari_shadda
+                maps['arabic_to_devanagari_map_pass1'][arabic_shadda+'ا'] = devanagari_shadda+'ा'
                 # Note on why it's not in pass-2: پکّا is converted as पक्कअ instead of पक्का (Regex sees shadda char as word boundary?)
 
-        # Assume medial ی as ी and و as ो
-        for i in range(len(consonants)):
-            arabic_letter_i, roman_letter_i, devanagari_letter_i = consonants[i]
-            for j in range(len(consonants)):
-                arabic_letter_j, roman_letter_j, devanagari_letter_j = consonants[j]
-                self.devanagari_postprocess_map[devanagari_letter_i+'य'+devanagari_letter_j] = devanagari_letter_i+'ी'+devanagari_letter_j
-                self.devanagari_postprocess_map[devanagari_letter_i+'व'+devanagari_letter_j] = devanagari_letter_i+'ो'+devanagari_letter_j
-                self.devanagari_postprocess_map[devanagari_letter_i+'यं'+devanagari_letter_j] = devanagari_letter_i+'ीं'+devanagari_letter_j
-                self.devanagari_postprocess_map[devanagari_letter_i+'वं'+devanagari_letter_j] = devanagari_letter_i+'ों'+devanagari_letter_j
-
-        self.initial_arabic_to_devanagari_converter = StringTranslator(self.initial_arabic_to_devanagari_map, match_initial_only=True)
-        self.final_arabic_to_devanagari_converter = StringTranslator(self.final_arabic_to_devanagari_map, match_final_only=True)
-        self.arabic_to_devanagari_converter_pass1 = StringTranslator(self.arabic_to_devanagari_map_pass1)
-        self.arabic_to_devanagari_converter_pass2 = StringTranslator(self.arabic_to_devanagari_map_pass2)
-        self.arabic_to_devanagari_final_cleanup = StringTranslator(self.arabic_to_devanagari_cleanup_pass)
-        self.hamza_to_devanagari_converter = StringTranslator(self.hamza_to_devanagari_map)
-        self.hamza_combo_to_devanagari_converter = StringTranslator(self.hamza_combo_to_devanagari_map)
-        self.devanagari_postprocessor = StringTranslator(self.devanagari_postprocess_map)
-
-        from indicnlp.normalize.indic_normalize import DevanagariNormalizer
-        self.devanagari_normalizer = DevanagariNormalizer()
+        for direction in WORD_BOUNDARY_REGEXES:
+            words_map = maps[direction + '_words_map'] = {}
+            word_regex = re.compile(WORD_CHAR_REGEXES[direction] + '+')
+            for map_file in self.words_map_files.get(direction, []):
+                for arabic_word, roman_word, devanagari_word in read_mapping_file(self.data_dir+map_file):
+                    source_word, target_word = (arabic_word, devanagari_word) if direction == ARABIC_TO_DEVANAGARI else (devanagari_word, arabic_word)
+                    if not word_regex.fullmatch(source_word):
+                        raise ValueError('%s: %r is not a single word' % (map_file, source_word))
+                    words_map[source_word] = target_word
+
+        return maps
+
+    def compile_maps(self, maps):
+        translators = {
+            'initial_arabic_to_devanagari_converter': self.translator_class(maps['initial_arabic_to_devanagari_map'], match_initial_only=True),
+            'final_arabic_to_devanagari_converter': self.translator_class(maps['final_arabic_to_devanagari_map'], match_final_only=True),
+            'arabic_to_devanagari_converter_pass1': self.translator_class(maps['arabic_to_devanagari_map_pass1']),
+            'arabic_to_devanagari_converter_pass2': self.translator_class(maps['arabic_to_devanagari_map_pass2']),
+            'arabic_to_devanagari_final_cleanup': self.translator_class(maps['arabic_to_devanagari_cleanup_pass']),
+            'hamza_to_devanagari_converter': self.translator_class(maps['hamza_to_devanagari_map']),
+            'hamza_combo_to_devanagari_converter': self.translator_class(maps['hamza_combo_to_devanagari_map']),
+            # Matched as whole words, by the trie-based matcher even when not `compiled` (same output),
+            # since the plain alternation of as many words would be slow
+            'arabic_to_devanagari_words_converter': CompiledStringTranslator(maps['arabic_to_devanagari_words_map'], match_initial_only=True, match_final_only=True,
+                                                                             boundary_regex=WORD_BOUNDARY_REGEXES[ARABIC_TO_DEVANAGARI], support_back_translation=False),
+            'devanagari_to_arabic_words_converter': CompiledStringTranslator(maps['devanagari_to_arabic_words_map'], match_initial_only=True, match_final_only=True,
+                                                                             boundary_regex=WORD_BOUNDARY_REGEXES[DEVANAGARI_TO_ARABIC], support_back_translation=False),
+            # Assume medial ی as ी and و as ो
+            'devanagari_postprocessor': InfixTranslator(DEVANAGARI_MEDIAL_VOWELS_MAP, maps['devanagari_consonants']),
+        }
+        if self.compiled:
+            translators['devanagari_preprocessor'] = CompiledStringTranslator(DEVANAGARI_PREPROCESS_MAP)
+            translators['devanagari_nuqta_consonants_simplifier'] = CompiledStringTranslator(DEVANAGARI_NUQTA_CONSONANTS_SIMPLIFY_MAP, support_back_translation=False)
+        else:
+            translators['devanagari_preprocessor'] = devanagari_preprocessor
+            translators['devanagari_nuqta_consonants_simplifier'] = devanagari_nuqta_consonants_simplifier
+        return translators
     
+    def transliterate_lexicon_words(self, text, direction):
+        '''
+        Converts the (whole) words of the lexicon of the given direction, leaving the rest of the text as is
+        '''
+        words_map = self.arabic_to_devanagari_words_map if direction == ARABIC_TO_DEVANAGARI else self.devanagari_to_arabic_words_map
+        if not words_map:
+            return text
+        if text in words_map:
+            return words_map[text]
+        converter = self.arabic_to_devanagari_words_converter if direction == ARABIC_TO_DEVANAGARI else self.devanagari_to_arabic_words_converter
+        return converter.translate(text)
+
     def arabic_normalize(self, text):
-        text = remove_diacritics(text) # Drops short-vowels
-        text = normalize_combine_characters(normalize_characters(text))
-        text = text.replace(',', '،').replace('?', '؟').replace('؛', ';').replace('؍', '/').replace('٪', '%')
+        text = text.translate(arabic_normalizer) # Also drops short-vowels
 
-        # Improper hamzas
-        text = text.replace("اے", "ائے")
-        text = re.sub("(\B)یے", r"\1ئے", text)
+        # Combine letters with hamza/madda, and fix improper hamzas
+        text = ARABIC_COMBINE_REGEX.sub(lambda match: ARABIC_COMBINE_MAP[match.group()], text)
+        text = ARABIC_IMPROPER_HAMZA_REGEX.sub('ئے', text)
 
         # If word starts with hamza, mostly an spacing error. Remove space
-        text = re.sub('\s([ۓؤئ])', '\\1', text)
+        text = ARABIC_SPACED_HAMZA_REGEX.sub(r'\1', text)
         return text
     
     def devanagari_normalize(self, text, abjadify_initial_vowels=True, drop_virama=False):
@@ -137,7 +223,7 @@ class BaseIndoArabicTransliterator:
         text = text.translate(devanagari_non_initial_vowels_abjadifier)
         text = self.devanagari_postprocessor.reverse_translate(text)
         text = self.devanagari_postprocessor.reverse_translate(text)
-        text = devanagari_preprocessor.translate(text)
+        text = self.devanagari_preprocessor.translate(text)
         return text
     
     def devanagari_remove_short_vowels(self, text):
@@ -146,4 +232,47 @@ class BaseIndoArabicTransliterator:
         return text
 
     def devanagari_nativize(self, text):
-        return devanagari_nuqta_consonants_simplifier.translate(text)
+        return self.devanagari_nuqta_consonants_simplifier.translate(text)
+
+    def transliterate_batch(self, transliterate, texts, batch_size=DEFAULT_BATCH_SIZE, segmenter=None, convert_common_chars=True, **kwargs):
+        '''
+        Same as `[transliterate(text, **kwargs) for text in texts]`, but runs each pass only once per batch of texts,
+        by joining them with BATCH_SEPARATOR and splitting back the result.
+        With the `segmenter` of the source script, only the runs of words to be converted are passed through the passes
+        (see `ScriptRunSegmenter`), and the others (for eg., in Latin) are kept as is.
+        '''
+        if segmenter is not None:
+            runs_list = [segmenter.split(text, convert_common_chars) for text in texts]
+            converted_runs = iter(self.transliterate_batch(transliterate, [run for runs in runs_list for run in runs[1::2]], batch_size, **kwargs))
+            results = []
+            for runs in runs_list:
+                runs[1::2] = islice(converted_runs, len(runs) // 2)
+                results.append(''.join(runs))
+            return results
+
+        results = []
+        batch = []
+        for text in texts:
+            if BATCH_SEPARATOR in text:
+                results.extend(self.transliterate_joined(transliterate, batch, **kwargs))
+                results.append(transliterate(text, **kwargs))
+                batch = []
+                continue
+
+            batch.append(text)
+            if len(batch) == batch_size:
+                results.extend(self.transliterate_joined(transliterate, batch, **kwargs))
+                batch = []
+
+        results.extend(self.transliterate_joined(transliterate, batch, **kwargs))
+        return results
+
+    @staticmethod
+    def transliterate_joined(transliterate, batch, **kwargs):
+        if not batch:
+            return []
+        results = transliterate(BATCH_SEPARATOR.join(batch), **kwargs).split(BATCH_SEPARATOR)
+        if len(results) != len(batch):
+            # Should never happen, unless some pass drops or adds the separator
+            results = [transliterate(text, **kwargs) for text in batch]
+        return results
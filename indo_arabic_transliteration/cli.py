@@ -0,0 +1,185 @@
+'''
+Command-line interface to convert files (or stdin) between the supported scripts.
+
+The input is streamed line by line (each line converted as an independent text, like `script_convert()`),
+so the memory used stays constant regardless of the file size.
+Lines longer than `--max-line-chars` are cut into pieces at safe boundaries (see `SAFE_SPLIT_REGEX`).
+If there is no safe boundary within `--max-buffer-chars`, the line is cut at its last whitespace run (or anywhere, if none),
+so that the memory stays bounded; only then, the conversion around the cut may differ from that of the whole line.
+
+Usage:
+    indo-arabic-transliterate -f ur-PK -t hi-IN input.txt.gz -o output.txt
+    cat input.jsonl | python -m indo_arabic_transliteration -f sd-PK -t sd-IN --jsonl --field text --field title
+'''
+import sys
+import json
+import gzip
+import re
+import argparse
+from itertools import chain, tee
+
+from .mapper import DELEGATES, script_convert_batch
+from .lossless_converter import DELEGATES as LOSSLESS_DELEGATES
+from .common import SAFE_SPLIT_REGEX
+from .parallel import iter_chunks, parallel_script_convert
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_MAX_LINE_CHARS = 1 << 20
+# Default `max_buffer_chars`, in multiples of `max_line_chars`
+MAX_BUFFER_FACTOR = 4
+SPACES_REGEX = re.compile(r'\s+')
+
+def open_text_file(path, mode):
+    '''
+    Opens the given file (or stdin/stdout for `-`) as UTF-8 text, (de)compressing it if named `*.gz`.
+    Newlines are kept as is.
+    '''
+    if path == '-':
+        stream = sys.stdin if mode == 'r' else sys.stdout
+        stream.flush()
+        return open(stream.fileno(), mode, encoding='utf-8', newline='', closefd=False)
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8', newline='')
+    return open(path, mode, encoding='utf-8', newline='')
+
+def split_line_ending(line):
+    if line.endswith('\r\n'):
+        return line[:-2], '\r\n'
+    if line.endswith('\n'):
+        return line[:-1], '\n'
+    return line, ''
+
+def find_split_point(text, start=0):
+    '''
+    Returns the index of the last safe boundary in the given text (searched from `start`), or 0 if there is none.
+    A whitespace run at the end is not safe, since the text that follows it (not yet read) is not known.
+    '''
+    split_point = 0
+    for match in SAFE_SPLIT_REGEX.finditer(text, start):
+        if match.end() < len(text):
+            split_point = match.start()
+    return split_point
+
+def find_forced_split_point(text):
+    '''
+    Returns the index of the last whitespace run in the given text (but not at its start), else the end of the text
+    '''
+    split_point = len(text)
+    for match in SPACES_REGEX.finditer(text, 1):
+        split_point = match.start()
+    return split_point
+
+def iter_line_records(stream, max_line_chars=DEFAULT_MAX_LINE_CHARS, max_buffer_chars=None):
+    '''
+    Yields `(texts, render)` per line (or piece of an overlong line),
+    where `render(converted_texts)` gives the output string.
+    At most `max_buffer_chars` (default: MAX_BUFFER_FACTOR * `max_line_chars`) are kept waiting for a safe boundary.
+    '''
+    max_buffer_chars = max_buffer_chars or MAX_BUFFER_FACTOR * max_line_chars
+    pending = ''
+    # The text carried over has no safe boundary before the whitespace run at its end, hence only the rest is searched
+    search_start = 0
+    while True:
+        line = stream.readline(max_line_chars)
+        if not line:
+            break
+        text, line_ending = split_line_ending(pending + line)
+        pending = ''
+        if not line_ending and len(line) == max_line_chars:
+            # Line is not yet complete, emit only up to the last safe boundary and carry over the rest
+            split_point = find_split_point(text, search_start)
+            if not split_point and len(text) >= max_buffer_chars:
+                # Still no safe boundary, cut anyway (at the last whitespace) to bound the memory
+                split_point = find_forced_split_point(text)
+            if not split_point:
+                # No safe boundary yet, keep reading (instead of cutting a word)
+                pending = text
+                search_start = len(text.rstrip())
+                continue
+            text, pending = text[:split_point], text[split_point:]
+            search_start = len(pending.rstrip())
+        else:
+            search_start = 0
+        yield [text], (lambda converted, line_ending=line_ending: converted[0] + line_ending)
+    if pending:
+        yield [pending], (lambda converted: converted[0])
+
+def iter_jsonl_records(stream, fields):
+    '''
+    Yields `(texts, render)` per JSON line, for the string values of the given fields
+    '''
+    for line in stream:
+        text, line_ending = split_line_ending(line)
+        if not text.strip():
+            yield [], (lambda converted, line=line: line)
+            continue
+        record = json.loads(text)
+        keys = [field for field in fields if isinstance(record.get(field), str)]
+
+        def render(converted, record=record, keys=keys, line_ending=line_ending):
+            record.update(zip(keys, converted))
+            return json.dumps(record, ensure_ascii=False) + line_ending
+
+        yield [record[key] for key in keys], render
+
+def convert_stream(texts, from_script, to_script, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, with_diacritics=False):
+    '''
+    Lazily converts the given iterable of texts, in the same order
+    '''
+    if workers > 1:
+        return parallel_script_convert(texts, from_script, to_script, workers=workers, chunksize=chunk_size, with_diacritics=with_diacritics)
+    chunks = iter_chunks(texts, chunk_size)
+    return chain.from_iterable(script_convert_batch(chunk, from_script, to_script, with_diacritics) for chunk in chunks)
+
+def transliterate_records(records, from_script, to_script, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, with_diacritics=False):
+    '''
+    Yields the output string for each `(texts, render)` record.
+    Records are buffered only for the chunks that are being converted.
+    '''
+    records, pending_records = tee(records)
+    texts = chain.from_iterable(texts for texts, render in records)
+    converted_texts = convert_stream(texts, from_script, to_script, workers, chunk_size, with_diacritics)
+    for texts, render in pending_records:
+        yield render([next(converted_texts) for _ in texts])
+
+def get_parser():
+    scripts = sorted(set(chain.from_iterable(DELEGATES)))
+    parser = argparse.ArgumentParser(prog='indo-arabic-transliterate', description='Script Conversion for Indo-Pakistani languages')
+    parser.add_argument('input', nargs='?', default='-', help='Input file (`-` for stdin, `*.gz` for gzip), default: stdin')
+    parser.add_argument('-o', '--output', default='-', help='Output file (`-` for stdout, `*.gz` for gzip), default: stdout')
+    parser.add_argument('-f', '--from-script', required=True, choices=scripts, help='Source script')
+    parser.add_argument('-t', '--to-script', required=True, choices=scripts, help='Target script')
+    parser.add_argument('--jsonl', action='store_true', help='Input is JSON lines, convert only the given fields')
+    parser.add_argument('--field', action='append', dest='fields', help='Field to convert in each JSON line (repeatable)')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes (default: 1, in-process)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Number of texts converted at once')
+    parser.add_argument('--max-line-chars', type=int, default=DEFAULT_MAX_LINE_CHARS, help='Longer lines are split at safe boundaries')
+    parser.add_argument('--max-buffer-chars', type=int, help='Longer lines without any safe boundary are split at whitespace (default: %d times --max-line-chars)' % MAX_BUFFER_FACTOR)
+    parser.add_argument('--with-diacritics', action='store_true', help='Retain the vowels as diacritics (from Indic scripts to PersoArabic, needs aksharamukha)')
+    return parser
+
+def main(argv=None):
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    if args.with_diacritics:
+        if (args.from_script, args.to_script) not in LOSSLESS_DELEGATES:
+            parser.error('Conversion with diacritics from %s to %s is not supported' % (args.from_script, args.to_script))
+    elif (args.from_script, args.to_script) not in DELEGATES:
+        parser.error('Conversion from %s to %s is not supported' % (args.from_script, args.to_script))
+    if args.jsonl and not args.fields:
+        parser.error('--jsonl requires at least one --field')
+    if args.max_line_chars < 1:
+        parser.error('--max-line-chars must be positive')
+    if args.max_buffer_chars is not None and args.max_buffer_chars < 1:
+        parser.error('--max-buffer-chars must be positive')
+
+    with open_text_file(args.input, 'r') as input_file, open_text_file(args.output, 'w') as output_file:
+        if args.jsonl:
+            records = iter_jsonl_records(input_file, args.fields)
+        else:
+            records = iter_line_records(input_file, args.max_line_chars, args.max_buffer_chars)
+        for output in transliterate_records(records, args.from_script, args.to_script, args.workers, args.chunk_size, args.with_diacritics):
+            output_file.write(output)
+
+if __name__ == '__main__':
+    main()
@@ -45,6 +45,82 @@ DEVANAGARI_PREPROCESS_MAP = {
 }
 devanagari_preprocessor = StringTranslator(DEVANAGARI_PREPROCESS_MAP)
 
+# Normalization of Indic scripts, with the same results as indicnlp's normalizers (with their default options)
+INDIC_NORMALIZE_MAP = {
+    # Invisible characters
+    '\ufeff': '',
+    '\ufffe': '',
+    '\u2060': '',
+    '\u00ad': '',
+    '\u200b': ' ',
+    '\u00a0': ' ',
+    '\u200c': '',
+    '\u200d': '',
+
+    # Punctuations (as in sacremoses' MosesNormalizer)
+    '„': '"',
+    '“': '"',
+    '”': '"',
+    '–': '-',
+    '—': ' - ',
+    '´': "'",
+    '‘': "'",
+    '‚': "'",
+    '’': "'",
+    '…': '...',
+
+    # Pipe as poorna virama
+    '|': '।',
+}
+
+DEVANAGARI_NORMALIZE_MAP = {
+    **INDIC_NORMALIZE_MAP,
+    'ॲ': 'ए', # Marathi chandra-a
+
+    # Decompose the nukta letters
+    '\u0929': '\u0928\u093c',
+    '\u0931': '\u0930\u093c',
+    '\u0934': '\u0933\u093c',
+    '\u0958': '\u0915\u093c',
+    '\u0959': '\u0916\u093c',
+    '\u095a': '\u0917\u093c',
+    '\u095b': '\u091c\u093c',
+    '\u095c': '\u0921\u093c',
+    '\u095d': '\u0922\u093c',
+    '\u095e': '\u092b\u093c',
+    '\u095f': '\u092f\u093c',
+}
+
+class IndicNormalizer:
+    '''
+    Normalizes the text of an Indic script in a single `str.translate()` and a couple of regexes.
+    Also converts the colons after the letters of the script (in `script_range`) to visarga,
+    and the given multi-character vowels (if any) to the single ones, before the rest.
+    '''
+    def __init__(self, normalize_map, script_range, visarga, vowels_map=None):
+        self.normalizer = str.maketrans(normalize_map)
+        self.visarga_regex = re.compile('([%s]):' % script_range)
+        self.visarga_repl = '\\1' + visarga
+        self.vowels_map = vowels_map
+        if vowels_map:
+            self.vowels_regex = re.compile('|'.join(map(re.escape, vowels_map)))
+
+    def normalize(self, text):
+        if self.vowels_map:
+            text = self.vowels_regex.sub(lambda match: self.vowels_map[match.group()], text)
+        text = text.translate(self.normalizer).replace("''", '"')
+        return self.visarga_regex.sub(self.visarga_repl, text)
+
+devanagari_normalizer = IndicNormalizer(DEVANAGARI_NORMALIZE_MAP, '\u0900-\u097f', 'ः')
+
+DEVANAGARI_MEDIAL_VOWELS_MAP = {
+    # Assume medial ی as ी and و as ो (when between consonants)
+    'य': 'ी',
+    'व': 'ो',
+    'यं': 'ीं',
+    'वं': 'ों',
+}
+
 DEVANAGARI_SHORT_VOWELS_REMOVE_MAP = {
     # Abjadi-purifier
     'ि': '',
@@ -75,15 +151,12 @@ DEVANAGARI_INITIAL_VOWELS_ABJADIFY = {
 }
 devanagari_initial_vowels_abjadifier = StringTranslator(DEVANAGARI_INITIAL_VOWELS_ABJADIFY, match_initial_only=True, support_back_translation=False)
 
+# Vowels at the start of the text, or after a non-Devanagari character
+DEVANAGARI_INITIAL_VOWELS_REGEX = re.compile('(?<![\u0900-\u0963\u0972-\u097f])[%s]' % ''.join(DEVANAGARI_INITIAL_VOWELS_ABJADIFY))
+
 def devanagari_initial_vowels_abjadify(text):
     # TODO: Handle in a generalized way
-    text = re.sub('((^|[^\u0900-\u0963\u0972-\u097f]))इ', '\\1अ', text)
-    text = re.sub('((^|[^\u0900-\u0963\u0972-\u097f]))ई', '\\1ए', text)
-    text = re.sub('((^|[^\u0900-\u0963\u0972-\u097f]))उ', '\\1अ', text)
-    text = re.sub('((^|[^\u0900-\u0963\u0972-\u097f]))ऊ', '\\1ओ', text)
-    text = re.sub('((^|[^\u0900-\u0963\u0972-\u097f]))ऐ', '\\1ए', text)
-    text = re.sub('((^|[^\u0900-\u0963\u0972-\u097f]))औ', '\\1ओ', text)
-    return text
+    return DEVANAGARI_INITIAL_VOWELS_REGEX.sub(lambda match: DEVANAGARI_INITIAL_VOWELS_ABJADIFY[match.group()], text)
 
 DEVANAGARI_NUQTA_CONSONANTS_SIMPLIFY_MAP = {
     # Unicode chars
@@ -112,3 +185,167 @@ DEVANAGARI_NUQTA_CONSONANTS_SIMPLIFY_MAP = {
     'ॿ': 'ब्ब',
 }
 devanagari_nuqta_consonants_simplifier = StringTranslator(DEVANAGARI_NUQTA_CONSONANTS_SIMPLIFY_MAP, support_back_translation=False)
+
+# Normalization of Arabic scripts, in a single `str.translate()` and a few regexes (same results as the urduhack's normalizers).
+# Characters from the other Arabic blocks (presentation forms, Arabic letters and digits) to Urdu characters
+ARABIC_CHARACTERS_NORMALIZE_MAP = {
+    'ﺁ': 'آ', 'ﺂ': 'آ',
+    'ﺃ': 'أ',
+    'ﺍ': 'ا', 'ﺎ': 'ا',
+    'ﺏ': 'ب', 'ﺐ': 'ب', 'ﺑ': 'ب', 'ﺒ': 'ب',
+    'ﭖ': 'پ', 'ﭘ': 'پ', 'ﭙ': 'پ',
+    'ﺕ': 'ت', 'ﺖ': 'ت', 'ﺗ': 'ت', 'ﺘ': 'ت',
+    'ﭦ': 'ٹ', 'ﭧ': 'ٹ', 'ﭨ': 'ٹ', 'ﭩ': 'ٹ',
+    'ﺛ': 'ث', 'ﺜ': 'ث', 'ﺚ': 'ث',
+    'ﺝ': 'ج', 'ﺞ': 'ج', 'ﺟ': 'ج', 'ﺠ': 'ج',
+    'ﺡ': 'ح', 'ﺣ': 'ح', 'ﺤ': 'ح', 'ﺢ': 'ح',
+    'ﺧ': 'خ', 'ﺨ': 'خ', 'ﺦ': 'خ',
+    'ﺩ': 'د', 'ﺪ': 'د',
+    'ﺬ': 'ذ', 'ﺫ': 'ذ',
+    'ﺭ': 'ر', 'ﺮ': 'ر',
+    'ﺯ': 'ز', 'ﺰ': 'ز',
+    'ﺱ': 'س', 'ﺲ': 'س', 'ﺳ': 'س', 'ﺴ': 'س',
+    'ﺵ': 'ش', 'ﺶ': 'ش', 'ﺷ': 'ش', 'ﺸ': 'ش',
+    'ﺹ': 'ص', 'ﺺ': 'ص', 'ﺻ': 'ص', 'ﺼ': 'ص',
+    'ﺽ': 'ض', 'ﺾ': 'ض', 'ﺿ': 'ض', 'ﻀ': 'ض',
+    'ﻃ': 'ط', 'ﻄ': 'ط',
+    'ﻅ': 'ظ', 'ﻇ': 'ظ', 'ﻈ': 'ظ',
+    'ﻉ': 'ع', 'ﻊ': 'ع', 'ﻋ': 'ع', 'ﻌ': 'ع',
+    'ﻍ': 'غ', 'ﻏ': 'غ', 'ﻐ': 'غ',
+    'ﻑ': 'ف', 'ﻒ': 'ف', 'ﻓ': 'ف', 'ﻔ': 'ف',
+    'ﻕ': 'ق', 'ﻖ': 'ق', 'ﻗ': 'ق', 'ﻘ': 'ق',
+    'ﻝ': 'ل', 'ﻞ': 'ل', 'ﻟ': 'ل', 'ﻠ': 'ل',
+    'ﻡ': 'م', 'ﻢ': 'م', 'ﻣ': 'م', 'ﻤ': 'م',
+    'ﻥ': 'ن', 'ﻦ': 'ن', 'ﻧ': 'ن', 'ﻨ': 'ن',
+    'ﭺ': 'چ', 'ﭻ': 'چ', 'ﭼ': 'چ', 'ﭽ': 'چ',
+    'ﮈ': 'ڈ', 'ﮉ': 'ڈ',
+    'ﮍ': 'ڑ', 'ﮌ': 'ڑ',
+    'ﮋ': 'ژ',
+    'ﮎ': 'ک', 'ﮏ': 'ک', 'ﮐ': 'ک', 'ﮑ': 'ک', 'ﻛ': 'ک', 'ك': 'ک',
+    'ﮒ': 'گ', 'ﮓ': 'گ', 'ﮔ': 'گ', 'ﮕ': 'گ',
+    'ﮞ': 'ں', 'ﮟ': 'ں',
+    'ﻮ': 'و', 'ﻭ': 'و',
+    'ﺅ': 'ؤ',
+    'ﮪ': 'ھ', 'ﮬ': 'ھ', 'ﮭ': 'ھ', 'ﻬ': 'ھ', 'ﻫ': 'ھ', 'ﮫ': 'ھ',
+    'ﻩ': 'ہ', 'ﮦ': 'ہ', 'ﻪ': 'ہ', 'ﮧ': 'ہ', 'ﮩ': 'ہ', 'ﮨ': 'ہ', 'ه': 'ہ',
+    'ة': 'ۃ',
+    'ﺀ': 'ء',
+    'ﯼ': 'ی', 'ى': 'ی', 'ﯽ': 'ی', 'ﻰ': 'ی', 'ﻱ': 'ی', 'ﻲ': 'ی', 'ﯾ': 'ی', 'ﯿ': 'ی', 'ي': 'ی',
+    'ﺋ': 'ئ', 'ﺌ': 'ئ',
+    'ﮮ': 'ے', 'ﮯ': 'ے', 'ﻳ': 'ے', 'ﻴ': 'ے',
+    '٠': '۰',
+    '١': '۱',
+    '٢': '۲',
+    '٣': '۳',
+    '٤': '۴',
+    '٥': '۵',
+    '٦': '۶',
+    '٧': '۷',
+    '٨': '۸',
+    '٩': '۹',
+    'ﻻ': 'لا', 'ﻼ': 'لا',
+    'ـ': '',
+}
+ARABIC_DIACRITICS = '\u064b\u064d\u064e\u064f\u0650\u0670' # Short-vowels, dropped (same as urduhack's `remove_diacritics()`)
+ARABIC_PUNCTUATIONS_NORMALIZE_MAP = {
+    ',': '،',
+    '?': '؟',
+    '؛': ';',
+    '؍': '/',
+    '٪': '%',
+}
+arabic_normalizer = str.maketrans({**ARABIC_CHARACTERS_NORMALIZE_MAP, **ARABIC_PUNCTUATIONS_NORMALIZE_MAP, **dict.fromkeys(ARABIC_DIACRITICS, '')})
+
+ARABIC_COMBINE_MAP = {
+    # Letters followed by combining madda/hamza, to the single characters (same as urduhack's `normalize_combine_characters()`)
+    'آ': 'آ',
+    'أ': 'أ',
+    'ۓ': 'ۓ',
+    # Improper hamza
+    'اے': 'ائے',
+}
+# Hamza-combos are combined first, hence اے only when not followed by hamza
+ARABIC_COMBINE_REGEX = re.compile('ا[ٓٔ]|ۓ|اے(?!ٔ)')
+ARABIC_IMPROPER_HAMZA_REGEX = re.compile(r'\Bیے')
+# If word starts with hamza, mostly an spacing error
+ARABIC_SPACED_HAMZA_REGEX = re.compile(r'\s([ۓؤئ])')
+
+# Characters read together with a whitespace run next to them: the isolated Sindhi letters and the hamza-combos (see above)
+SPACE_SENSITIVE_CHARS_BEHIND = '۾۽ءم'
+SPACE_SENSITIVE_CHARS_AHEAD = 'ۓؤئ۾۽ءمھے'
+
+def get_normalized_into(chars, at_start):
+    '''
+    Returns the characters which `arabic_normalizer` maps to a string starting (or ending) with one of the given characters,
+    or drops (hence joining their neighbours), for eg. the presentation forms of the given letters
+    '''
+    normalized_into = set()
+    for code, value in arabic_normalizer.items():
+        if not value or (value[0] if at_start else value[-1]) in chars:
+            normalized_into.add(chr(code))
+    return ''.join(map(re.escape, sorted(normalized_into)))
+
+# Whitespace runs at which a text can be split, with each piece (and the run itself) converted independently to the same result.
+# Excludes the runs next to: the space-sensitive characters (and the ones normalized into them),
+# and the diacritics/invisible characters which are dropped by normalization (hence changing the neighbours).
+SAFE_SPLIT_BEHIND = r'(?<![\s%s%s\u064b-\u065f\u0670\u00ad\u200b-\u200f\u2060\ufeff])(?<!में)(?<!ऐं)' % (SPACE_SENSITIVE_CHARS_BEHIND, get_normalized_into(SPACE_SENSITIVE_CHARS_BEHIND, at_start=False))
+SAFE_SPLIT_AHEAD = r'(?![\s%s%s\u064b-\u065f\u0670\u00ad\u200b-\u200f\u2060\ufeffमऐ])' % (SPACE_SENSITIVE_CHARS_AHEAD, get_normalized_into(SPACE_SENSITIVE_CHARS_AHEAD, at_start=True))
+SAFE_SPLIT_REGEX = re.compile(SAFE_SPLIT_BEHIND + r'(\s+)' + SAFE_SPLIT_AHEAD)
+
+
+# Unicode ranges of the scripts, to split the texts into the runs of words to be converted and the ones to pass through
+ARABIC_SCRIPT_RANGES = '\u0600-\u06ff\u0750-\u077f\u08a0-\u08ff\ufb50-\ufdff\ufe70-\ufeff'
+DEVANAGARI_SCRIPT_RANGES = '\u0900-\u097f\ua8e0-\ua8ff'
+GURMUKHI_SCRIPT_RANGES = '\u0a00-\u0a7f'
+# Characters out of the Indic scripts, which are changed when converting from them:
+# the ones normalized by IndicNormalizer (and '' to "), the punctuations in punctuations.csv, and ʿ which is read as ع (see hamza.csv)
+INDIC_COMMON_CHARS = ''.join(char for char in INDIC_NORMALIZE_MAP if len(char) == 1) + "'" + ',?' + '\u02bf'
+
+class ScriptRunSegmenter:
+    '''
+    Splits a text into alternate runs to pass through as is, and runs to be converted, i.e. having the words with
+    characters of the source script (in `script_ranges`), or of `common_chars` (like punctuations and numerals).
+    The other words are passed through in stretches, cut only at the SAFE_SPLIT_REGEX boundaries,
+    hence the conversion of the remaining runs is same as that of the whole text.
+    With `convert_common_chars=False`, the words having only common characters (but no letters of the script) are also passed through.
+    '''
+    def __init__(self, script_ranges, common_chars=''):
+        self.has_ascii_common_chars = any(char.isascii() for char in common_chars)
+        # Tables for each value of `convert_common_chars`
+        self.convertible_regexes = {}
+        self.passthrough_char_regexes = {}
+        self.passthrough_regexes = {}
+        for convert_common_chars, chars in [(True, script_ranges + re.escape(common_chars)), (False, script_ranges)]:
+            self.convertible_regexes[convert_common_chars] = re.compile('[%s]' % chars)
+            self.passthrough_char_regexes[convert_common_chars] = re.compile(r'[^\s%s]' % chars)
+            # Stretches of whole words without any character to convert (separated by whitespace, also without them),
+            # from and up to the whitespace runs which can be split (or the start/end of text)
+            self.passthrough_regexes[convert_common_chars] = re.compile(
+                r'(?:^|{behind}\s+{ahead})([^\s{chars}]+(?:[^\S{chars}]+[^\s{chars}]+)*)(?=$|{behind}\s+{ahead})'.format(
+                    behind=SAFE_SPLIT_BEHIND, ahead=SAFE_SPLIT_AHEAD, chars=chars))
+
+    def split(self, text, convert_common_chars=True):
+        '''
+        Returns the list of runs, with the ones to be converted at the odd indices
+        '''
+        if text.isascii() and not (convert_common_chars and self.has_ascii_common_chars):
+            return [text]
+        if not self.convertible_regexes[convert_common_chars].search(text):
+            return [text]
+        # Quick check, since most of the texts are entirely in the source script
+        if not self.passthrough_char_regexes[convert_common_chars].search(text):
+            return ['', text, '']
+
+        runs = ['']
+        position = 0
+        for match in self.passthrough_regexes[convert_common_chars].finditer(text):
+            start, end = match.span(1)
+            runs.append(text[position:start])
+            runs.append(match.group(1))
+            position = end
+        runs.append(text[position:])
+        runs.append('')
+        return runs
+
+arabic_segmenter = ScriptRunSegmenter(ARABIC_SCRIPT_RANGES)
+devanagari_segmenter = ScriptRunSegmenter(DEVANAGARI_SCRIPT_RANGES, INDIC_COMMON_CHARS)
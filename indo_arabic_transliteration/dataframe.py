@@ -0,0 +1,76 @@
+'''
+Transliteration of DataFrame columns (pandas Series and Arrow arrays).
+
+Columns like names, places or product titles repeat the same few values a lot,
+hence each distinct value is converted only once (in a single batch), and the results are scattered back by index.
+Nulls are kept as they are, and so are the non-string cells of mixed (object) columns.
+'''
+import numpy as np
+import pandas as pd
+
+from .mapper import DELEGATES
+
+def transliterate_unique(values, from_script, to_script):
+    '''
+    Returns the conversions of the given distinct values, as an object array (non-string values unchanged)
+    '''
+    results = np.array(values, dtype=object)
+    is_str = np.fromiter((isinstance(value, str) for value in results), dtype=bool, count=len(results))
+    if is_str.any():
+        results[is_str] = DELEGATES[(from_script, to_script)].batch(results[is_str].tolist())
+    return results
+
+def transliterate_series(series: pd.Series, from_script: str, to_script: str) -> pd.Series:
+    """Convert the given column between required scripts, converting each distinct value only once.
+
+    Args:
+        series (pd.Series): Column of texts (may contain nulls and non-string values)
+        from_script (str): Source script
+        to_script (str): Target script
+
+    Returns:
+        pd.Series: Converted column, with the same index and name
+    """
+    codes, uniques = pd.factorize(series)
+    results = transliterate_unique(np.asarray(uniques, dtype=object), from_script, to_script)
+    # Nulls are coded as -1, hence an extra last slot holding a placeholder, replaced back with the original nulls
+    values = np.append(results, None).take(codes)
+    is_null = codes == -1
+    if is_null.any():
+        values[is_null] = series.to_numpy(dtype=object)[is_null]
+
+    result = pd.Series(values, index=series.index, name=series.name, dtype=object)
+    if isinstance(series.dtype, pd.StringDtype):
+        result = result.astype(series.dtype)
+    return result
+
+def transliterate_arrow(array, from_script: str, to_script: str):
+    """Convert the given Arrow column between required scripts, converting each distinct value only once.
+
+    Args:
+        array (pyarrow.Array|pyarrow.ChunkedArray): Column of strings (or dictionary-encoded strings)
+        from_script (str): Source script
+        to_script (str): Target script
+
+    Returns:
+        pyarrow.Array|pyarrow.ChunkedArray: Converted column of the same type (nulls preserved),
+            with the same chunks and dictionary indices
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    is_dictionary = pa.types.is_dictionary(array.type)
+    value_type = array.type.value_type if is_dictionary else array.type
+    if not (pa.types.is_string(value_type) or pa.types.is_large_string(value_type)):
+        raise TypeError('Expected a column of strings, got: %s' % value_type)
+
+    chunks = array.chunks if isinstance(array, pa.ChunkedArray) else [array]
+    # Only the dictionaries need to be converted, the indices are kept as they are
+    values = [chunk.dictionary for chunk in chunks] if is_dictionary else chunks
+    uniques = pc.drop_null(pc.unique(pa.chunked_array(values, type=value_type)))
+    results = pa.array(DELEGATES[(from_script, to_script)].batch(uniques.to_pylist()), type=value_type)
+    # Null cells get null indices, hence stay null after take()
+    converted = [pc.take(results, pc.index_in(chunk_values, value_set=uniques)) for chunk_values in values]
+    if is_dictionary:
+        converted = [pa.DictionaryArray.from_arrays(chunk.indices, dictionary, ordered=array.type.ordered) for chunk, dictionary in zip(chunks, converted)]
+    return pa.chunked_array(converted, type=array.type) if isinstance(array, pa.ChunkedArray) else converted[0]
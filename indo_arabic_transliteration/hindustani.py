@@ -1,4 +1,5 @@
-from .base import BaseIndoArabicTransliterator
+from .base import BaseIndoArabicTransliterator, ARABIC_TO_DEVANAGARI, DEVANAGARI_TO_ARABIC
+from .common import arabic_segmenter, devanagari_segmenter
 import re
 
 URDU_POSTPROCESS_MAP = {
@@ -9,37 +10,49 @@ URDU_POSTPROCESS_MAP = {
 urdu_postprocessor = str.maketrans(URDU_POSTPROCESS_MAP)
 
 CONSONANT_MAP_FILES = ['hindustani_consonants.csv']
+# Whole words whose conversion is not derivable by the letter rules (for eg., the conjunction و), for each direction
+WORDS_MAP_FILES = {
+    ARABIC_TO_DEVANAGARI: ['hindustani_words.csv'],
+}
 
 class HindustaniTransliterator(BaseIndoArabicTransliterator):
-    def __init__(self):
-        super().__init__(CONSONANT_MAP_FILES)
-        
-        # Monkey patch: Force ह to map only to Urdu ہ (not ھ)
-        self.arabic_to_devanagari_converter_pass2.reverse_translation_dict['ह'] = 'ہ'
-        self.arabic_to_devanagari_converter_pass2.reverse_translation_dict['ह'+'ा'] = 'ہ'+'ا'
-        self.arabic_to_devanagari_converter_pass1.reverse_translation_dict['ह्ह'] = 'ہّ'
-        self.arabic_to_devanagari_converter_pass1.reverse_translation_dict['ह्ह'+'ा'] = 'ہّ'+'ا'
+    def __init__(self, compiled=False, words_map_files=WORDS_MAP_FILES):
+        super().__init__(CONSONANT_MAP_FILES, compiled=compiled, words_map_files=words_map_files)
+
+    def compile_maps(self, maps):
+        translators = super().compile_maps(maps)
+
+        # Force ह to map only to Urdu ہ (not ھ)
+        translators['arabic_to_devanagari_converter_pass2'] = self.translator_class(maps['arabic_to_devanagari_map_pass2'], reverse_overrides={
+            'ह': 'ہ',
+            'ह'+'ा': 'ہ'+'ا',
+        })
+        translators['arabic_to_devanagari_converter_pass1'] = self.translator_class(maps['arabic_to_devanagari_map_pass1'], reverse_overrides={
+            'ह्ह': 'ہّ',
+            'ह्ह'+'ा': 'ہّ'+'ا',
+        })
+        return translators
     
     def transliterate_ambiguous_urdu_words_to_hindi(self, text):
-        # TODO: Handle these using mapper
-        text = re.sub(r"(\b)و(\b)", "\\1व\\2", text)
-        text = re.sub(r"(\b)کیں(\b)", "\\1कीं\\2", text)
-        text = re.sub(r"(\b)نہیں(\b)", "\\1नहीं\\2", text)
-        return text
+        return self.transliterate_lexicon_words(text, ARABIC_TO_DEVANAGARI)
     
     def transliterate_from_urdu_to_hindi(self, text, nativize=False):
         text = self.arabic_normalize(text)
-        text = self.transliterate_ambiguous_urdu_words_to_hindi(text)
-        text = self.initial_arabic_to_devanagari_converter.translate(text)
-        
-        # Convert Hamza-combos first, then remaining hamza
-        text = self.hamza_combo_to_devanagari_converter.translate(text)
-        text = self.hamza_to_devanagari_converter.translate(text)
-        
-        text = self.arabic_to_devanagari_converter_pass1.translate(text)
-        text = self.final_arabic_to_devanagari_converter.translate(text)
-        text = self.arabic_to_devanagari_converter_pass2.translate(text)
-        text = self.arabic_to_devanagari_final_cleanup.translate(text)
+        if text in self.arabic_to_devanagari_words_map:
+            # The whole text is a word of the lexicon, none of the Arabic passes would change its conversion
+            text = self.arabic_to_devanagari_words_map[text]
+        else:
+            text = self.transliterate_ambiguous_urdu_words_to_hindi(text)
+            text = self.initial_arabic_to_devanagari_converter.translate(text)
+            
+            # Convert Hamza-combos first, then remaining hamza
+            text = self.hamza_combo_to_devanagari_converter.translate(text)
+            text = self.hamza_to_devanagari_converter.translate(text)
+            
+            text = self.arabic_to_devanagari_converter_pass1.translate(text)
+            text = self.final_arabic_to_devanagari_converter.translate(text)
+            text = self.arabic_to_devanagari_converter_pass2.translate(text)
+            text = self.arabic_to_devanagari_final_cleanup.translate(text)
         text = self.devanagari_postprocessor.translate(text) #  (جمہوریہ) जमहवरयह -> जमहोरयह
         text = self.devanagari_postprocessor.translate(text) # जमहोरयह -> जमहोरीह
         if nativize:
@@ -47,6 +60,7 @@ class HindustaniTransliterator(BaseIndoArabicTransliterator):
         return text
 
     def transliterate_from_hindi_to_urdu(self, text, nativize=False):
+        text = self.transliterate_lexicon_words(text, DEVANAGARI_TO_ARABIC) # Before the normalization, which abjadifies the vowels
         text = self.devanagari_normalize(text)
         text = re.sub('((^|[^\u0900-\u0963\u0972-\u097f]))ए', '\\1ای', text) # Patch: ए is present in both hamza and initial vowels, so handle first
 
@@ -68,6 +82,12 @@ class HindustaniTransliterator(BaseIndoArabicTransliterator):
             text = text.translate(urdu_postprocessor)
         return text
     
+    def transliterate_from_urdu_to_hindi_batch(self, texts, nativize=False, convert_common_chars=True):
+        return self.transliterate_batch(self.transliterate_from_urdu_to_hindi, texts, segmenter=arabic_segmenter, convert_common_chars=convert_common_chars, nativize=nativize)
+
+    def transliterate_from_hindi_to_urdu_batch(self, texts, nativize=False, convert_common_chars=True):
+        return self.transliterate_batch(self.transliterate_from_hindi_to_urdu, texts, segmenter=devanagari_segmenter, convert_common_chars=convert_common_chars, nativize=nativize)
+
     def __call__(self, text, src_lang, dest_lang, nativize=False):
         if dest_lang == 'ur':
             return self.transliterate_from_hindi_to_urdu(text, nativize)
@@ -0,0 +1,176 @@
+'''
+Hybrid conversion: the fast rule-based conversion for most of the words, and an accurate (but slow) backend
+(Sangam API, or the ML models) only for the words where the rules had to guess.
+
+Texts are split at the safe boundaries (`SAFE_SPLIT_REGEX`), and each unique piece is converted by the rules,
+with a few passes watched for their heuristics firing. Such pieces (and the pieces left with letters of the source script)
+are de-duplicated and sent to the backend in a single batch, and its results merged back.
+
+Only the conversions from the Perso-Arabic scripts are supported: the other direction has its own guesses
+(for eg., स to س, ص or ث), which are not watched, hence its flagging would miss most of them.
+
+Usage:
+    from indo_arabic_transliteration.hybrid import hybrid_script_convert_batch
+    hybrid_script_convert_batch(texts, 'ur-PK', 'hi-IN', backend='sangam')
+'''
+import re
+import threading
+from importlib import import_module
+from typing import Callable, Iterable, List, Union
+
+from .common import SAFE_SPLIT_REGEX
+from .mapper import DELEGATES, CONVERTER_CLASSES
+
+# Passes (and their direction) whose matches mean that the rules guessed
+AMBIGUOUS_PASSES = [
+    # Medial و/ی read as vowels, by `DEVANAGARI_MEDIAL_VOWELS_MAP`
+    ('devanagari_postprocessor', 'translate'),
+    # Letters at unconventional places, converted by the fallbacks of `arabic_to_devanagari_cleanup_pass`
+    ('arabic_to_devanagari_final_cleanup', 'translate'),
+]
+
+# Letters of each supported source script, which should not be left in the output
+ARABIC_LETTERS_REGEX = re.compile('[ؠ-يٮ-ۓۺ-ۿݐ-ݿࢠ-ࣇ]')
+SOURCE_LETTERS_REGEXES = {
+    'ur-PK': ARABIC_LETTERS_REGEX,
+    'pa-PK': ARABIC_LETTERS_REGEX,
+    'sd-PK': ARABIC_LETTERS_REGEX,
+}
+
+def get_backend(backend):
+    '''
+    Returns the batch conversion function `(texts, from_script, to_script, **kwargs) -> List[str]` of the given backend
+    '''
+    if callable(backend):
+        return backend
+    if backend == 'sangam':
+        from .sangam_api import online_transliterate_batch
+        return online_transliterate_batch
+    if backend == 'ml':
+        from .ml_based import ml_transliterate_batch
+        return ml_transliterate_batch
+    raise ValueError('Unknown backend: %r' % backend)
+
+class FlaggingTranslator:
+    '''
+    Proxy of a translator, flagging the current conversion (of the current thread) if it changes the text
+    '''
+    def __init__(self, translator, method_name, flags):
+        self.translator = translator
+        self.flags = flags
+        setattr(self, method_name, lambda text: self.flag_if_changed(getattr(translator, method_name), text))
+
+    def __getattr__(self, name):
+        return getattr(self.translator, name)
+
+    def flag_if_changed(self, translate, text):
+        result = translate(text)
+        if result != text:
+            self.flags.flagged = True
+        return result
+
+# Converters with the ambiguous passes watched, one per language (sharing the tables of the ones in `mapper`)
+WATCHED_CONVERTERS = {}
+watched_converters_lock = threading.Lock()
+
+def get_watched_converter(language):
+    '''
+    Returns a converter of the given language, and the thread-local flags set when its ambiguous passes fire
+    '''
+    with watched_converters_lock:
+        if language not in WATCHED_CONVERTERS:
+            module_name, class_name = CONVERTER_CLASSES[language]
+            converter = getattr(import_module(module_name, __package__), class_name)()
+            flags = threading.local()
+            for name, method_name in AMBIGUOUS_PASSES:
+                setattr(converter, name, FlaggingTranslator(getattr(converter, name), method_name, flags))
+            WATCHED_CONVERTERS[language] = converter, flags
+        return WATCHED_CONVERTERS[language]
+
+class HybridTransliterator:
+    '''
+    Converts the texts of a pair of scripts by the rules, and the flagged pieces by the given backend
+    (`'sangam'`, `'ml'`, or a batch function with the signature of `online_transliterate_batch()`).
+    Raises ValueError for the pairs not from a Perso-Arabic script (see above).
+    '''
+    def __init__(self, from_script: str, to_script: str, backend: Union[str, Callable] = 'sangam', fallback_on_error: bool = False, **backend_kwargs):
+        delegate = DELEGATES[(from_script, to_script)]
+        if from_script not in SOURCE_LETTERS_REGEXES:
+            raise ValueError('Hybrid conversion is supported only from the Perso-Arabic scripts (%s), not from %s' % (', '.join(SOURCE_LETTERS_REGEXES), from_script))
+        self.from_script = from_script
+        self.to_script = to_script
+        self.backend = get_backend(backend)
+        self.backend_kwargs = backend_kwargs
+        self.fallback_on_error = fallback_on_error
+        self.source_letters_regex = SOURCE_LETTERS_REGEXES[from_script]
+        self.num_pieces = self.num_flagged_pieces = 0
+
+        # A separate converter, so that the watched passes do not slow down `mapper`
+        converter, self.flags = get_watched_converter(delegate.language)
+        self.transliterate_by_rules = getattr(converter, delegate.method_name)
+
+    def convert_by_rules(self, piece):
+        '''
+        Returns the rule-based conversion of the given piece, and whether it needs the backend
+        '''
+        self.flags.flagged = False
+        result = self.transliterate_by_rules(piece)
+        flagged = self.flags.flagged
+        if self.source_letters_regex.search(result):
+            flagged = True # Not fully converted
+        return result, flagged and not piece.isspace()
+
+    def transliterate_batch(self, texts: Iterable[str]) -> List[str]:
+        pieces_list = [SAFE_SPLIT_REGEX.split(text) for text in texts]
+        unique_pieces = dict.fromkeys(piece for pieces in pieces_list for piece in pieces)
+
+        converted = {}
+        flagged_pieces = []
+        for piece in unique_pieces:
+            converted[piece], flagged = self.convert_by_rules(piece)
+            if flagged:
+                flagged_pieces.append(piece)
+        self.num_pieces += len(unique_pieces)
+        self.num_flagged_pieces += len(flagged_pieces)
+
+        if flagged_pieces:
+            try:
+                converted.update(zip(flagged_pieces, self.backend(flagged_pieces, self.from_script, self.to_script, **self.backend_kwargs)))
+            except Exception:
+                if not self.fallback_on_error:
+                    raise
+                # Keep the rule-based conversions
+        return [''.join(map(converted.__getitem__, pieces)) for pieces in pieces_list]
+
+    def transliterate(self, text: str) -> str:
+        return self.transliterate_batch([text])[0]
+
+    def stats(self):
+        return {
+            'pieces': self.num_pieces,
+            'flagged_pieces': self.num_flagged_pieces,
+            'flagged_fraction': self.num_flagged_pieces / self.num_pieces if self.num_pieces else 0.0,
+        }
+
+def hybrid_script_convert_batch(texts: Iterable[str], from_script: str, to_script: str, backend: Union[str, Callable] = 'sangam', **kwargs) -> List[str]:
+    """Convert all the given `texts` between required scripts, by the rules for most of the words,
+    and by the given backend for the words where the rules had to guess.
+
+    Args:
+        texts (Iterable[str]): Texts to be converted
+        from_script (str): Source script
+        to_script (str): Target script
+        backend (str|Callable): `'sangam'`, `'ml'`, or a batch conversion function
+        kwargs: Options for `HybridTransliterator` (like `fallback_on_error`), or for the backend (like `cache`)
+
+    Returns:
+        List[str]: Converted texts
+
+    Raises:
+        ValueError: If `from_script` is not a Perso-Arabic script
+    """
+    return HybridTransliterator(from_script, to_script, backend, **kwargs).transliterate_batch(texts)
+
+def hybrid_script_convert(text: str, from_script: str, to_script: str, backend: Union[str, Callable] = 'sangam', **kwargs) -> str:
+    """Same as `hybrid_script_convert_batch()`, for a single text."""
+    return hybrid_script_convert_batch([text], from_script, to_script, backend, **kwargs)[0]
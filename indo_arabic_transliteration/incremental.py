@@ -0,0 +1,227 @@
+'''
+Incremental conversion of a text being edited (for eg., live typing in an input method, or a live preview).
+
+The text is kept split at the safe boundaries (`SAFE_SPLIT_REGEX`, the whitespace runs which no rule reads across,
+including the `match_initial_only`/`match_final_only` ones), so that each piece converts independently to the same result.
+On each edit, only the window of pieces around it is split again and converted, reusing the pieces left unchanged;
+the window reaches one unchanged word beyond each side, since an edit next to a whitespace run can change whether it is safe.
+The pieces are kept in blocks (with the lengths of each block), so that an edit takes time in the size of the edit
+and the number of blocks, rather than the length of the text; the whole text and output are joined only when read.
+The output is always identical to converting the whole text.
+
+Usage:
+    from indo_arabic_transliteration.incremental import IncrementalTransliterator
+    session = IncrementalTransliterator('ur-PK', 'hi-IN')
+    change = session.edit(offset, deleted, inserted) # Or session.update(whole_text)
+    session.output
+'''
+from bisect import bisect_right
+from itertools import accumulate
+from typing import List, NamedTuple, Union
+
+from .common import SAFE_SPLIT_REGEX
+from .mapper import DELEGATES
+
+# Maximum number of pieces in each block (the blocks rebuilt by the edits may be shorter)
+BLOCK_SIZE = 256
+
+class OutputChange(NamedTuple):
+    '''
+    Change of the output by an edit: `deleted` at `offset` replaced by `inserted`
+    '''
+    offset: int
+    deleted: str
+    inserted: str
+
+class PieceBlock(NamedTuple):
+    '''
+    Consecutive pieces of the text, their conversions, and the total lengths of both
+    '''
+    pieces: List[str]
+    converted_pieces: List[str]
+    length: int
+    output_length: int
+
+def make_blocks(pieces, converted_pieces):
+    '''
+    Returns the list of blocks of the given (non-empty list of) pieces
+    '''
+    blocks = []
+    for start in range(0, len(pieces), BLOCK_SIZE):
+        block_pieces = pieces[start:start+BLOCK_SIZE]
+        block_converted_pieces = converted_pieces[start:start+BLOCK_SIZE]
+        blocks.append(PieceBlock(block_pieces, block_converted_pieces, sum(map(len, block_pieces)), sum(map(len, block_converted_pieces))))
+    return blocks
+
+class IncrementalTransliterator:
+    '''
+    Conversion of a text between the given pair of scripts, kept up to date with the edits of the text.
+    Pieces (alternately words and whitespace runs) of the text and their conversions are kept in blocks.
+    '''
+    def __init__(self, from_script: str, to_script: str, text: str = ''):
+        self.delegate = DELEGATES[(from_script, to_script)]
+        self.set_text(text)
+
+    def set_text(self, text: str) -> str:
+        """Convert the given text from scratch, dropping the previous one.
+
+        Args:
+            text (str): Whole text
+
+        Returns:
+            str: Converted text
+        """
+        pieces = SAFE_SPLIT_REGEX.split(text)
+        converted_pieces = self.convert_pieces(pieces)
+        self.blocks = make_blocks(pieces, converted_pieces)
+        self.joined_text = text
+        self.joined_output = ''.join(converted_pieces)
+        return self.joined_output
+
+    @property
+    def text(self) -> str:
+        '''
+        Current text (joined from the pieces, when first read after an edit)
+        '''
+        if self.joined_text is None:
+            self.joined_text = ''.join(piece for block in self.blocks for piece in block.pieces)
+        return self.joined_text
+
+    @property
+    def output(self) -> str:
+        '''
+        Conversion of the current text (joined from the converted pieces, when first read after an edit)
+        '''
+        if self.joined_output is None:
+            self.joined_output = ''.join(piece for block in self.blocks for piece in block.converted_pieces)
+        return self.joined_output
+
+    def convert_pieces(self, pieces, reusable=None):
+        '''
+        Returns the conversions of the given pieces, converting only the unique pieces missing in `reusable`
+        '''
+        converted = dict(reusable or {})
+        missing_pieces = list(dict.fromkeys(piece for piece in pieces if piece not in converted))
+        if missing_pieces:
+            converted.update(zip(missing_pieces, self.delegate.batch(missing_pieces)))
+        return [converted[piece] for piece in pieces]
+
+    def get_piece_index(self, offset, block_starts, block_first_indices):
+        '''
+        Returns the index of the piece containing the character at the given offset (or the last piece, at the end)
+        '''
+        block_index = min(bisect_right(block_starts, offset) - 1, len(self.blocks) - 1)
+        block_start = block_starts[block_index]
+        piece_starts = [block_start] + [block_start + start for start in accumulate(map(len, self.blocks[block_index].pieces[:-1]))]
+        return block_first_indices[block_index] + bisect_right(piece_starts, offset) - 1
+
+    def edit(self, offset: int, deleted: Union[int, str], inserted: str = '') -> OutputChange:
+        """Apply an edit to the text, converting again only the words around it.
+        The converted text (same as the conversion of the whole edited text) is then in `output`.
+
+        Args:
+            offset (int): Position of the edit in the text
+            deleted (int|str): Number of characters deleted at `offset`, or the deleted text (to be checked)
+            inserted (str): Text inserted at `offset`
+
+        Returns:
+            OutputChange: Change of the converted text by this edit
+
+        Raises:
+            ValueError: If the edit does not fit the current text
+        """
+        deleted_text = deleted if isinstance(deleted, str) else None
+        if deleted_text is not None:
+            deleted = len(deleted_text)
+        # Start offsets of the blocks (in the text and the output) and the indices of their first pieces, then the totals
+        block_starts = [0] + list(accumulate(block.length for block in self.blocks))
+        block_output_starts = [0] + list(accumulate(block.output_length for block in self.blocks))
+        block_first_indices = [0] + list(accumulate(len(block.pieces) for block in self.blocks))
+        if offset < 0 or deleted < 0 or offset + deleted > block_starts[-1]:
+            raise ValueError('Edit (offset=%d, deleted=%d) is out of the text of length %d' % (offset, deleted, block_starts[-1]))
+
+        # Window of the pieces touching the edit (including the characters just before and after it),
+        # extended to one more word beyond, which is kept unchanged along with the whitespace run before/after it
+        first = self.get_piece_index(max(offset - 1, 0), block_starts, block_first_indices)
+        last = self.get_piece_index(offset + deleted, block_starts, block_first_indices)
+        first = max(first - first % 2 - 2, 0)
+        last = min(last + last % 2 + 2, block_first_indices[-1] - 1)
+
+        # Pieces of the blocks of the window, indexed from the first of these blocks
+        first_block = bisect_right(block_first_indices, first) - 1
+        last_block = bisect_right(block_first_indices, last) - 1
+        pieces = [piece for block in self.blocks[first_block:last_block+1] for piece in block.pieces]
+        converted_pieces = [piece for block in self.blocks[first_block:last_block+1] for piece in block.converted_pieces]
+        first -= block_first_indices[first_block]
+        last -= block_first_indices[first_block]
+
+        window_start = block_starts[first_block] + sum(map(len, pieces[:first]))
+        old_window_text = ''.join(pieces[first:last+1])
+        edit_start = offset - window_start
+        if deleted_text is not None and old_window_text[edit_start:edit_start+deleted] != deleted_text:
+            raise ValueError('Deleted text %r does not match the text at offset %d' % (deleted_text, offset))
+        window_text = old_window_text[:edit_start] + inserted + old_window_text[edit_start+deleted:]
+
+        old_converted_pieces = converted_pieces[first:last+1]
+        new_pieces = SAFE_SPLIT_REGEX.split(window_text)
+        new_converted_pieces = self.convert_pieces(new_pieces, reusable=zip(pieces[first:last+1], old_converted_pieces))
+
+        output_start = block_output_starts[first_block] + sum(map(len, converted_pieces[:first]))
+        old_output = ''.join(old_converted_pieces)
+        new_output = ''.join(new_converted_pieces)
+
+        pieces[first:last+1] = new_pieces
+        converted_pieces[first:last+1] = new_converted_pieces
+        end_block = last_block + 1
+        if len(pieces) < BLOCK_SIZE // 2 and end_block < len(self.blocks):
+            # Merged with the next block, so that the deletions do not leave many short blocks
+            pieces += self.blocks[end_block].pieces
+            converted_pieces += self.blocks[end_block].converted_pieces
+            end_block += 1
+        self.blocks[first_block:end_block] = make_blocks(pieces, converted_pieces)
+        self.joined_text = self.joined_output = None
+
+        return get_change(output_start, old_output, new_output)
+
+    def update(self, text: str) -> OutputChange:
+        """Same as `edit()`, for the whole new text (for eg., the current value of a text-box).
+        The edit is found as the part between the common prefix and suffix with the current text.
+
+        Args:
+            text (str): Whole edited text
+
+        Returns:
+            OutputChange: Change of the converted text
+        """
+        prefix_length = get_common_prefix_length(self.text, text)
+        suffix_length = get_common_suffix_length(self.text[prefix_length:], text[prefix_length:])
+        return self.edit(prefix_length, len(self.text) - prefix_length - suffix_length, text[prefix_length:len(text)-suffix_length])
+
+def get_common_prefix_length(a, b):
+    # Binary search over the slices, since comparing them is much faster than a loop over the characters
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+def get_common_suffix_length(a, b):
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a)-middle:] == b[len(b)-middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+def get_change(offset, old, new):
+    '''
+    Returns the minimal change from `old` to `new` (placed at `offset`), without their common prefix and suffix
+    '''
+    prefix_length = get_common_prefix_length(old, new)
+    suffix_length = get_common_suffix_length(old[prefix_length:], new[prefix_length:])
+    return OutputChange(offset + prefix_length, old[prefix_length:len(old)-suffix_length], new[prefix_length:len(new)-suffix_length])
@@ -0,0 +1,303 @@
+'''
+Opt-in instrumentation of the transliteration pipelines, to find out which stage takes the time or fires.
+
+Records:
+- Wall-time histogram of each stage (translator passes, normalization steps and the whole conversion)
+- Self time of each stage, i.e. excluding the time of the stages nested in it (to profile the passes)
+- Number of matches of each translator
+- Number of hits of each key of the translators (to find the unused entries in the mappings)
+
+Instrumented converters get wrappers on their stages as instance attributes, which are removed when disabled;
+hence the converters which are not instrumented have no overhead at all.
+
+Usage:
+    from indo_arabic_transliteration.instrumentation import enable_instrumentation, disable_instrumentation
+    instrumentation = enable_instrumentation() # For all the converters used by `mapper`
+    script_convert(text, 'ur-PK', 'hi-IN')
+    print(instrumentation.to_prometheus())
+    disable_instrumentation()
+'''
+import re
+import time
+import bisect
+import threading
+from collections import Counter, defaultdict
+
+from .str_mapper import StringTranslator, CompiledStringTranslator, InfixTranslator
+
+# Upper bounds (in seconds) of the histogram buckets
+DEFAULT_BUCKETS = (1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1, 0.5, 1.0, 5.0, float('inf'))
+
+# Methods of the transliterators (if present) timed as stages, in addition to their translators
+STAGE_METHODS = ['arabic_normalize', 'devanagari_normalize', 'devanagari_remove_short_vowels', 'devanagari_nativize', 'transliterate_lexicon_words', 'transliterate_ambiguous_urdu_words_to_hindi']
+METRIC_PREFIX = 'indo_arabic_transliteration'
+
+def get_translation_dicts(translator):
+    '''
+    Returns the (forward, reverse) translation dicts of the given translator, if known
+    '''
+    if isinstance(translator, InfixTranslator):
+        return translator.infix_dict, getattr(translator, 'reverse_infix_dict', None)
+    if isinstance(translator, StringTranslator):
+        return translator.translation_dict, getattr(translator, 'reverse_translation_dict', None)
+    return None, None
+
+def find_matched_keys(translator, text, reverse=False):
+    '''
+    Returns the list of keys of the translator that match in the given text (i.e. would be replaced)
+    '''
+    if isinstance(translator, (StringTranslator, InfixTranslator)):
+        translator.precompile(forward=not reverse, reverse=reverse)
+
+    if isinstance(translator, InfixTranslator):
+        regex = translator.reverse_regex if reverse else translator.regex
+        return regex.split(text)[2::4] # Infixes, see InfixTranslator.substitute()
+
+    if isinstance(translator, CompiledStringTranslator):
+        regex, char_table, split_on_regex = translator.reverse_matcher if reverse else translator.forward_matcher
+        if not split_on_regex:
+            return regex.findall(text)
+        parts = regex.split(text) if regex else [text]
+        keys = parts[1::2]
+        if char_table:
+            keys.extend(char for gap in parts[::2] for char in gap if ord(char) in char_table)
+        return keys
+
+    if isinstance(translator, StringTranslator):
+        return (translator.reverse_regex if reverse else translator.regex).findall(text)
+    return []
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': {str(bucket): count for bucket, count in zip(self.buckets, self.counts)},
+        }
+
+class Instrumentation:
+    '''
+    Collects the metrics of all the converters instrumented with it
+    '''
+    def __init__(self, count_keys=True, buckets=DEFAULT_BUCKETS, count_matches=True):
+        self.count_keys = count_keys
+        self.count_matches = count_matches # Finding the matches takes about as long as the translators, disable to only time
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.local = threading.local() # Stack of the times of the nested stages, in each thread
+        self.instrumented = {} # id(converter) -> (converter, [names of the wrapped attributes], {name: original attribute})
+        self.translators = {} # (converter class name, translator name) -> translator
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.stage_seconds = defaultdict(lambda: Histogram(self.buckets)) # (converter, stage) -> Histogram
+            self.stage_self_seconds = defaultdict(float) # (converter, stage) -> seconds, excluding the nested stages
+            self.match_counts = Counter() # (converter, translator, direction) -> number of matches
+            self.key_hits = defaultdict(Counter) # (converter, translator, direction) -> {key: number of hits}
+
+    def time_stage(self, labels, function, *args, **kwargs):
+        nested_seconds = self.local.__dict__.setdefault('nested_seconds', [])
+        nested_seconds.append(0.0)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            self_seconds = elapsed - nested_seconds.pop()
+            if nested_seconds:
+                nested_seconds[-1] += elapsed
+            with self.lock:
+                self.stage_seconds[labels].observe(elapsed)
+                self.stage_self_seconds[labels] += self_seconds
+
+    def record_matches(self, labels, translator, text, reverse):
+        keys = find_matched_keys(translator, text, reverse)
+        with self.lock:
+            self.match_counts[labels] += len(keys)
+            if self.count_keys:
+                self.key_hits[labels].update(keys)
+
+    def instrument(self, converter):
+        '''
+        Wraps the translators and stages of the given transliterator instance (of any class)
+        '''
+        with self.lock:
+            if id(converter) in self.instrumented:
+                return converter
+        converter_name = type(converter).__name__
+        originals = {}
+
+        for name, value in list(vars(converter).items()):
+            if hasattr(value, 'translate') and hasattr(value, 'reverse_translate'):
+                originals[name] = value
+                setattr(converter, name, InstrumentedTranslator(self, converter_name, name, value))
+                self.translators[(converter_name, name)] = value
+
+        normalizer = getattr(converter, 'devanagari_normalizer', None)
+        if normalizer is not None:
+            originals['devanagari_normalizer'] = normalizer
+            converter.devanagari_normalizer = InstrumentedNormalizer(self, converter_name, normalizer)
+
+        method_names = [name for name in dir(type(converter)) if re.fullmatch('transliterate_from_[a-z]+_to_[a-z]+', name)]
+        method_names += [name for name in STAGE_METHODS if hasattr(converter, name)]
+        for name in method_names:
+            setattr(converter, name, self.wrap_method((converter_name, name), getattr(converter, name)))
+
+        with self.lock:
+            self.instrumented[id(converter)] = (converter, method_names, originals)
+        return converter
+
+    def uninstrument(self, converter):
+        with self.lock:
+            converter, method_names, originals = self.instrumented.pop(id(converter), (converter, [], {}))
+        for name in method_names:
+            delattr(converter, name) # Falls back to the class's method
+        for name, value in originals.items():
+            setattr(converter, name, value)
+
+    def uninstrument_all(self):
+        for converter, _, _ in list(self.instrumented.values()):
+            self.uninstrument(converter)
+
+    def wrap_method(self, labels, method):
+        def instrumented_method(*args, **kwargs):
+            return self.time_stage(labels, method, *args, **kwargs)
+        return instrumented_method
+
+    def get_unused_keys(self):
+        '''
+        Returns the keys never matched, for each translator (and direction) which was used at least once
+        '''
+        unused_keys = {}
+        with self.lock:
+            used_directions = set(self.match_counts)
+        for (converter_name, translator_name), translator in self.translators.items():
+            for direction, translation_dict in zip(('forward', 'reverse'), get_translation_dicts(translator)):
+                labels = (converter_name, translator_name, direction)
+                if translation_dict is not None and labels in used_directions:
+                    hits = self.key_hits.get(labels, {})
+                    unused_keys[labels] = [key for key in translation_dict if key not in hits]
+        return unused_keys
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                'stages': {'/'.join(labels): dict(histogram.to_dict(), self_seconds=self.stage_self_seconds[labels]) for labels, histogram in self.stage_seconds.items()},
+                'matches': {'/'.join(labels): count for labels, count in self.match_counts.items()},
+                'key_hits': {'/'.join(labels): dict(hits.most_common()) for labels, hits in self.key_hits.items()},
+            }
+
+    def to_prometheus(self):
+        '''
+        Returns the metrics in the Prometheus text exposition format
+        '''
+        lines = []
+        with self.lock:
+            lines.append('# HELP %s_stage_seconds Wall time of each stage of the transliteration pipelines' % METRIC_PREFIX)
+            lines.append('# TYPE %s_stage_seconds histogram' % METRIC_PREFIX)
+            for (converter_name, *stage), histogram in sorted(self.stage_seconds.items()):
+                labels = format_labels(converter=converter_name, stage='.'.join(stage))
+                cumulative_count = 0
+                for bucket, count in zip(histogram.buckets, histogram.counts):
+                    cumulative_count += count
+                    bucket_labels = format_labels(converter=converter_name, stage='.'.join(stage), le='+Inf' if bucket == float('inf') else repr(bucket))
+                    lines.append('%s_stage_seconds_bucket%s %d' % (METRIC_PREFIX, bucket_labels, cumulative_count))
+                lines.append('%s_stage_seconds_sum%s %r' % (METRIC_PREFIX, labels, histogram.sum))
+                lines.append('%s_stage_seconds_count%s %d' % (METRIC_PREFIX, labels, histogram.count))
+
+            lines.append('# HELP %s_matches_total Number of matches of each translator' % METRIC_PREFIX)
+            lines.append('# TYPE %s_matches_total counter' % METRIC_PREFIX)
+            for (converter_name, translator_name, direction), count in sorted(self.match_counts.items()):
+                lines.append('%s_matches_total%s %d' % (METRIC_PREFIX, format_labels(converter=converter_name, translator=translator_name, direction=direction), count))
+
+            lines.append('# HELP %s_key_hits_total Number of matches of each key of the translators' % METRIC_PREFIX)
+            lines.append('# TYPE %s_key_hits_total counter' % METRIC_PREFIX)
+            for (converter_name, translator_name, direction), hits in sorted(self.key_hits.items()):
+                for key, count in sorted(hits.items()):
+                    lines.append('%s_key_hits_total%s %d' % (METRIC_PREFIX, format_labels(converter=converter_name, translator=translator_name, direction=direction, key=key), count))
+        return '\n'.join(lines) + '\n'
+
+def format_labels(**labels):
+    escape = lambda value: value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join('%s="%s"' % (name, escape(value)) for name, value in labels.items()) + '}'
+
+class InstrumentedTranslator:
+    '''
+    Proxy of a translator, timing its calls and counting its matches
+    '''
+    def __init__(self, instrumentation, converter_name, name, translator):
+        self.instrumentation = instrumentation
+        self.translator = translator
+        self.forward_labels = (converter_name, name, 'forward')
+        self.reverse_labels = (converter_name, name, 'reverse')
+
+    def __getattr__(self, name):
+        return getattr(self.translator, name)
+
+    def translate(self, text):
+        if self.instrumentation.count_matches:
+            self.instrumentation.record_matches(self.forward_labels, self.translator, text, reverse=False)
+        return self.instrumentation.time_stage(self.forward_labels, self.translator.translate, text)
+
+    def reverse_translate(self, text):
+        if self.instrumentation.count_matches:
+            self.instrumentation.record_matches(self.reverse_labels, self.translator, text, reverse=True)
+        return self.instrumentation.time_stage(self.reverse_labels, self.translator.reverse_translate, text)
+
+class InstrumentedNormalizer:
+    def __init__(self, instrumentation, converter_name, normalizer):
+        self.instrumentation = instrumentation
+        self.normalizer = normalizer
+        self.labels = (converter_name, 'devanagari_normalizer', 'normalize')
+
+    def __getattr__(self, name):
+        return getattr(self.normalizer, name)
+
+    def normalize(self, text):
+        return self.instrumentation.time_stage(self.labels, self.normalizer.normalize, text)
+
+# Instrumentation of the converters used by `mapper`
+INSTRUMENTATION = None
+
+def enable_instrumentation(count_keys=True, buckets=DEFAULT_BUCKETS, count_matches=True):
+    '''
+    Instruments all the converters of `mapper` (including the ones built later), and returns the Instrumentation
+    '''
+    global INSTRUMENTATION
+    from . import mapper
+
+    disable_instrumentation()
+    INSTRUMENTATION = Instrumentation(count_keys, buckets, count_matches)
+    with mapper.converters_lock:
+        mapper.INSTRUMENTATION = INSTRUMENTATION
+        for converter in mapper.CONVERTERS.values():
+            INSTRUMENTATION.instrument(converter)
+    return INSTRUMENTATION
+
+def disable_instrumentation():
+    '''
+    Removes all the wrappers added by `enable_instrumentation()`
+    '''
+    global INSTRUMENTATION
+    from . import mapper
+
+    with mapper.converters_lock:
+        mapper.INSTRUMENTATION = None
+        if INSTRUMENTATION is not None:
+            INSTRUMENTATION.uninstrument_all()
+    INSTRUMENTATION = None
+
+def get_instrumentation():
+    return INSTRUMENTATION
@@ -1,4 +1,72 @@
-from aksharamukha.transliterate import process as aksharamukhi_xlit
+'''
+Conversion from Indic scripts to PersoArabic, retaining the vowels as diacritics (by AksharaMukha).
+
+AksharaMukha has a large setup cost for each call, hence the texts are split into words,
+and the unique words are converted together (one per line) in a single call.
+Whitespace is kept as in the input.
+'''
+import re
+from typing import Iterable, List, Optional
+
+from .word_cache import LRUCache, WordCachedTransliterator, DEFAULT_WORD_CACHE_SIZE
+
+# (source script, target script, pre-options) of AksharaMukha for each supported pair
+AKSHARAMUKHA_ARGS = {
+    ('hi-IN', 'ur-PK'): ('Devanagari', 'Shahmukhi', ['RemoveSchwaHindi', 'AnuChandraEqDeva']),
+    ('pa-IN', 'pa-PK'): ('Gurmukhi', 'Shahmukhi', ['SchwaFinalGurmukhi']),
+}
+
+# AksharaMukha converts each word independently, hence the texts can be split at whitespace
+WORD_SPLIT_REGEX = re.compile(r'(\s+)')
+WORD_SEPARATOR = '\n'
+MAX_WORDS_PER_CALL = 1000
+
+class LosslessDelegate:
+    '''
+    Converts the texts of a pair of scripts by AksharaMukha, with the same interface as `mapper.LazyDelegate`
+    '''
+    def __init__(self, from_script, to_script):
+        self.from_script = from_script
+        self.to_script = to_script
+        self.word_cache = None # LRUCache, if enabled by `enable_word_cache()`
+
+    def convert_words(self, words):
+        '''
+        Returns the conversions of the given words (without whitespace), running many words per call
+        '''
+        from aksharamukha.transliterate import process
+        source, target, pre_options = AKSHARAMUKHA_ARGS[(self.from_script, self.to_script)]
+        results = []
+        for start in range(0, len(words), MAX_WORDS_PER_CALL):
+            chunk = words[start:start+MAX_WORDS_PER_CALL]
+            chunk_results = process(source, target, WORD_SEPARATOR.join(chunk), pre_options=pre_options).split(WORD_SEPARATOR)
+            if len(chunk_results) != len(chunk):
+                # Separators were not preserved, convert each word separately
+                chunk_results = [process(source, target, word, pre_options=pre_options) for word in chunk]
+            results.extend(chunk_results)
+        return results
+
+    def convert_pieces(self, pieces):
+        words = [piece for piece in pieces if piece and not piece.isspace()]
+        converted = dict(zip(words, self.convert_words(words)))
+        return [converted.get(piece, piece) for piece in pieces]
+
+    def __call__(self, text):
+        return self.batch([text])[0]
+
+    def batch(self, texts):
+        word_cache = self.word_cache
+        if word_cache is None:
+            # Still converts each unique word only once, through a cache of this call alone
+            word_cache = LRUCache(maxsize=None)
+        return WordCachedTransliterator(self.convert_pieces, word_cache, split_regex=WORD_SPLIT_REGEX).transliterate_batch(list(texts))
+
+DELEGATES = {pair: LosslessDelegate(*pair) for pair in AKSHARAMUKHA_ARGS}
+
+def get_delegate(from_script: str, to_script: str) -> LosslessDelegate:
+    if (from_script, to_script) not in DELEGATES:
+        raise ValueError('Conversion with diacritics from %s to %s is not supported' % (from_script, to_script))
+    return DELEGATES[(from_script, to_script)]
 
 def convert_with_diacritics(text: str, from_script: str, to_script: str) -> str:
     """Transliterate with diacritics for the given `text` from Indic script to PersoArabic.
@@ -10,8 +78,44 @@ def convert_with_diacritics(text: str, from_script: str, to_script: str) -> str:
 
     Returns:
         str: Transliterated text in impure-abjad
+
+    Raises:
+        ValueError: If the pair of scripts is not supported
     """
-    if from_script == 'hi-IN' and to_script == 'ur-PK':
-        return aksharamukhi_xlit("Devanagari", "Shahmukhi", text, pre_options=["RemoveSchwaHindi", "AnuChandraEqDeva"]) #, nativize=False)
-    if from_script == 'pa-IN' and to_script == 'pa-PK':
-        return aksharamukhi_xlit("Gurmukhi", "Shahmukhi", text, pre_options=["SchwaFinalGurmukhi"]) #, nativize=False)
+    return get_delegate(from_script, to_script)(text)
+
+def convert_with_diacritics_batch(texts: Iterable[str], from_script: str, to_script: str) -> List[str]:
+    """Transliterate with diacritics all the given `texts` from Indic script to PersoArabic.
+    Each unique word is converted only once, in a few calls to AksharaMukha for all the texts.
+
+    Args:
+        texts (Iterable[str]): Texts to be converted
+        from_script (str): Source Indic script
+        to_script (str): Target PersoArabic script
+
+    Returns:
+        List[str]: Transliterated texts in impure-abjad
+
+    Raises:
+        ValueError: If the pair of scripts is not supported
+    """
+    return get_delegate(from_script, to_script).batch(texts)
+
+def enable_word_cache(maxsize: int = DEFAULT_WORD_CACHE_SIZE) -> None:
+    """Memoise the conversion of each word across the calls, through a bounded LRU cache for each pair of scripts.
+
+    Args:
+        maxsize (int): Maximum number of words in the cache of each pair
+    """
+    for delegate in DELEGATES.values():
+        delegate.word_cache = LRUCache(maxsize)
+
+def disable_word_cache() -> None:
+    """Stop memoising the conversions, and drop the cached words."""
+    for delegate in DELEGATES.values():
+        delegate.word_cache = None
+
+def get_word_cache_stats() -> Optional[dict]:
+    """Get the hits, misses, evictions and size of the word cache of each pair, or None if not enabled."""
+    stats = {pair: delegate.word_cache.stats() for pair, delegate in DELEGATES.items() if delegate.word_cache is not None}
+    return stats or None
@@ -1,35 +1,184 @@
-from .hindustani import HindustaniTransliterator
-hindi_urdu_converter = HindustaniTransliterator()
+import threading
+from importlib import import_module
+from typing import Iterable, List, Optional, Union
 
-from .punjabi import PunjabiTransliterator
-panjabi_converter = PunjabiTransliterator()
+from .word_cache import LRUCache, WordCachedTransliterator, DEFAULT_WORD_CACHE_SIZE
+from .persistent_cache import PersistentCache, get_persistent_cache, get_namespace
 
-from .sindhi import SindhiTransliterator
-sindhi_converter = SindhiTransliterator()
+# Converters are built on first use, since each of them loads its own tables and dependencies
+CONVERTER_CLASSES = {
+    'hindustani': ('.hindustani', 'HindustaniTransliterator'),
+    'punjabi': ('.punjabi', 'PunjabiTransliterator'),
+    'sindhi': ('.sindhi', 'SindhiTransliterator'),
+}
+CONVERTERS = {}
+converters_lock = threading.Lock()
+# Set by `instrumentation.enable_instrumentation()`, to instrument the converters when built
+INSTRUMENTATION = None
+
+def get_converter(language: str):
+    """Get the (shared) converter for the given language, building it if not yet done.
+
+    Args:
+        language (str): One of the keys in `CONVERTER_CLASSES`
+
+    Returns:
+        BaseIndoArabicTransliterator: Converter instance
+    """
+    converter = CONVERTERS.get(language)
+    if converter is None:
+        with converters_lock:
+            converter = CONVERTERS.get(language)
+            if converter is None:
+                module_name, class_name = CONVERTER_CLASSES[language]
+                converter_class = getattr(import_module(module_name, __package__), class_name)
+                converter = converter_class()
+                if INSTRUMENTATION is not None:
+                    INSTRUMENTATION.instrument(converter)
+                CONVERTERS[language] = converter
+    return converter
+
+class LazyDelegate:
+    '''
+    Calls the given method of a language's converter, building the converter only on the first call
+    '''
+    def __init__(self, language, method_name):
+        self.language = language
+        self.method_name = method_name
+        self.word_cache = None # WordCachedTransliterator, if enabled by `enable_word_cache()`
+
+    def __call__(self, text, *args, **kwargs):
+        word_cache = self.word_cache
+        if word_cache is not None and not args and not kwargs:
+            return word_cache.transliterate(text)
+        # Through the batch method, which passes through the runs not in the source script
+        return self.uncached_batch([text], *args, **kwargs)[0]
+
+    def batch(self, texts, *args, **kwargs):
+        word_cache = self.word_cache
+        if word_cache is not None and not args and not kwargs:
+            return word_cache.transliterate_batch(texts)
+        return self.uncached_batch(texts, *args, **kwargs)
+
+    def uncached_batch(self, texts, *args, **kwargs):
+        return getattr(get_converter(self.language), self.method_name + '_batch')(texts, *args, **kwargs)
 
 DELEGATES = {
     # Hindustani languages
-    ('hi-IN', 'ur-PK'): hindi_urdu_converter.transliterate_from_hindi_to_urdu,
-    ('ur-PK', 'hi-IN'): hindi_urdu_converter.transliterate_from_urdu_to_hindi,
-    
+    ('hi-IN', 'ur-PK'): LazyDelegate('hindustani', 'transliterate_from_hindi_to_urdu'),
+    ('ur-PK', 'hi-IN'): LazyDelegate('hindustani', 'transliterate_from_urdu_to_hindi'),
+
     # Punjabi scripts
-    ('pa-IN', 'pa-PK'): panjabi_converter.transliterate_from_gurmukhi_to_shahmukhi,
-    ('pa-PK', 'pa-IN'): panjabi_converter.transliterate_from_shahmukhi_to_gurmukhi,
-    
+    ('pa-IN', 'pa-PK'): LazyDelegate('punjabi', 'transliterate_from_gurmukhi_to_shahmukhi'),
+    ('pa-PK', 'pa-IN'): LazyDelegate('punjabi', 'transliterate_from_shahmukhi_to_gurmukhi'),
+
     # Sindhi scripts
-    ('sd-IN', 'sd-PK'): sindhi_converter.transliterate_from_devanagari_to_sindhi,
-    ('sd-PK', 'sd-IN'): sindhi_converter.transliterate_from_sindhi_to_devanagari,
+    ('sd-IN', 'sd-PK'): LazyDelegate('sindhi', 'transliterate_from_devanagari_to_sindhi'),
+    ('sd-PK', 'sd-IN'): LazyDelegate('sindhi', 'transliterate_from_sindhi_to_devanagari'),
 }
 
-def script_convert(text: str, from_script: str, to_script: str) -> str:
+# Module attributes for the converters, kept for backward-compatibility
+CONVERTER_ATTRIBUTES = {
+    'hindi_urdu_converter': 'hindustani',
+    'panjabi_converter': 'punjabi',
+    'sindhi_converter': 'sindhi',
+}
+
+def __getattr__(name):
+    if name in CONVERTER_ATTRIBUTES:
+        return get_converter(CONVERTER_ATTRIBUTES[name])
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+def get_delegate(from_script: str, to_script: str, with_diacritics: bool = False):
+    """Get the conversion function (with a `batch()` method) for the given pair of scripts.
+
+    Args:
+        from_script (str): Source script
+        to_script (str): Target script
+        with_diacritics (bool): Retain the vowels as diacritics in PersoArabic (see `lossless_converter`)
+
+    Returns:
+        LazyDelegate|LosslessDelegate: Delegate of the pair
+    """
+    if with_diacritics:
+        from .lossless_converter import get_delegate as get_lossless_delegate
+        return get_lossless_delegate(from_script, to_script)
+    return DELEGATES[(from_script, to_script)]
+
+def get_convert_kwargs(with_diacritics, convert_common_chars):
+    '''
+    Returns the options for the delegate, empty by default (so that the word cache is used)
+    '''
+    if convert_common_chars:
+        return {}
+    if with_diacritics:
+        raise ValueError('convert_common_chars=False is not supported with diacritics')
+    return {'convert_common_chars': False}
+
+def script_convert(text: str, from_script: str, to_script: str, with_diacritics: bool = False, convert_common_chars: bool = True) -> str:
     """Raw convert the given `text` between required scripts.
+    Only the words having characters of the source script are passed through the rules, the rest (like Latin, emoji) are kept as is.
 
     Args:
         text (str): Text to be converted
         from_script (str): Source script
         to_script (str): Target script
+        with_diacritics (bool): Retain the vowels as diacritics (only from Indic scripts to PersoArabic)
+        convert_common_chars (bool): Also convert the punctuations and numerals in the words without letters of the source script.
+            If False, they are converted only at the edges of (or within) the words of the source script.
 
     Returns:
         str: Converted text
     """
-    return DELEGATES[(from_script, to_script)](text)
+    return get_delegate(from_script, to_script, with_diacritics)(text, **get_convert_kwargs(with_diacritics, convert_common_chars))
+
+def script_convert_batch(texts: Iterable[str], from_script: str, to_script: str, with_diacritics: bool = False, convert_common_chars: bool = True) -> List[str]:
+    """Raw convert all the given `texts` between required scripts.
+    Same results as calling `script_convert()` on each text, but much faster for many short texts.
+
+    Args:
+        texts (Iterable[str]): Texts to be converted
+        from_script (str): Source script
+        to_script (str): Target script
+        with_diacritics (bool): Retain the vowels as diacritics (only from Indic scripts to PersoArabic)
+        convert_common_chars (bool): Also convert the punctuations and numerals in the words without letters of the source script
+
+    Returns:
+        List[str]: Converted texts
+    """
+    return get_delegate(from_script, to_script, with_diacritics).batch(texts, **get_convert_kwargs(with_diacritics, convert_common_chars))
+
+def enable_word_cache(maxsize: int = DEFAULT_WORD_CACHE_SIZE, per_pair: bool = False, persistent_cache: Union[None, bool, str, PersistentCache] = None) -> None:
+    """Memoise the conversion of each word in `script_convert()` and `script_convert_batch()`,
+    through a bounded LRU cache. The output stays identical.
+
+    Args:
+        maxsize (int): Maximum number of words in the cache (in each cache, if `per_pair`)
+        per_pair (bool): Use a separate cache for each pair of scripts, instead of one shared by all of them
+        persistent_cache (str|bool|PersistentCache): On-disk cache (path, or True for the default one)
+            to look up the words missing in the LRU cache, shared across processes and runs
+    """
+    persistent_cache = get_persistent_cache(persistent_cache)
+    shared_cache = None if per_pair else LRUCache(maxsize)
+    for pair, delegate in DELEGATES.items():
+        convert_batch = delegate.uncached_batch
+        if persistent_cache is not None:
+            convert_batch = persistent_cache.cached(convert_batch, get_namespace('rule', *pair))
+        if per_pair:
+            delegate.word_cache = WordCachedTransliterator(convert_batch, LRUCache(maxsize))
+        else:
+            delegate.word_cache = WordCachedTransliterator(convert_batch, shared_cache, namespace=pair)
+
+def disable_word_cache() -> None:
+    """Stop memoising the conversions, and drop the cached words."""
+    for delegate in DELEGATES.values():
+        delegate.word_cache = None
+
+def get_word_cache_stats() -> Optional[dict]:
+    """Get the hits, misses, evictions and size of the word caches.
+
+    Returns:
+        dict: Stats of each pair of scripts (all the same, if the cache is shared), or None if not enabled
+    """
+    stats = {pair: delegate.word_cache.cache.stats() for pair, delegate in DELEGATES.items() if delegate.word_cache is not None}
+    return stats or None
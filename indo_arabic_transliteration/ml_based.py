@@ -1,18 +1,128 @@
-from indictrans import Transliterator
-MODELS = {
-    ('hi-IN', 'ur-PK'): Transliterator(source='hin', target='urd', build_lookup=True, rb=False),
-    ('ur-PK', 'hi-IN'): Transliterator(source='urd', target='hin', build_lookup=True, rb=False)
+import re
+import threading
+from typing import Iterable, List, Optional
+
+from .persistent_cache import get_persistent_cache, get_namespace
+from .word_cache import LRUCache, WordCachedTransliterator, DEFAULT_WORD_CACHE_SIZE
+
+# Models are loaded on first use of each pair, since each of them takes a while to load
+MODEL_ARGS = {
+    ('hi-IN', 'ur-PK'): dict(source='hin', target='urd', build_lookup=True, rb=False),
+    ('ur-PK', 'hi-IN'): dict(source='urd', target='hin', build_lookup=True, rb=False),
 }
+MODELS = {}
+models_lock = threading.Lock()
+
+# The models transliterate each word independently, hence the texts can be split at whitespace
+WORD_SPLIT_REGEX = re.compile(r'(\s+)')
+# Unique words are sent to the model together, one per line
+WORD_SEPARATOR = '\n'
+MAX_WORDS_PER_CALL = 1000
+
+# Set by `enable_word_cache()`, for each pair
+WORD_CACHES = {}
+
+def get_model(from_script: str, to_script: str):
+    """Get the (shared) model for the given pair of scripts, loading it if not yet done."""
+    model = MODELS.get((from_script, to_script))
+    if model is None:
+        with models_lock:
+            model = MODELS.get((from_script, to_script))
+            if model is None:
+                from indictrans import Transliterator
+                model = Transliterator(**MODEL_ARGS[(from_script, to_script)])
+                MODELS[(from_script, to_script)] = model
+    return model
+
+def transform_words(model, words):
+    '''
+    Returns the model's conversions of the given words (without whitespace), running many words per call
+    '''
+    results = []
+    for start in range(0, len(words), MAX_WORDS_PER_CALL):
+        chunk = words[start:start+MAX_WORDS_PER_CALL]
+        chunk_results = model.transform(WORD_SEPARATOR.join(chunk)).split(WORD_SEPARATOR)
+        if len(chunk_results) != len(chunk):
+            # Model did not preserve the separators, convert each word separately
+            chunk_results = [model.transform(word) for word in chunk]
+        results.extend(chunk_results)
+    return results
 
-def ml_transliterate(text: str, from_script: str, to_script: str) -> str:
+def get_pieces_converter(from_script, to_script):
+    '''
+    Returns the batch conversion function of the pieces (words and whitespace runs) of the texts
+    '''
+    model = get_model(from_script, to_script)
+    def convert_pieces(pieces):
+        words = [piece for piece in pieces if piece and not piece.isspace()]
+        converted = dict(zip(words, transform_words(model, words)))
+        return [converted.get(piece, piece) for piece in pieces]
+    return convert_pieces
+
+def ml_transliterate(text: str, from_script: str, to_script: str, cache=None) -> str:
     """Machine-Learning-based Transliteration for the given `text` between required scripts.
 
     Args:
         text (str): Text to be converted
         from_script (str): Source script
         to_script (str): Target script
+        cache (str|bool|PersistentCache): On-disk cache (path, or True for the default one) of the models' outputs
 
     Returns:
         str: Transliterated text by models
     """
-    return MODELS[(from_script, to_script)].transform(text)
+    model = get_model(from_script, to_script)
+    cache = get_persistent_cache(cache)
+    if cache is None:
+        return model.transform(text)
+
+    namespace = get_namespace('ml', from_script, to_script)
+    cached_results = cache.get_many(namespace, [text])
+    if text in cached_results:
+        return cached_results[text]
+    result = model.transform(text)
+    cache.put_many(namespace, [(text, result)])
+    return result
+
+def ml_transliterate_batch(texts: Iterable[str], from_script: str, to_script: str, cache=None) -> List[str]:
+    """Machine-Learning-based Transliteration for all the given `texts` between required scripts.
+    The texts are split into words, and each unique word is run through the model only once, together with the others.
+    Whitespace is kept as in the input.
+
+    Args:
+        texts (Iterable[str]): Texts to be converted
+        from_script (str): Source script
+        to_script (str): Target script
+        cache (str|bool|PersistentCache): On-disk cache (path, or True for the default one) of the models' outputs
+
+    Returns:
+        List[str]: Transliterated texts by models
+    """
+    convert_pieces = get_pieces_converter(from_script, to_script)
+    cache = get_persistent_cache(cache)
+    if cache is not None:
+        convert_pieces = cache.cached(convert_pieces, get_namespace('ml', from_script, to_script))
+
+    word_cache = WORD_CACHES.get((from_script, to_script))
+    if word_cache is None:
+        # Still converts each unique word only once, through a cache of this call alone
+        word_cache = LRUCache(maxsize=None)
+    return WordCachedTransliterator(convert_pieces, word_cache, split_regex=WORD_SPLIT_REGEX).transliterate_batch(list(texts))
+
+def enable_word_cache(maxsize: int = DEFAULT_WORD_CACHE_SIZE) -> None:
+    """Memoise the models' conversion of each word, through a bounded LRU cache for each pair of scripts.
+    Applies to `ml_transliterate_batch()` only: `ml_transliterate()` always runs the model on the whole text.
+
+    Args:
+        maxsize (int): Maximum number of words in the cache of each pair
+    """
+    for pair in MODEL_ARGS:
+        WORD_CACHES[pair] = LRUCache(maxsize)
+
+def disable_word_cache() -> None:
+    """Stop memoising the conversions, and drop the cached words."""
+    WORD_CACHES.clear()
+
+def get_word_cache_stats() -> Optional[dict]:
+    """Get the hits, misses, evictions and size of the word cache of each pair, or None if not enabled."""
+    return {pair: cache.stats() for pair, cache in WORD_CACHES.items()} or None
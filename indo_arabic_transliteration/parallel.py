@@ -0,0 +1,101 @@
+import os
+from collections import deque
+from functools import partial
+from itertools import islice, chain
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, as_completed, FIRST_COMPLETED
+from typing import Iterable, Iterator, Optional
+
+from .mapper import DELEGATES, get_converter, get_delegate, script_convert_batch
+
+# (from_script, to_script, with_diacritics) of the current worker process, set by its initializer
+worker_scripts = None
+
+def init_worker(from_script, to_script, with_diacritics=False):
+    global worker_scripts
+    worker_scripts = (from_script, to_script, with_diacritics)
+    if not with_diacritics:
+        # Build the converter once per worker, instead of pickling it for every chunk
+        get_converter(DELEGATES[(from_script, to_script)].language)
+
+def convert_chunk(texts):
+    return script_convert_batch(texts, *worker_scripts)
+
+def iter_chunks(iterable, chunksize):
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, chunksize))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, chunksize))
+
+def map_chunks(executor, function, chunks, max_pending, ordered=True):
+    '''
+    Yields `function(chunk)` for each chunk, computed by the given executor.
+    At most `max_pending` chunks are in flight, so that memory stays bounded for any input size.
+    '''
+    if ordered:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(function, chunk))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    else:
+        pending = set()
+        for chunk in chunks:
+            pending.add(executor.submit(function, chunk))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in as_completed(pending):
+            yield future.result()
+
+def parallel_script_convert(texts: Iterable[str], from_script: str, to_script: str, workers: Optional[int] = None, chunksize: int = 1000, ordered: bool = True, with_diacritics: bool = False) -> Iterator[str]:
+    """Raw convert the given `texts` between required scripts, using a pool of processes.
+
+    Args:
+        texts (Iterable[str]): Texts to be converted, consumed lazily
+        from_script (str): Source script
+        to_script (str): Target script
+        workers (int): Number of worker processes (default: number of CPUs)
+        chunksize (int): Number of texts sent to a worker at once
+        ordered (bool): If False, yields the results as soon as each chunk is done (not in input order)
+        with_diacritics (bool): Retain the vowels as diacritics (see `lossless_converter`)
+
+    Returns:
+        Iterator[str]: Converted texts
+    """
+    get_delegate(from_script, to_script, with_diacritics) # Fail early for unsupported scripts
+    return iter_parallel_results(texts, from_script, to_script, workers or os.cpu_count() or 1, chunksize, ordered, with_diacritics)
+
+def iter_parallel_results(texts, from_script, to_script, workers, chunksize, ordered, with_diacritics=False):
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(from_script, to_script, with_diacritics)) as executor:
+        results = map_chunks(executor, convert_chunk, iter_chunks(texts, chunksize), max_pending=2*workers, ordered=ordered)
+        yield from chain.from_iterable(results)
+
+def threaded_script_convert(texts: Iterable[str], from_script: str, to_script: str, workers: Optional[int] = None, chunksize: int = 1000, ordered: bool = True, with_diacritics: bool = False) -> Iterator[str]:
+    """Raw convert the given `texts` between required scripts, using a pool of threads.
+    The threads share the converters of `mapper` (which are safe for concurrent use), hence no start-up or pickling cost.
+    Runs on all the CPU cores only on the free-threaded builds of CPython (3.13t+), else the threads take turns.
+
+    Args:
+        texts (Iterable[str]): Texts to be converted, consumed lazily
+        from_script (str): Source script
+        to_script (str): Target script
+        workers (int): Number of threads (default: number of CPUs)
+        chunksize (int): Number of texts converted by a thread at once
+        ordered (bool): If False, yields the results as soon as each chunk is done (not in input order)
+        with_diacritics (bool): Retain the vowels as diacritics (see `lossless_converter`)
+
+    Returns:
+        Iterator[str]: Converted texts
+    """
+    get_delegate(from_script, to_script, with_diacritics) # Fail early for unsupported scripts
+    return iter_threaded_results(texts, from_script, to_script, workers or os.cpu_count() or 1, chunksize, ordered, with_diacritics)
+
+def iter_threaded_results(texts, from_script, to_script, workers, chunksize, ordered, with_diacritics=False):
+    convert = partial(script_convert_batch, from_script=from_script, to_script=to_script, with_diacritics=with_diacritics)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = map_chunks(executor, convert, iter_chunks(texts, chunksize), max_pending=2*workers, ordered=ordered)
+        yield from chain.from_iterable(results)
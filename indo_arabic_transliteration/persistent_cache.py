@@ -0,0 +1,126 @@
+'''
+Persistent (on-disk) cache of conversions, shared across processes and runs.
+
+Backed by SQLite in WAL mode, so that many worker processes can read and write it concurrently.
+Entries are grouped by a namespace, which identifies the conversion (backend, pair of scripts, options)
+and for the rule-based conversion, also the hash of the mapping tables;
+hence any change in `data/*.csv` (or the code) automatically stops using the stale entries.
+'''
+import os
+import sqlite3
+import threading
+
+from .table_cache import get_cache_dir, get_tables_hash
+
+DEFAULT_CACHE_FILE_NAME = 'conversions.sqlite3'
+BUSY_TIMEOUT_SECONDS = 30
+
+class PersistentCache:
+    '''
+    Key-value store of (namespace, source text) -> converted text
+    '''
+    def __init__(self, path=None):
+        if path is None:
+            cache_dir = get_cache_dir()
+            if not cache_dir:
+                raise ValueError('User cache is disabled, pass an explicit path for the persistent cache')
+            path = os.path.join(cache_dir, DEFAULT_CACHE_FILE_NAME)
+        self.path = path
+        self.local = threading.local()
+        self.hits = self.misses = 0
+
+        with self.get_connection() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS conversions (namespace TEXT, source TEXT, target TEXT, PRIMARY KEY (namespace, source)) WITHOUT ROWID')
+
+    def get_connection(self):
+        '''
+        Returns the SQLite connection of the current thread (and process, since connections cannot be shared after fork)
+        '''
+        connection = getattr(self.local, 'connection', None)
+        if connection is None or self.local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_SECONDS)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self.local.connection = connection
+            self.local.pid = os.getpid()
+        return connection
+
+    def get_many(self, namespace, keys):
+        '''
+        Returns the dict of cached values for the given keys
+        '''
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        connection = self.get_connection()
+        # Stay within SQLite's default limit on the number of query parameters
+        for start in range(0, len(keys), 900):
+            batch = keys[start:start+900]
+            query = 'SELECT source, target FROM conversions WHERE namespace = ? AND source IN (%s)' % ','.join('?' * len(batch))
+            found.update(connection.execute(query, [namespace] + batch))
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, namespace, items):
+        connection = self.get_connection()
+        try:
+            with connection:
+                connection.executemany('INSERT OR REPLACE INTO conversions VALUES (?, ?, ?)', ((namespace, key, value) for key, value in items))
+        except sqlite3.OperationalError:
+            pass # Locked for too long or read-only, not fatal for a cache
+
+    def clear(self, namespace=None):
+        with self.get_connection() as connection:
+            if namespace is None:
+                connection.execute('DELETE FROM conversions')
+            else:
+                connection.execute('DELETE FROM conversions WHERE namespace = ?', (namespace,))
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'path': self.path}
+
+    def cached(self, convert_batch, namespace):
+        '''
+        Wraps the given batch conversion function, to look up each text in this cache first
+        '''
+        def cached_convert_batch(texts):
+            texts = list(texts)
+            found = self.get_many(namespace, texts)
+            missing = [text for text in dict.fromkeys(texts) if text not in found]
+            if missing:
+                new_items = list(zip(missing, convert_batch(missing)))
+                self.put_many(namespace, new_items)
+                found.update(new_items)
+            return [found[text] for text in texts]
+        return cached_convert_batch
+
+def get_namespace(backend, from_script, to_script, nativize=False, tables_hash=None):
+    '''
+    Namespace of the conversions of the given backend (`rule`, `sangam`, `ml`, ...).
+    Rule-based conversions also depend on the mapping tables, hence their hash by default.
+    '''
+    if tables_hash is None and backend == 'rule':
+        tables_hash = get_tables_hash()
+    return '%s:%s>%s:nativize=%d:%s' % (backend, from_script, to_script, nativize, tables_hash or '')
+
+# Opened caches per path, shared by all the callers
+PERSISTENT_CACHES = {}
+persistent_caches_lock = threading.Lock()
+
+def get_persistent_cache(cache):
+    '''
+    Returns the PersistentCache for the given path (`True` for the default path), or the given instance itself.
+    Returns None if `cache` is None or False.
+    '''
+    if cache is None or cache is False:
+        return None
+    if isinstance(cache, PersistentCache):
+        return cache
+    path = None if cache is True else cache
+    with persistent_caches_lock:
+        if path not in PERSISTENT_CACHES:
+            PERSISTENT_CACHES[path] = PersistentCache(path)
+        return PERSISTENT_CACHES[path]
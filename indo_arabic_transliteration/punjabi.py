@@ -1,23 +1,217 @@
+import unicodedata
+from .base import read_mapping_file
+from .common import ARABIC_SCRIPT_RANGES, DEVANAGARI_SCRIPT_RANGES, GURMUKHI_SCRIPT_RANGES, INDIC_COMMON_CHARS, INDIC_NORMALIZE_MAP, IndicNormalizer, ScriptRunSegmenter
 from .hindustani import HindustaniTransliterator
 
+GURMUKHI_MAP_FILES = ['gurmukhi.csv']
+
+# AksharaMukha (which was used before these tables) marks the vowels not in Gurmukhi by this, to convert them back.
+# Also, the nasalization after the marked vowels stays a bindi. Removed at the end.
+VOWEL_MARKER = 'ʼ'
+
+# Extra rules for each direction, over the letters in GURMUKHI_MAP_FILES.
+# Quirks are kept same as the output of AksharaMukha, for the same results.
+DEVANAGARI_TO_GURMUKHI_MAP = {
+    'ँ': 'ਂ',
+    '\u095d': 'ੜ੍ਹ', # Precomposed ढ़
+    'ऽ': '(ਅ)',
+    'ऽऽ': '(ਆ)',
+    '।।': '॥',
+    '॔': '',
+    '‌': '',
+    '‍': '',
+    'ॽ': 'ʔ',
+
+    # Vowels not in Gurmukhi
+    'ऍ': 'ਏ', 'ऎ': 'ਏ', 'ॲ': 'ਏ',
+    'ऑ': 'ਆ', 'ॳ': 'ਆ', 'ॴ': 'ਆ',
+    'ऒ': 'ਓ',
+    'ऺ': 'ਾ', 'ऻ': 'ਾ', 'ॉ': 'ਾ',
+    'ॅ': 'ੇ', 'ॆ': 'ੇ', 'ॎ': 'ੇ', 'ॕ': 'ੇ',
+    'ॊ': 'ੋ',
+    'ॎे': 'ੈ', 'ॎो': 'ੌ', 'ॎा': 'ੋ',
+    'ॶ': 'ਉ'+VOWEL_MARKER, 'ॷ': 'ਊ',
+    'ॖ': 'ੁ'+VOWEL_MARKER, 'ॗ': 'ੂ'+VOWEL_MARKER,
+    'ऋ': 'ਰੁ'+VOWEL_MARKER, 'ॠ': 'ਰੂ'+VOWEL_MARKER,
+    'ऌ': 'ਲੁ'+VOWEL_MARKER, 'ॡ': 'ਲੂ'+VOWEL_MARKER,
+    'ृ': '੍ਰੁ'+VOWEL_MARKER, 'ॄ': '੍ਰੂ'+VOWEL_MARKER,
+    'ॢ': '੍ਲੁ'+VOWEL_MARKER, 'ॣ': '੍ਲੂ'+VOWEL_MARKER,
+
+    # Sindhi implosives
+    'ॻ': 'ˍਗ', 'ॼ': 'ˍਜ', 'ॾ': 'ˍਡ', 'ॿ': 'ˍਬ',
+}
+for i in range(10):
+    DEVANAGARI_TO_GURMUKHI_MAP[chr(ord('०')+i)] = str(i)
+
+GURMUKHI_TO_DEVANAGARI_MAP = {
+    'ਁ': 'ँ',
+    'ੰ': 'ं',
+    'ੰਨ': 'न्न',
+    'ੰਮ': 'म्म',
+    'ੵ': '्य',
+    'ੵ਼': '्य़',
+    'ੵ'+VOWEL_MARKER: '्यऺ',
+    'ੵ਼'+VOWEL_MARKER: '्य़ऺ',
+    '।।': '॥',
+
+    # Vowels not in Gurmukhi, marked by VOWEL_MARKER
+    VOWEL_MARKER: '',
+    'ਆ'+VOWEL_MARKER: 'ऑ', 'ਾ'+VOWEL_MARKER: 'ॉ',
+    'ਏ'+VOWEL_MARKER: 'ऍ', 'ੇ'+VOWEL_MARKER: 'ॅ',
+    'ਊ'+VOWEL_MARKER: 'ॷ',
+
+    # Eyebrow-shaped ra (ऱ्) before consonants
+    'ਰ਼੍': 'ऱ्‌',
+    'ਰ਼੍ਯ': 'ऱ्य',
+    'ਰ਼਼੍': 'ऱ्‌़',
+}
+for i in range(10):
+    GURMUKHI_TO_DEVANAGARI_MAP[chr(ord('੦')+i)] = chr(ord('०')+i)
+    GURMUKHI_TO_DEVANAGARI_MAP[str(i)] = chr(ord('०')+i)
+    GURMUKHI_TO_DEVANAGARI_MAP['h'+str(i)] = 'h'+str(i) # Not in `h1`, `h2`.. (heading tags)
+GURMUKHI_TO_DEVANAGARI_MAP.update({gurmukhi: devanagari for devanagari, gurmukhi in DEVANAGARI_TO_GURMUKHI_MAP.items() if gurmukhi.endswith(VOWEL_MARKER)})
+
+GURMUKHI_CONSONANTS = {chr(c) for c in range(ord('ਕ'), ord('\u0a5e')+1) if unicodedata.category(chr(c)) == 'Lo'}
+
+# Consonants which are doubled by adhak (ੱ). The aspirated ones are doubled with their unaspirated forms.
+GURMUKHI_GEMINABLE_CONSONANTS = ['ਕ', 'ਗ', 'ਚ', 'ਜ', 'ਟ', 'ਡ', 'ਤ', 'ਦ', 'ਪ', 'ਬ', 'ਙ', 'ਞ', 'ਣ', 'ਨ', 'ਮ', 'ਯ', 'ਰ', 'ਲ', 'ਵ', '\u0a36', '\u0a36਼', 'ਸ', 'ਹ',
+                                 '\u0a33', '\u0a33਼', 'ਰ਼', 'ਨ਼', 'ਕ਼', '\u0a59', '\u0a5a', '\u0a5b', 'ੜ', 'ੜ੍ਹ', '\u0a5e', 'ਯ਼']
+GURMUKHI_ASPIRATED_CONSONANTS = {
+    'ਖ': 'ਕ', 'ਘ': 'ਗ', 'ਛ': 'ਚ', 'ਝ': 'ਜ', 'ਠ': 'ਟ', 'ਢ': 'ਡ', 'ਥ': 'ਤ', 'ਧ': 'ਦ', 'ਫ': 'ਪ', 'ਭ': 'ਬ',
+}
+# Same as above, in the normalized (decomposed) form of the input
+GURMUKHI_NORMALIZED_GEMINABLE_CONSONANTS = ['ਕ', 'ਗ', 'ਚ', 'ਜ', 'ਟ', 'ਡ', 'ਤ', 'ਦ', 'ਪ', 'ਬ', 'ਙ', 'ਞ', 'ਣ', 'ਨ', 'ਮ', 'ਯ', 'ਰ', 'ਲ', 'ਵ', 'ਸ', 'ਹ',
+                                            'ਸ਼', 'ਲ਼', 'ਖ਼', 'ਗ਼', 'ਜ਼', 'ਫ਼', 'ੜ', 'ਸ਼਼']
+
+# Expand adhak, before converting to Devanagari
+GURMUKHI_GEMINATION_EXPAND_MAP = {'ੱ'+consonant: consonant+'੍'+consonant for consonant in GURMUKHI_NORMALIZED_GEMINABLE_CONSONANTS}
+GURMUKHI_GEMINATION_EXPAND_MAP.update({'ੱ'+aspirated: unaspirated+'੍'+aspirated for aspirated, unaspirated in GURMUKHI_ASPIRATED_CONSONANTS.items()})
+
+# Contract the doubled consonants to adhak, after converting from Devanagari
+GURMUKHI_GEMINATION_MAP = {consonant+'੍'+consonant: 'ੱ'+consonant for consonant in GURMUKHI_GEMINABLE_CONSONANTS}
+GURMUKHI_GEMINATION_POSTPROCESS_MAP = {unaspirated+'੍'+aspirated: 'ੱ'+aspirated for aspirated, unaspirated in GURMUKHI_ASPIRATED_CONSONANTS.items()}
+GURMUKHI_GEMINATION_POSTPROCESS_MAP.update({
+    # Tippi for doubled nasals
+    'ੱਮ': 'ੰਮ',
+    'ੱਨ': 'ੰਨ',
+    'ਁ': 'ਂ',
+})
+
+# Bindi (ਂ) is written as tippi (ੰ) after these
+GURMUKHI_TIPPI_CONTEXTS = sorted(GURMUKHI_CONSONANTS) + ['\u0a36਼', 'ਤ਼', '\u0a33਼', 'ਰ਼', 'ਨ਼', 'ਕ਼', 'ਯ਼', 'ਅ', 'ਇ', 'ਉ', 'ਿ', 'ੁ', 'ੂ']
+GURMUKHI_TIPPI_MAP = {letter+'ਂ': letter+'ੰ' for letter in GURMUKHI_TIPPI_CONTEXTS}
+
+# Same as indicnlp's GurmukhiNormalizer (with its default options)
+GURMUKHI_VOWELS_NORMALIZE_MAP = {
+    # Vowels written with the bases (Table 12-16 of the Unicode standard)
+    '\u0a05\u0a3e': '\u0a06',
+    '\u0a72\u0a3f': '\u0a07',
+    '\u0a72\u0a40': '\u0a08',
+    '\u0a73\u0a41': '\u0a09',
+    '\u0a73\u0a42': '\u0a0a',
+    '\u0a72\u0a47': '\u0a0f',
+    '\u0a05\u0a48': '\u0a10',
+    '\u0a73\u0a4b': '\u0a13',
+    '\u0a05\u0a4c': '\u0a14',
+}
+GURMUKHI_NORMALIZE_MAP = {
+    **INDIC_NORMALIZE_MAP,
+    # Generic dandas
+    '\u0a64': '\u0964',
+    '\u0a65': '\u0965',
+
+    # Decompose the nukta letters
+    '\u0a33': '\u0a32\u0a3c',
+    '\u0a36': '\u0a38\u0a3c',
+    '\u0a59': '\u0a16\u0a3c',
+    '\u0a5a': '\u0a17\u0a3c',
+    '\u0a5b': '\u0a1c\u0a3c',
+    '\u0a5e': '\u0a2b\u0a3c',
+}
+gurmukhi_normalizer = IndicNormalizer(GURMUKHI_NORMALIZE_MAP, '\u0a00-\u0a7f', '\u0a03', GURMUKHI_VOWELS_NORMALIZE_MAP)
+
+# Devanagari is also converted (the scripts are converted through it), and the vowel marker and joiners are dropped
+shahmukhi_segmenter = ScriptRunSegmenter(ARABIC_SCRIPT_RANGES + DEVANAGARI_SCRIPT_RANGES, VOWEL_MARKER + '\u200c\u200d')
+gurmukhi_segmenter = ScriptRunSegmenter(GURMUKHI_SCRIPT_RANGES + DEVANAGARI_SCRIPT_RANGES, INDIC_COMMON_CHARS + VOWEL_MARKER + '0123456789')
+
 class PunjabiTransliterator(HindustaniTransliterator):
-    def __init__(self):
-        super().__init__()
+    '''
+    Converts between Gurmukhi and Shahmukhi, through Devanagari (by the Hindustani transliterator).
+    Gurmukhi and Devanagari are converted by the tables in GURMUKHI_MAP_FILES.
+    '''
+    def __init__(self, compiled=False):
+        super().__init__(compiled=compiled)
+        self.gurmukhi_normalizer = gurmukhi_normalizer
 
-        from indicnlp.normalize.indic_normalize import GurmukhiNormalizer
-        self.gurmukhi_normalizer = GurmukhiNormalizer()
+    def get_table_layers(self):
+        # The Hindustani tables are shared as they are, only the Gurmukhi ones are added over them
+        gurmukhi_tables_key = (type(self).build_gurmukhi_tables.__qualname__, tuple(GURMUKHI_MAP_FILES), self.compiled)
+        return super().get_table_layers() + [(gurmukhi_tables_key, self.build_gurmukhi_tables)]
 
-        from aksharamukha.transliterate import process
-        self.aksharamukha_xlit = process
-    
-    def transliterate_from_gurmukhi_to_shahmukhi(self, text):
+    def build_gurmukhi_tables(self):
+        maps = self.load_gurmukhi_maps()
+        return {**maps, **self.compile_gurmukhi_maps(maps)}
+
+    def load_gurmukhi_maps(self):
+        maps = {
+            'gurmukhi_to_devanagari_map': {},
+            'devanagari_to_gurmukhi_map': {},
+        }
+
+        for map_file in GURMUKHI_MAP_FILES:
+            for gurmukhi_letter, roman_letter, devanagari_letter in read_mapping_file(self.data_dir+map_file):
+                # Also the decomposed forms of the nukta letters, since the input is normalized
+                for letter in {gurmukhi_letter, unicodedata.normalize('NFD', gurmukhi_letter)}:
+                    maps['gurmukhi_to_devanagari_map'][letter] = devanagari_letter
+                    if letter[0] in GURMUKHI_CONSONANTS:
+                        maps['gurmukhi_to_devanagari_map'][letter+VOWEL_MARKER] = devanagari_letter+'ऺ'
+                for letter in {devanagari_letter, unicodedata.normalize('NFD', devanagari_letter)}:
+                    maps['devanagari_to_gurmukhi_map'][letter] = gurmukhi_letter
+                if unicodedata.normalize('NFD', gurmukhi_letter) != gurmukhi_letter:
+                    # Decomposed Gurmukhi letters (left as they are by the Hindustani rules) are composed too
+                    maps['devanagari_to_gurmukhi_map'][unicodedata.normalize('NFD', gurmukhi_letter)] = gurmukhi_letter
+
+        maps['gurmukhi_to_devanagari_map'].update(GURMUKHI_TO_DEVANAGARI_MAP)
+        for devanagari_letter, gurmukhi_letter in DEVANAGARI_TO_GURMUKHI_MAP.items():
+            for letter in {devanagari_letter, unicodedata.normalize('NFD', devanagari_letter)}:
+                maps['devanagari_to_gurmukhi_map'][letter] = gurmukhi_letter
+        return maps
+
+    def compile_gurmukhi_maps(self, maps):
+        translators = {}
+        translators['gurmukhi_gemination_expander'] = self.translator_class(GURMUKHI_GEMINATION_EXPAND_MAP, support_back_translation=False)
+        translators['gurmukhi_to_devanagari_converter'] = self.translator_class(maps['gurmukhi_to_devanagari_map'], support_back_translation=False)
+        translators['devanagari_to_gurmukhi_converter'] = self.translator_class(maps['devanagari_to_gurmukhi_map'], support_back_translation=False)
+        translators['gurmukhi_gemination_contractor'] = self.translator_class(GURMUKHI_GEMINATION_MAP, support_back_translation=False)
+        translators['gurmukhi_gemination_postprocessor'] = self.translator_class(GURMUKHI_GEMINATION_POSTPROCESS_MAP, support_back_translation=False)
+        translators['gurmukhi_tippi_converter'] = self.translator_class(GURMUKHI_TIPPI_MAP, support_back_translation=False)
+        return translators
+
+    def transliterate_from_gurmukhi_to_devanagari(self, text):
         text = self.gurmukhi_normalizer.normalize(text)
-        text = self.aksharamukha_xlit("Gurmukhi", "Devanagari", text)
+        text = self.gurmukhi_gemination_expander.translate(text)
+        return self.gurmukhi_to_devanagari_converter.translate(text)
+
+    def transliterate_from_devanagari_to_gurmukhi(self, text):
+        text = self.devanagari_to_gurmukhi_converter.translate(text)
+        text = self.gurmukhi_gemination_contractor.translate(text)
+        text = self.gurmukhi_gemination_postprocessor.translate(text)
+        text = self.gurmukhi_tippi_converter.translate(text)
+        return text.replace(VOWEL_MARKER, '')
+
+    def transliterate_from_gurmukhi_to_shahmukhi(self, text):
+        text = self.transliterate_from_gurmukhi_to_devanagari(text)
         return self.transliterate_from_hindi_to_urdu(text)
 
     def transliterate_from_shahmukhi_to_gurmukhi(self, text):
         text = self.transliterate_from_urdu_to_hindi(text)
-        return self.aksharamukha_xlit("Devanagari", "Gurmukhi", text)
+        return self.transliterate_from_devanagari_to_gurmukhi(text)
+
+    def transliterate_from_gurmukhi_to_shahmukhi_batch(self, texts, convert_common_chars=True):
+        return self.transliterate_batch(self.transliterate_from_gurmukhi_to_shahmukhi, texts, segmenter=gurmukhi_segmenter, convert_common_chars=convert_common_chars)
+
+    def transliterate_from_shahmukhi_to_gurmukhi_batch(self, texts, convert_common_chars=True):
+        return self.transliterate_batch(self.transliterate_from_shahmukhi_to_gurmukhi, texts, segmenter=shahmukhi_segmenter, convert_common_chars=convert_common_chars)
 
     def __call__(self, text, src_lang, dest_lang, nativize=False):
         if src_lang == 'pa' and dest_lang == 'pnb':
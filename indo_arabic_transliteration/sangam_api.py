@@ -1,44 +1,257 @@
+import time
+import atexit
+import random
+import asyncio
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List
+
 import requests
+from requests.adapters import HTTPAdapter
+from .persistent_cache import get_persistent_cache, get_namespace
 
 BASE_URL = "http://sangam.learnpunjabi.org/SindhiTransliteration.asmx/"
 
-ENDPOINTS = {
+ENDPOINT_NAMES = {
     # Hindustani languages
-    ('hi-IN', 'ur-PK'): BASE_URL+'Hindi2Urdu',
-    ('ur-PK', 'hi-IN'): BASE_URL+'Urdu2Hindi',
-    
+    ('hi-IN', 'ur-PK'): 'Hindi2Urdu',
+    ('ur-PK', 'hi-IN'): 'Urdu2Hindi',
+
     # Punjabi scripts
-    ('pa-IN', 'pa-PK'): BASE_URL+'Gurmukhi2Shahmukhi',
-    ('pa-PK', 'pa-IN'): BASE_URL+'Shahmukhi2Gurmukhi',
-    
+    ('pa-IN', 'pa-PK'): 'Gurmukhi2Shahmukhi',
+    ('pa-PK', 'pa-IN'): 'Shahmukhi2Gurmukhi',
+
     # Sindhi scripts
-    ('sd-IN', 'sd-PK'): BASE_URL+'SindhiDEV2SindhiUR',
-    ('sd-PK', 'sd-IN'): BASE_URL+'SindhiUR2SindhiDEV',
+    ('sd-IN', 'sd-PK'): 'SindhiDEV2SindhiUR',
+    ('sd-PK', 'sd-IN'): 'SindhiUR2SindhiDEV',
 }
+ENDPOINTS = {pair: BASE_URL+endpoint_name for pair, endpoint_name in ENDPOINT_NAMES.items()}
+
+# Segments are packed into a single request, one per line
+SEGMENT_SEPARATOR = '\n'
+DEFAULT_TIMEOUT = 5
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_REQUEST_CHARS = 4000
+
+# Server-side errors worth retrying, other HTTP errors are raised right away
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class SangamClient:
+    '''
+    Client for the Sangam server, reusing its connections across requests.
+    The async API runs at most `max_concurrency` requests at once, and packs many short texts into one request.
+    Failed requests are retried with exponential backoff (with full jitter).
+    Pass `base_url` to use a different (for eg., local) server.
+    '''
+    def __init__(self, base_url=BASE_URL, max_concurrency=DEFAULT_MAX_CONCURRENCY, max_request_chars=DEFAULT_MAX_REQUEST_CHARS,
+                 timeout=DEFAULT_TIMEOUT, retry_attempts=5, backoff_base=0.5, backoff_max=10, cache=None):
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.max_request_chars = max_request_chars
+        self.timeout = timeout
+        self.retry_attempts = retry_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cache = get_persistent_cache(cache)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='sangam')
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def get_api_url(self, from_script, to_script):
+        return self.base_url + ENDPOINT_NAMES[(from_script, to_script)]
+
+    def get_backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def post_once(self, api_url, text):
+        response = self.session.post(api_url, json={'input': text}, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()['d']
+
+    @staticmethod
+    def is_retriable(error):
+        if isinstance(error, requests.exceptions.HTTPError):
+            return error.response is not None and error.response.status_code in RETRY_STATUS_CODES
+        return isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError))
+
+    def post(self, api_url, text):
+        '''
+        Returns the server's conversion of the given text, retrying on timeouts, connection and server errors
+        '''
+        for attempt in range(self.retry_attempts):
+            try:
+                return self.post_once(api_url, text)
+            except requests.exceptions.RequestException as error:
+                if attempt == self.retry_attempts - 1 or not self.is_retriable(error):
+                    raise
+            time.sleep(self.get_backoff(attempt))
+
+    async def apost(self, api_url, text, semaphore):
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retry_attempts):
+            try:
+                async with semaphore:
+                    return await loop.run_in_executor(self.executor, self.post_once, api_url, text)
+            except requests.exceptions.RequestException as error:
+                if attempt == self.retry_attempts - 1 or not self.is_retriable(error):
+                    raise
+            await asyncio.sleep(self.get_backoff(attempt))
+
+    def pack_segments(self, texts):
+        '''
+        Groups the given texts into requests of at most `max_request_chars` (unless a single text is longer).
+        Texts containing the separator are always sent alone.
+        '''
+        packs = []
+        pack = []
+        pack_size = 0
+        for text in texts:
+            if SEGMENT_SEPARATOR in text:
+                packs.append([text])
+                continue
+            if pack and pack_size + len(SEGMENT_SEPARATOR) + len(text) > self.max_request_chars:
+                packs.append(pack)
+                pack, pack_size = [], 0
+            pack_size += len(text) + (len(SEGMENT_SEPARATOR) if pack else 0)
+            pack.append(text)
+        if pack:
+            packs.append(pack)
+        return packs
+
+    async def convert_pack(self, api_url, pack, semaphore):
+        result = await self.apost(api_url, SEGMENT_SEPARATOR.join(pack), semaphore)
+        results = result.split(SEGMENT_SEPARATOR) if len(pack) > 1 else [result]
+        if len(results) != len(pack):
+            # Server did not preserve the separators, convert each text separately
+            results = await asyncio.gather(*[self.apost(api_url, text, semaphore) for text in pack])
+        return results
 
-def online_transliterate(text: str, from_script: str, to_script: str, retry_attempts=5) -> str:
+    async def transliterate_batch(self, texts: Iterable[str], from_script: str, to_script: str) -> List[str]:
+        """Transliterate all the given `texts` between required scripts, concurrently.
+
+        Args:
+            texts (Iterable[str]): Texts to be converted
+            from_script (str): Source script
+            to_script (str): Target script
+
+        Returns:
+            List[str]: Transliterated texts from SANGAM server
+        """
+        api_url = self.get_api_url(from_script, to_script)
+        texts = list(texts)
+        unique_texts = [text for text in dict.fromkeys(texts) if text.strip()]
+
+        converted = {text: text for text in texts if not text.strip()}
+        if self.cache is not None:
+            namespace = get_namespace('sangam', from_script, to_script)
+            converted.update(self.cache.get_many(namespace, unique_texts))
+            unique_texts = [text for text in unique_texts if text not in converted]
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        packs = self.pack_segments(unique_texts)
+        results = await asyncio.gather(*[self.convert_pack(api_url, pack, semaphore) for pack in packs])
+        new_items = [item for pack, pack_results in zip(packs, results) for item in zip(pack, pack_results)]
+        if self.cache is not None:
+            self.cache.put_many(namespace, new_items)
+        converted.update(new_items)
+        return [converted[text] for text in texts]
+
+    async def transliterate(self, text: str, from_script: str, to_script: str) -> str:
+        return (await self.transliterate_batch([text], from_script, to_script))[0]
+
+# Shared by the calls of `online_transliterate()` and `online_transliterate_batch()` with the same options, for connection reuse
+CLIENTS = {}
+clients_lock = threading.Lock()
+
+def get_client(**client_kwargs) -> SangamClient:
+    '''
+    Returns the shared client with the given options (see `SangamClient`), building it if not yet done
+    '''
+    arguments = inspect.signature(SangamClient).bind(**client_kwargs)
+    arguments.apply_defaults()
+    key = tuple(arguments.arguments.items())
+    with clients_lock:
+        if key not in CLIENTS:
+            CLIENTS[key] = SangamClient(**client_kwargs)
+        return CLIENTS[key]
+
+def close_clients():
+    '''
+    Closes the connections and the threads of all the shared clients (also done at exit)
+    '''
+    with clients_lock:
+        clients = list(CLIENTS.values())
+        CLIENTS.clear()
+    for client in clients:
+        client.close()
+
+atexit.register(close_clients)
+
+def online_transliterate(text: str, from_script: str, to_script: str, retry_attempts=5, cache=None, client: SangamClient = None) -> str:
     """Transliterate the given `text` between required scripts.
 
     Args:
         text (str): Text to be converted
         from_script (str): Source script
         to_script (str): Target script
+        cache (str|bool|PersistentCache): On-disk cache (path, or True for the default one) of the server's responses
+        client (SangamClient): Client to send the request by (not closed), instead of the shared one for `retry_attempts`
 
     Returns:
         str: Transliterated text from SANGAM server
     """
-    api_url = ENDPOINTS[(from_script, to_script)]
-    for i in range(retry_attempts):
-        try:
-            response = requests.post(api_url, json={'input': text}, timeout=5)
-            return response.json()['d']
-        except requests.exceptions.Timeout:
-            pass
-    
-    raise requests.exceptions.Timeout
+    cache = get_persistent_cache(cache)
+    if cache is not None:
+        namespace = get_namespace('sangam', from_script, to_script)
+        cached_results = cache.get_many(namespace, [text])
+        if text in cached_results:
+            return cached_results[text]
+        result = online_transliterate(text, from_script, to_script, retry_attempts, client=client)
+        cache.put_many(namespace, [(text, result)])
+        return result
+
+    client = client or get_client(retry_attempts=retry_attempts)
+    return client.post(client.get_api_url(from_script, to_script), text)
+
+def online_transliterate_batch(texts: Iterable[str], from_script: str, to_script: str, client: SangamClient = None, **client_kwargs) -> List[str]:
+    """Transliterate all the given `texts` between required scripts, with concurrent and packed requests.
+    Blocking wrapper of `SangamClient.transliterate_batch()`, not to be called from a running event loop.
+
+    Args:
+        texts (Iterable[str]): Texts to be converted
+        from_script (str): Source script
+        to_script (str): Target script
+        client (SangamClient): Client to send the requests by (not closed), instead of the shared one for `client_kwargs`
+        client_kwargs: Options for `SangamClient` (like `max_concurrency`, `cache`, `base_url`)
+
+    Returns:
+        List[str]: Transliterated texts from SANGAM server
+    """
+    client = client or get_client(**client_kwargs)
+    return asyncio.run(client.transliterate_batch(texts, from_script, to_script))
 
 if __name__ == '__main__':
     # Test
-    print(convert(convert('हिन्दुस्तानी', 'hi-IN', 'ur-PK'), 'ur-PK', 'hi-IN'))
-    print(convert(convert('ਪੰਜਾਬੀ', 'pa-IN', 'pa-PK'), 'pa-PK', 'pa-IN'))
-    print(convert(convert('सिन्धी', 'sd-IN', 'sd-PK'), 'sd-PK', 'sd-IN'))
+    print(online_transliterate(online_transliterate('हिन्दुस्तानी', 'hi-IN', 'ur-PK'), 'ur-PK', 'hi-IN'))
+    print(online_transliterate(online_transliterate('ਪੰਜਾਬੀ', 'pa-IN', 'pa-PK'), 'pa-PK', 'pa-IN'))
+    print(online_transliterate(online_transliterate('सिन्धी', 'sd-IN', 'sd-PK'), 'sd-PK', 'sd-IN'))
@@ -0,0 +1,414 @@
+'''
+Local HTTP service for the conversions, keeping the converters warm in a single process.
+
+Concurrent requests for the same pair of scripts (and backend) are coalesced into micro-batches:
+a batch is converted by a single `batch()` call (in a thread) as soon as it has `max_batch_texts` texts,
+or `batch_window` seconds after its first request. Requests which would take the texts waiting to be converted
+beyond `max_pending_texts` are rejected with 503, so that the latency stays bounded under overload.
+Runs only on the standard library (asyncio), with no network access other than the (optional) Sangam backend.
+
+Endpoints:
+    POST /transliterate  {"from": "ur-PK", "to": "hi-IN", "texts": [...]} (or "text": "..."), optionally "backend"
+    GET /pairs           Supported pairs of scripts, and the enabled backends
+    GET /metrics         Throughput, batch sizes and latency percentiles, in the Prometheus text format
+    GET /health
+
+Usage:
+    python -m indo_arabic_transliteration.server --port 8080 --batch-window 0.002 --backend ml
+'''
+import os
+import json
+import time
+import asyncio
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from .mapper import DELEGATES, get_converter, enable_word_cache
+from .instrumentation import METRIC_PREFIX, format_labels
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+DEFAULT_BATCH_WINDOW = 0.002 # seconds
+DEFAULT_MAX_BATCH_TEXTS = 1000
+DEFAULT_MAX_PENDING_TEXTS = 100000
+DEFAULT_MAX_REQUEST_BYTES = 8 << 20
+
+RULES_BACKEND = 'rules'
+# Optional backends, converting by the batch functions of `hybrid.get_backend()`
+EXTRA_BACKENDS = ['sangam', 'ml']
+
+# Number of latest requests whose latencies make the percentiles
+LATENCY_WINDOW = 10000
+LATENCY_QUANTILES = (0.5, 0.9, 0.99)
+
+MAX_HEADER_LINES = 100
+
+class HTTPError(Exception):
+    def __init__(self, status, message=None, headers=None):
+        super().__init__(message or status.phrase)
+        self.status = status
+        self.headers = headers or {}
+
+class MicroBatcher:
+    '''
+    Collects the texts of concurrent requests, and converts them together by `convert_batch(texts) -> List[str]`
+    '''
+    def __init__(self, convert_batch, executor, metrics, labels, batch_window=DEFAULT_BATCH_WINDOW, max_batch_texts=DEFAULT_MAX_BATCH_TEXTS):
+        self.convert_batch = convert_batch
+        self.executor = executor
+        self.metrics = metrics
+        self.labels = labels
+        self.batch_window = batch_window
+        self.max_batch_texts = max_batch_texts
+        self.pending = [] # (texts, future) of each request
+        self.num_pending_texts = 0
+        self.flush_handle = None
+        self.tasks = set() # Running batches, referenced until done (the event loop keeps only weak references)
+
+    async def submit(self, texts):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((texts, future))
+        self.num_pending_texts += len(texts)
+        if self.num_pending_texts >= self.max_batch_texts:
+            self.flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.batch_window, self.flush)
+        return await future
+
+    def flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.pending, self.num_pending_texts = self.pending, [], 0
+        if batch:
+            task = asyncio.ensure_future(self.run(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def run(self, batch):
+        texts = [text for request_texts, future in batch for text in request_texts]
+        self.metrics.record_batch(self.labels, len(texts))
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(self.executor, self.convert_batch, texts)
+        except Exception as error:
+            for request_texts, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        start = 0
+        for request_texts, future in batch:
+            end = start + len(request_texts)
+            if not future.done(): # Cancelled, if the client went away
+                future.set_result(results[start:end])
+            start = end
+
+class Metrics:
+    '''
+    Counters of the requests, texts and batches, and the latencies of the latest requests
+    '''
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.start_time = time.monotonic()
+        self.requests = {} # (pair, backend, status) -> count
+        self.texts = {} # (pair, backend) -> (texts, chars)
+        self.batches = {} # (pair, backend) -> (batches, texts)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.latency_sum = 0.0
+        self.latency_count = 0
+        self.pending_texts = 0
+
+    def record_request(self, labels, status, texts, seconds):
+        with self.lock:
+            key = labels + (int(status),)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if status == HTTPStatus.OK:
+                num_texts, num_chars = self.texts.get(labels, (0, 0))
+                self.texts[labels] = (num_texts + len(texts), num_chars + sum(map(len, texts)))
+            self.latencies.append(seconds)
+            self.latency_sum += seconds
+            self.latency_count += 1
+
+    def record_batch(self, labels, size):
+        with self.lock:
+            num_batches, num_texts = self.batches.get(labels, (0, 0))
+            self.batches[labels] = (num_batches + 1, num_texts + size)
+
+    def get_latency_quantiles(self):
+        latencies = sorted(self.latencies)
+        if not latencies:
+            return {}
+        return {quantile: latencies[min(int(quantile * len(latencies)), len(latencies) - 1)] for quantile in LATENCY_QUANTILES}
+
+    def to_prometheus(self):
+        '''
+        Returns the metrics in the Prometheus text exposition format
+        '''
+        pair_labels = lambda pair, backend: dict(pair=pair, backend=backend)
+        lines = []
+        with self.lock:
+            lines.append('# HELP %s_server_requests_total Number of requests, by status' % METRIC_PREFIX)
+            lines.append('# TYPE %s_server_requests_total counter' % METRIC_PREFIX)
+            for (pair, backend, status), count in sorted(self.requests.items()):
+                lines.append('%s_server_requests_total%s %d' % (METRIC_PREFIX, format_labels(**pair_labels(pair, backend), status=str(status)), count))
+
+            lines.append('# HELP %s_server_texts_total Number of converted texts' % METRIC_PREFIX)
+            lines.append('# TYPE %s_server_texts_total counter' % METRIC_PREFIX)
+            for labels, (num_texts, num_chars) in sorted(self.texts.items()):
+                lines.append('%s_server_texts_total%s %d' % (METRIC_PREFIX, format_labels(**pair_labels(*labels)), num_texts))
+            lines.append('# HELP %s_server_chars_total Number of characters of the converted texts' % METRIC_PREFIX)
+            lines.append('# TYPE %s_server_chars_total counter' % METRIC_PREFIX)
+            for labels, (num_texts, num_chars) in sorted(self.texts.items()):
+                lines.append('%s_server_chars_total%s %d' % (METRIC_PREFIX, format_labels(**pair_labels(*labels)), num_chars))
+
+            lines.append('# HELP %s_server_batch_texts Number of texts of each micro-batch' % METRIC_PREFIX)
+            lines.append('# TYPE %s_server_batch_texts summary' % METRIC_PREFIX)
+            for labels, (num_batches, num_texts) in sorted(self.batches.items()):
+                lines.append('%s_server_batch_texts_sum%s %d' % (METRIC_PREFIX, format_labels(**pair_labels(*labels)), num_texts))
+                lines.append('%s_server_batch_texts_count%s %d' % (METRIC_PREFIX, format_labels(**pair_labels(*labels)), num_batches))
+
+            lines.append('# HELP %s_server_latency_seconds Latency of the requests (quantiles of the latest %d)' % (METRIC_PREFIX, LATENCY_WINDOW))
+            lines.append('# TYPE %s_server_latency_seconds summary' % METRIC_PREFIX)
+            for quantile, seconds in self.get_latency_quantiles().items():
+                lines.append('%s_server_latency_seconds%s %r' % (METRIC_PREFIX, format_labels(quantile=repr(quantile)), seconds))
+            lines.append('%s_server_latency_seconds_sum %r' % (METRIC_PREFIX, self.latency_sum))
+            lines.append('%s_server_latency_seconds_count %d' % (METRIC_PREFIX, self.latency_count))
+
+            lines.append('# HELP %s_server_pending_texts Number of texts accepted and not yet converted' % METRIC_PREFIX)
+            lines.append('# TYPE %s_server_pending_texts gauge' % METRIC_PREFIX)
+            lines.append('%s_server_pending_texts %d' % (METRIC_PREFIX, self.pending_texts))
+            lines.append('# HELP %s_server_uptime_seconds Time since the server started' % METRIC_PREFIX)
+            lines.append('# TYPE %s_server_uptime_seconds gauge' % METRIC_PREFIX)
+            lines.append('%s_server_uptime_seconds %r' % (METRIC_PREFIX, time.monotonic() - self.start_time))
+        return '\n'.join(lines) + '\n'
+
+class TransliterationServer:
+    '''
+    HTTP/1.1 server (with keep-alive) for the conversions of `DELEGATES`, by the rules and the given extra `backends`
+    '''
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, backends=(), workers=None, batch_window=DEFAULT_BATCH_WINDOW,
+                 max_batch_texts=DEFAULT_MAX_BATCH_TEXTS, max_pending_texts=DEFAULT_MAX_PENDING_TEXTS, max_request_bytes=DEFAULT_MAX_REQUEST_BYTES):
+        unknown_backends = set(backends) - set(EXTRA_BACKENDS)
+        if unknown_backends:
+            raise ValueError('Unknown backends: %s' % ', '.join(sorted(unknown_backends)))
+        self.host = host
+        self.port = port
+        self.backends = [RULES_BACKEND] + list(backends)
+        self.batch_window = batch_window
+        self.max_batch_texts = max_batch_texts
+        self.max_pending_texts = max_pending_texts
+        self.max_request_bytes = max_request_bytes
+        # The converters are safe for concurrent use, see `parallel.threaded_script_convert()`
+        self.executor = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1, thread_name_prefix='transliterate')
+        self.metrics = Metrics()
+        self.batchers = {}
+        self.server = None
+
+    def warm_up(self):
+        '''
+        Builds the converters of all the pairs, and compiles the matchers of their directions
+        '''
+        for delegate in DELEGATES.values():
+            get_converter(delegate.language)
+            delegate.batch([''])
+
+    def get_batcher(self, from_script, to_script, backend):
+        key = (from_script, to_script, backend)
+        if key not in self.batchers:
+            if backend == RULES_BACKEND:
+                convert_batch = DELEGATES[(from_script, to_script)].batch
+            else:
+                from .hybrid import get_backend
+                backend_batch = get_backend(backend)
+                convert_batch = lambda texts: backend_batch(texts, from_script, to_script)
+            self.batchers[key] = MicroBatcher(convert_batch, self.executor, self.metrics, ('%s>%s' % (from_script, to_script), backend),
+                                              self.batch_window, self.max_batch_texts)
+        return self.batchers[key]
+
+    def parse_request(self, body):
+        '''
+        Returns (from_script, to_script, backend, texts, is_single) of the given JSON body
+        '''
+        try:
+            request = json.loads(body)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Invalid JSON')
+        if not isinstance(request, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Expected a JSON object')
+
+        from_script, to_script = request.get('from'), request.get('to')
+        if (from_script, to_script) not in DELEGATES:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Conversion from %s to %s is not supported' % (from_script, to_script))
+        backend = request.get('backend', RULES_BACKEND)
+        if backend not in self.backends:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Backend %r is not enabled' % (backend,))
+
+        is_single = 'text' in request
+        texts = [request['text']] if is_single else request.get('texts')
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Expected "text" (string) or "texts" (list of strings)')
+        return from_script, to_script, backend, texts, is_single
+
+    async def transliterate(self, body):
+        start = time.perf_counter()
+        from_script, to_script, backend, texts, is_single = self.parse_request(body)
+        labels = ('%s>%s' % (from_script, to_script), backend)
+        if self.metrics.pending_texts + len(texts) > self.max_pending_texts:
+            self.metrics.record_request(labels, HTTPStatus.SERVICE_UNAVAILABLE, texts, time.perf_counter() - start)
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, 'Too many pending texts, retry later', {'Retry-After': '1'})
+
+        self.metrics.pending_texts += len(texts)
+        status = HTTPStatus.INTERNAL_SERVER_ERROR
+        try:
+            results = await self.get_batcher(from_script, to_script, backend).submit(texts) if texts else []
+            status = HTTPStatus.OK
+        finally:
+            self.metrics.pending_texts -= len(texts)
+            self.metrics.record_request(labels, status, texts, time.perf_counter() - start)
+        return {'text': results[0]} if is_single else {'texts': results}
+
+    async def handle_request(self, method, path, body):
+        '''
+        Returns (status, content_type, payload, headers) of the response
+        '''
+        path = path.split('?', 1)[0]
+        if path == '/transliterate':
+            if method != 'POST':
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, headers={'Allow': 'POST'})
+            return HTTPStatus.OK, 'application/json', await self.transliterate(body), {}
+
+        if method not in ('GET', 'HEAD'):
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, headers={'Allow': 'GET, HEAD'})
+        if path == '/metrics':
+            return HTTPStatus.OK, 'text/plain; version=0.0.4; charset=utf-8', self.metrics.to_prometheus(), {}
+        if path == '/pairs':
+            return HTTPStatus.OK, 'application/json', {'pairs': ['%s>%s' % pair for pair in DELEGATES], 'backends': self.backends}, {}
+        if path == '/health':
+            return HTTPStatus.OK, 'application/json', {'status': 'ok'}, {}
+        raise HTTPError(HTTPStatus.NOT_FOUND)
+
+    async def read_request(self, reader):
+        '''
+        Returns (method, path, headers, body) of the next request, or None if the connection was closed
+        '''
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        try:
+            method, path, version = request_line.decode('latin-1').split()
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Invalid request line')
+
+        headers = {'version': version}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            raise HTTPError(HTTPStatus.LENGTH_REQUIRED)
+        try:
+            content_length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Invalid Content-Length')
+        if content_length > self.max_request_bytes:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        body = await reader.readexactly(content_length) if content_length else b''
+        return method, path, headers, body
+
+    @staticmethod
+    def write_response(writer, status, content_type, payload, headers, keep_alive, head_only=False):
+        if not isinstance(payload, str):
+            payload = json.dumps(payload, ensure_ascii=False)
+        body = payload.encode('utf-8')
+        lines = ['HTTP/1.1 %d %s' % (status, status.phrase), 'Content-Type: %s' % content_type, 'Content-Length: %d' % len(body)]
+        lines += ['%s: %s' % item for item in headers.items()]
+        lines.append('Connection: %s' % ('keep-alive' if keep_alive else 'close'))
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        if not head_only:
+            writer.write(body)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await self.read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    connection = headers.get('connection', '').lower()
+                    keep_alive = connection == 'keep-alive' if headers['version'] == 'HTTP/1.0' else connection != 'close'
+                    status, content_type, payload, response_headers = await self.handle_request(method, path, body)
+                except HTTPError as error:
+                    status, content_type, payload, response_headers = error.status, 'application/json', {'error': str(error)}, error.headers
+                    method = None
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as error:
+                    status, content_type, payload, response_headers = HTTPStatus.INTERNAL_SERVER_ERROR, 'application/json', {'error': repr(error)}, {}
+
+                self.write_response(writer, status, content_type, payload, response_headers, keep_alive, head_only=method == 'HEAD')
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        '''
+        Starts listening (use port 0 for any free port, then read `self.port`)
+        '''
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def serve_forever(self):
+        await asyncio.get_running_loop().run_in_executor(self.executor, self.warm_up)
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        self.executor.shutdown(wait=False)
+
+def get_parser():
+    parser = argparse.ArgumentParser(prog='python -m indo_arabic_transliteration.server', description='Local HTTP service for Script Conversion of Indo-Pakistani languages')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='Address to listen on, default: %s' % DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to listen on, default: %d' % DEFAULT_PORT)
+    parser.add_argument('--backend', action='append', dest='backends', default=[], choices=EXTRA_BACKENDS, help='Also enable this backend (repeatable)')
+    parser.add_argument('--workers', type=int, help='Number of conversion threads (default: number of CPUs)')
+    parser.add_argument('--batch-window', type=float, default=DEFAULT_BATCH_WINDOW, help='Seconds to wait for more requests to batch together')
+    parser.add_argument('--max-batch-texts', type=int, default=DEFAULT_MAX_BATCH_TEXTS, help='Number of texts at which a batch is converted right away')
+    parser.add_argument('--max-pending-texts', type=int, default=DEFAULT_MAX_PENDING_TEXTS, help='Texts waiting beyond which the requests are rejected (503)')
+    parser.add_argument('--max-request-bytes', type=int, default=DEFAULT_MAX_REQUEST_BYTES, help='Larger requests are rejected (413)')
+    parser.add_argument('--word-cache', type=int, default=0, help='Memoise the conversions of up to this many words (default: disabled)')
+    return parser
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    if args.word_cache > 0:
+        enable_word_cache(args.word_cache)
+    server = TransliterationServer(args.host, args.port, args.backends, args.workers, args.batch_window,
+                                   args.max_batch_texts, args.max_pending_texts, args.max_request_bytes)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,6 @@
 import re
-import pandas as pd
-from .base import BaseIndoArabicTransliterator
+from .base import BaseIndoArabicTransliterator, read_mapping_file, ARABIC_TO_DEVANAGARI, DEVANAGARI_TO_ARABIC
+from .common import arabic_segmenter, devanagari_segmenter
 from .str_mapper import StringTranslator
 
 URDU_TO_SINDHI = {
@@ -22,6 +22,7 @@ SINDHI_PREPROCESS_MAP = {
     'ڈ': 'ڊ',
     'ڈھ': 'ڍ',
     'ڑ': 'ڙ',
+    'ے': 'ی', # Bari-ye is not used in Sindhi
     # Below are ambiguous, uncomment for extreme cases
     # 'ڑھ': 'ڙه',
     # 'تھ': 'ٿ',
@@ -31,48 +32,59 @@ SINDHI_PREPROCESS_MAP = {
 }
 sindhi_preprocessor = StringTranslator(SINDHI_PREPROCESS_MAP)
 
+# Except final {گھ, جھ, ڙھ}, all other do-chasmi endings can be converted to Arabic he (\x00 is BATCH_SEPARATOR, acts as start of text)
+MEDIAL_DO_CHASMI_HE_REGEX = re.compile(r"ھ\B")
+FINAL_DO_CHASMI_HE_REGEX = re.compile(r'([^ڙجگ\x00])ھ')
+# Isolated characters followed by punctuations, to have space around them
+ISOLATED_MEIN_REGEX = re.compile(r"\s۾([^\w \x00])")
+ISOLATED_AIN_REGEX = re.compile(r"\s۽([^\w \x00])")
+
 CONSONANT_MAP_FILES = ['sindhi_consonants.csv']
 ADDITIONAL_FINAL_MAP_FILES = ['sindhi_final.csv']
 ISOLATED_MAP_FILES = ['sindhi_isolated.csv']
+# Whole words whose conversion is not derivable by the letter rules, for each direction
+WORDS_MAP_FILES = {}
 
 class SindhiTransliterator(BaseIndoArabicTransliterator):
-    def __init__(self):
-        super().__init__(CONSONANT_MAP_FILES)
-        self.isolated_sindhi_to_devanagari_map = {}
+    def __init__(self, compiled=False, words_map_files=WORDS_MAP_FILES):
+        super().__init__(CONSONANT_MAP_FILES, compiled=compiled, words_map_files=words_map_files)
+
+    def load_maps(self):
+        maps = super().load_maps()
+        maps['isolated_sindhi_to_devanagari_map'] = {}
         
         for map_file in ISOLATED_MAP_FILES:
-            df = pd.read_csv(self.data_dir+map_file, header=None)
-            for i in df.columns:
-                sindhi_letter, roman_letter, devanagari_letter = str(df[i][0]).strip(), str(df[i][1]).strip(), str(df[i][2]).strip()
-                self.isolated_sindhi_to_devanagari_map[' '+sindhi_letter+' '] = ' '+devanagari_letter+' '
-                self.arabic_to_devanagari_cleanup_pass[sindhi_letter] = devanagari_letter
+            for sindhi_letter, roman_letter, devanagari_letter in read_mapping_file(self.data_dir+map_file):
+                maps['isolated_sindhi_to_devanagari_map'][' '+sindhi_letter+' '] = ' '+devanagari_letter+' '
+                maps['arabic_to_devanagari_cleanup_pass'][sindhi_letter] = devanagari_letter
         
         for map_file in ADDITIONAL_FINAL_MAP_FILES:
-            df = pd.read_csv(self.data_dir+map_file, header=None)
-            for i in df.columns:
-                arabic_letter, roman_letter, devanagari_letter = str(df[i][0]).strip(), str(df[i][1]).strip(), str(df[i][2]).strip()
-                self.final_arabic_to_devanagari_map[arabic_letter] = devanagari_letter
-        
-        self.isolated_sindhi_to_devanagari_converter = StringTranslator(self.isolated_sindhi_to_devanagari_map)
-        self.final_arabic_to_devanagari_converter = StringTranslator(self.final_arabic_to_devanagari_map, match_final_only=True)
-        self.arabic_to_devanagari_final_cleanup = StringTranslator(self.arabic_to_devanagari_cleanup_pass)
+            for arabic_letter, roman_letter, devanagari_letter in read_mapping_file(self.data_dir+map_file):
+                maps['final_arabic_to_devanagari_map'][arabic_letter] = devanagari_letter
+        return maps
+
+    def compile_maps(self, maps):
+        translators = super().compile_maps(maps)
+        translators['isolated_sindhi_to_devanagari_converter'] = self.translator_class(maps['isolated_sindhi_to_devanagari_map'])
+        translators['sindhi_preprocessor'] = self.translator_class(SINDHI_PREPROCESS_MAP) if self.compiled else sindhi_preprocessor
+        return translators
     
     def arabic_normalize(self, text):
         text = super().arabic_normalize(text)
-        text = text.replace('ے', 'ی')
-        text = sindhi_preprocessor.translate(text)
-        text = re.sub(r"ھ\B", "ه", text)
-        text = re.sub('([^ڙجگ])ھ', r'\1ه', text) # Except final {گھ, جھ, ڙھ}, all other do-chasmi endings can be converted to Arabic he
+        text = self.sindhi_preprocessor.translate(text)
+        text = MEDIAL_DO_CHASMI_HE_REGEX.sub("ه", text)
+        text = FINAL_DO_CHASMI_HE_REGEX.sub(r'\1ه', text)
 
         # Ensure the isolated characters have space around them
         # text = re.sub(" م ", " ۾ ", text)
         # text = re.sub(" ء ",  " ۽ ", text)
-        text = re.sub(r"\s۾([^\w ])", r" ۾ \1", text)
-        text = re.sub(r"\s۽([^\w ])", r" ۽ \1", text)
+        text = ISOLATED_MEIN_REGEX.sub(r" ۾ \1", text)
+        text = ISOLATED_AIN_REGEX.sub(r" ۽ \1", text)
         return text
     
     def transliterate_from_sindhi_to_devanagari(self, text, nativize=False):
         text = self.arabic_normalize(text)
+        text = self.transliterate_lexicon_words(text, ARABIC_TO_DEVANAGARI)
         text = self.isolated_sindhi_to_devanagari_converter.translate(text)
         text = self.initial_arabic_to_devanagari_converter.translate(text)
 
@@ -103,6 +115,7 @@ class SindhiTransliterator(BaseIndoArabicTransliterator):
         return text
 
     def transliterate_from_devanagari_to_sindhi(self, text, nativize=False):
+        text = self.transliterate_lexicon_words(text, DEVANAGARI_TO_ARABIC) # Before the normalization, which abjadifies the vowels
         text = self.devanagari_normalize(text)
         text = re.sub('((^|[^\u0900-\u0963\u0972-\u097f]))ए', '\\1ای', text) # Patch: ए is present in both hamza and initial vowels, so handle first
         text = self.isolated_sindhi_to_devanagari_converter.reverse_translate(text)
@@ -124,6 +137,12 @@ class SindhiTransliterator(BaseIndoArabicTransliterator):
             text = text.translate(sindhi_postprocessor)
         return text
     
+    def transliterate_from_sindhi_to_devanagari_batch(self, texts, nativize=False, convert_common_chars=True):
+        return self.transliterate_batch(self.transliterate_from_sindhi_to_devanagari, texts, segmenter=arabic_segmenter, convert_common_chars=convert_common_chars, nativize=nativize)
+
+    def transliterate_from_devanagari_to_sindhi_batch(self, texts, nativize=False, convert_common_chars=True):
+        return self.transliterate_batch(self.transliterate_from_devanagari_to_sindhi, texts, segmenter=devanagari_segmenter, convert_common_chars=convert_common_chars, nativize=nativize)
+
     def __call__(self, text, src_lang, dest_lang, nativize=False):
         if dest_lang == 'sd':
             return self.transliterate_from_devanagari_to_sindhi(text, nativize)
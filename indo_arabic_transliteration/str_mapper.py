@@ -1,4 +1,10 @@
 import re
+import threading
+from itertools import repeat
+
+# Guards the compilation on first use, so that each matcher is built once even when first used by many threads at once.
+# After that, the translators are only read, hence safe for concurrent use. (A lock per translator would not be picklable.)
+compile_lock = threading.Lock()
 
 def sort_dict_by_descending_length(input_dict):
     output_dict = {}
@@ -18,22 +24,208 @@ class StringTranslator:
     '''
     A re-implementation of str.maketrans() to support multi-letter keys.
     More details: https://stackoverflow.com/q/63230213
+    The tables of each direction (regex, and the reverse dict) are built only on its first use,
+    since most users convert only in one direction.
+    `reverse_overrides` patches the reverse translation dict (for the values of many keys).
     '''
-    def __init__(self, translation_dict, sort_by_descending_key_length=True, match_initial_only=False, match_final_only=False, boundary_regex=r'\b', support_back_translation=True):
+    def __init__(self, translation_dict, sort_by_descending_key_length=True, match_initial_only=False, match_final_only=False, boundary_regex=r'\b', support_back_translation=True, reverse_overrides=None):
 
+        self.original_translation_dict = translation_dict # Its order decides the reverse of the duplicate values
         self.translation_dict = translation_dict
         if sort_by_descending_key_length:
             self.translation_dict = sort_dict_by_descending_length(self.translation_dict)
-        self.regex = get_regex_matcher_from_array(self.translation_dict, match_initial_only, match_final_only, boundary_regex)
 
-        if support_back_translation:
-            self.reverse_translation_dict = {value: key for key, value in translation_dict.items()}
-            if sort_by_descending_key_length:
-                self.reverse_translation_dict = sort_dict_by_descending_length(self.reverse_translation_dict)
-            self.reverse_regex = get_regex_matcher_from_array(self.reverse_translation_dict, match_initial_only, match_final_only, boundary_regex)
+        self.sort_by_descending_key_length = sort_by_descending_key_length
+        self.match_initial_only = match_initial_only
+        self.match_final_only = match_final_only
+        self.boundary_regex = boundary_regex
+        self.support_back_translation = support_back_translation
+        self.reverse_overrides = dict(reverse_overrides or {})
+        self.reverse_dict = None
+        self.regex = None
+        self.reverse_regex = None
+
+    @property
+    def reverse_translation_dict(self):
+        if self.reverse_dict is None:
+            if not self.support_back_translation:
+                raise AttributeError('Reverse translation is not supported by this translator')
+            reverse_dict = {value: key for key, value in self.original_translation_dict.items()}
+            if self.sort_by_descending_key_length:
+                reverse_dict = sort_dict_by_descending_length(reverse_dict)
+            reverse_dict.update(self.reverse_overrides)
+            self.reverse_dict = reverse_dict
+        return self.reverse_dict
+
+    def compile_regex(self, translation_dict):
+        return get_regex_matcher_from_array(translation_dict, self.match_initial_only, self.match_final_only, self.boundary_regex)
+
+    def precompile(self, forward=True, reverse=True):
+        '''
+        Builds the tables of the given directions upfront, instead of on first use
+        '''
+        with compile_lock:
+            if forward and self.regex is None:
+                self.regex = self.compile_regex(self.translation_dict)
+            if reverse and self.support_back_translation and self.reverse_regex is None:
+                self.reverse_regex = self.compile_regex(self.reverse_translation_dict)
 
     def translate(self, text):
+        if self.regex is None:
+            self.precompile(reverse=False)
         return self.regex.sub(lambda match: self.translation_dict[match.group(0)], text)
 
     def reverse_translate(self, text):
+        if self.reverse_regex is None:
+            self.precompile(forward=False)
         return self.reverse_regex.sub(lambda match: self.reverse_translation_dict[match.group(0)], text)
+
+def build_trie(array):
+    trie = {}
+    for key in array:
+        node = trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node[None] = key # Marks the end of a key
+    return trie
+
+def trie_to_regex_str(node, terminal_regex=''):
+    leaves, branches = [], []
+    for char, child in node.items():
+        if char is None:
+            continue
+        if len(child) == 1 and None in child:
+            leaves.append(re.escape(char))
+        else:
+            branches.append(re.escape(char) + trie_to_regex_str(child, terminal_regex))
+
+    if len(leaves) == 1:
+        branches.append(leaves[0] + terminal_regex)
+    elif leaves:
+        branches.append('[' + ''.join(leaves) + ']' + terminal_regex)
+    if None in node:
+        branches.append(terminal_regex) # Tried last, so that the longest key always wins
+
+    if len(branches) == 1:
+        return branches[0]
+    return '(?:' + '|'.join(branches) + ')'
+
+def get_trie_regex_matcher_from_array(array, match_initial_only=False, match_final_only=False, boundary_regex=r'\b'):
+    '''
+    Same matching behaviour as get_regex_matcher_from_array() for keys sorted by descending length,
+    but the alternation is factored into a trie so that the regex engine only tries the keys sharing a prefix.
+    The whole key is captured in a single group, to be used with regex.split()
+    '''
+    regex_str = '(' + trie_to_regex_str(build_trie(array), boundary_regex if match_final_only else '') + ')'
+    if match_initial_only:
+        regex_str = boundary_regex + regex_str
+    return re.compile(regex_str)
+
+class CompiledStringTranslator(StringTranslator):
+    '''
+    A faster drop-in replacement for StringTranslator, producing identical output.
+    - Keys are matched by a trie-shaped regex instead of a flat alternation of all keys
+    - Single-letter keys are applied with str.translate() when no boundary is involved
+    - Replacements are done by splitting on the matches, without a Python callback per match
+    The matchers are compiled on first use (of each direction).
+    '''
+    def __init__(self, translation_dict, sort_by_descending_key_length=True, match_initial_only=False, match_final_only=False, boundary_regex=r'\b', support_back_translation=True, reverse_overrides=None):
+        super().__init__(translation_dict, sort_by_descending_key_length, match_initial_only, match_final_only, boundary_regex, support_back_translation, reverse_overrides)
+        self.forward_matcher = None
+        self.reverse_matcher = None
+
+    def compile_matcher(self, translation_dict):
+        '''
+        Returns (regex, char_table, split_on_regex) to be used by substitute()
+        '''
+        if not self.sort_by_descending_key_length or '' in translation_dict:
+            # Trie matching is the same only for longest-first keys
+            regex = get_regex_matcher_from_array(translation_dict, self.match_initial_only, self.match_final_only, self.boundary_regex)
+            return regex, None, False
+
+        if self.match_initial_only or self.match_final_only:
+            multi_char_keys, single_char_map = list(translation_dict), {}
+        else:
+            # Single-letter matches and non-matches both advance by exactly one letter,
+            # hence the multi-letter keys can be matched alone and the gaps translated char-wise
+            multi_char_keys = [key for key in translation_dict if len(key) > 1]
+            single_char_map = {key: value for key, value in translation_dict.items() if len(key) == 1}
+
+        regex = get_trie_regex_matcher_from_array(multi_char_keys, self.match_initial_only, self.match_final_only, self.boundary_regex) if multi_char_keys else None
+        return regex, str.maketrans(single_char_map) if single_char_map else None, True
+
+    @staticmethod
+    def substitute(text, matcher, translation_dict):
+        regex, char_table, split_on_regex = matcher
+        if not split_on_regex:
+            return regex.sub(lambda match: translation_dict[match.group(0)], text)
+        if regex is None:
+            return text.translate(char_table) if char_table else text
+
+        parts = regex.split(text)
+        if char_table:
+            parts[::2] = map(str.translate, parts[::2], repeat(char_table))
+        parts[1::2] = map(translation_dict.__getitem__, parts[1::2])
+        return ''.join(parts)
+
+    def precompile(self, forward=True, reverse=True):
+        with compile_lock:
+            if forward and self.forward_matcher is None:
+                self.forward_matcher = self.compile_matcher(self.translation_dict)
+            if reverse and self.support_back_translation and self.reverse_matcher is None:
+                self.reverse_matcher = self.compile_matcher(self.reverse_translation_dict)
+
+    def translate(self, text):
+        if self.forward_matcher is None:
+            self.precompile(reverse=False)
+        return self.substitute(text, self.forward_matcher, self.translation_dict)
+
+    def reverse_translate(self, text):
+        if self.reverse_matcher is None:
+            self.precompile(forward=False)
+        return self.substitute(text, self.reverse_matcher, self.reverse_translation_dict)
+
+class InfixTranslator:
+    '''
+    Translates infixes only when they are between two context letters, like `X+infix+Y` to `X+replacement+Y`.
+    Equivalent to a StringTranslator over all such combinations (both context letters are consumed by a match),
+    but with a single compact regex instead of len(context_letters)^2 keys per infix.
+    '''
+    def __init__(self, infix_dict, context_letters, support_back_translation=True):
+        self.infix_dict = sort_dict_by_descending_length(infix_dict)
+        self.context_letters = sorted(set(context_letters), key=len, reverse=True)
+        if support_back_translation:
+            self.reverse_infix_dict = sort_dict_by_descending_length({value: key for key, value in infix_dict.items()})
+
+        # Compiled on first use (of each direction)
+        self.regex = None
+        self.reverse_regex = None
+
+    def get_regex_matcher(self, infix_dict):
+        context_regex_str = '(' + trie_to_regex_str(build_trie(self.context_letters)) + ')'
+        infix_regex_str = '(' + '|'.join(map(re.escape, infix_dict)) + ')'
+        return re.compile(context_regex_str + infix_regex_str + context_regex_str)
+
+    def precompile(self, forward=True, reverse=True):
+        with compile_lock:
+            if forward and self.regex is None:
+                self.regex = self.get_regex_matcher(self.infix_dict)
+            if reverse and hasattr(self, 'reverse_infix_dict') and self.reverse_regex is None:
+                self.reverse_regex = self.get_regex_matcher(self.reverse_infix_dict)
+
+    @staticmethod
+    def substitute(regex, infix_dict, text):
+        # Split parts are [text, letter, infix, letter, text, ...]
+        parts = regex.split(text)
+        parts[2::4] = map(infix_dict.__getitem__, parts[2::4])
+        return ''.join(parts)
+
+    def translate(self, text):
+        if self.regex is None:
+            self.precompile(reverse=False)
+        return self.substitute(self.regex, self.infix_dict, text)
+
+    def reverse_translate(self, text):
+        if self.reverse_regex is None:
+            self.precompile(forward=False)
+        return self.substitute(self.reverse_regex, self.reverse_infix_dict, text)
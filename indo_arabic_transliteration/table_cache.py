@@ -0,0 +1,139 @@
+'''
+On-disk cache of the fully built transliteration tables (maps and compiled translators),
+so that later processes can skip parsing the CSVs (and importing pandas) altogether.
+
+Artifacts are looked up first in the package (`data/compiled/`, if shipped in the wheel),
+then in the user cache directory. They are keyed by a hash of the mapping CSVs
+(and of the code deriving the tables), hence any change in `data/*.csv` automatically invalidates them.
+
+Build step (for eg., before packaging):
+    python -m indo_arabic_transliteration.table_cache --output-dir indo_arabic_transliteration/data/compiled/
+'''
+import os
+import pickle
+import hashlib
+from functools import lru_cache
+from importlib import import_module
+
+from .__version import __version__
+
+ARTIFACT_VERSION = 2
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data', '')
+PACKAGED_ARTIFACTS_DIR = os.path.join(DATA_DIR, 'compiled')
+
+# Set to an empty string to disable the user cache
+CACHE_DIR_ENV_VAR = 'INDO_ARABIC_TRANSLITERATION_CACHE_DIR'
+
+def get_cache_dir():
+    if CACHE_DIR_ENV_VAR in os.environ:
+        return os.environ[CACHE_DIR_ENV_VAR]
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'indo_arabic_transliteration')
+
+def hash_files(folder, extension):
+    sha = hashlib.sha256()
+    for file_name in sorted(os.listdir(folder)):
+        if file_name.endswith(extension):
+            sha.update(file_name.encode('utf-8'))
+            with open(os.path.join(folder, file_name), 'rb') as f:
+                sha.update(f.read())
+    return sha.hexdigest()
+
+@lru_cache(maxsize=None)
+def get_data_hash(data_dir):
+    '''
+    Hash of all the mapping files in the given data folder
+    '''
+    return hash_files(data_dir, '.csv')
+
+@lru_cache(maxsize=None)
+def get_code_hash():
+    '''
+    Hash of the package's code, since the pickled tables depend on the classes and the derivation logic
+    '''
+    return hash_files(os.path.dirname(__file__), '.py')
+
+@lru_cache(maxsize=None)
+def get_tables_hash(data_dir=DATA_DIR):
+    '''
+    Short hash identifying the output of the rule-based conversion (i.e. the mapping files and the code)
+    '''
+    tables_id = repr((ARTIFACT_VERSION, __version__, get_code_hash(), get_data_hash(data_dir)))
+    return hashlib.sha256(tables_id.encode('utf-8')).hexdigest()[:16]
+
+def get_artifact_name(key, data_dir):
+    artifact_id = repr((ARTIFACT_VERSION, __version__, get_code_hash(), key, get_data_hash(data_dir)))
+    return 'tables-%s.pickle' % hashlib.sha256(artifact_id.encode('utf-8')).hexdigest()[:32]
+
+def read_artifact(path, key, data_dir):
+    try:
+        with open(path, 'rb') as f:
+            artifact = pickle.load(f)
+    except Exception:
+        # Missing, corrupt or incompatible artifact, will be rebuilt
+        return None
+
+    if artifact.get('version') != ARTIFACT_VERSION or artifact.get('key') != key or artifact.get('data_hash') != get_data_hash(data_dir):
+        return None
+    return artifact['tables']
+
+def write_artifact(output_dir, key, data_dir, tables):
+    artifact = {
+        'version': ARTIFACT_VERSION,
+        'key': key,
+        'data_hash': get_data_hash(data_dir),
+        'tables': tables,
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, get_artifact_name(key, data_dir))
+
+    # Write to a temporary file first, so that concurrent readers never see a partial artifact
+    temp_path = '%s.%d.tmp' % (path, os.getpid())
+    with open(temp_path, 'wb') as f:
+        pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+    return path
+
+def load_tables(key, data_dir, build_tables):
+    '''
+    Returns the tables for the given key from the packaged or user-cached artifact,
+    else builds them using `build_tables()` and saves them to the user cache.
+    '''
+    artifact_name = get_artifact_name(key, data_dir)
+    cache_dir = get_cache_dir()
+    for artifacts_dir in (PACKAGED_ARTIFACTS_DIR, cache_dir):
+        if artifacts_dir:
+            tables = read_artifact(os.path.join(artifacts_dir, artifact_name), key, data_dir)
+            if tables is not None:
+                return tables
+
+    tables = build_tables()
+    if cache_dir:
+        try:
+            write_artifact(cache_dir, key, data_dir, tables)
+        except OSError:
+            pass # Read-only or unavailable cache folder, not fatal
+    return tables
+
+def build_artifacts(output_dir=PACKAGED_ARTIFACTS_DIR):
+    '''
+    Builds the artifacts for all the supported languages into the given folder
+    '''
+    from .mapper import CONVERTER_CLASSES
+
+    paths = []
+    for module_name, class_name in CONVERTER_CLASSES.values():
+        converter_class = getattr(import_module(module_name, __package__), class_name)
+        for compiled in (False, True):
+            converter = converter_class(compiled=compiled)
+            for key, build_tables in converter.get_table_layers():
+                paths.append(write_artifact(output_dir, key, converter.data_dir, build_tables()))
+    return paths
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Precompile the transliteration tables')
+    parser.add_argument('--output-dir', default=PACKAGED_ARTIFACTS_DIR, help='Folder to write the artifacts to')
+    args = parser.parse_args()
+    for path in sorted(set(build_artifacts(args.output_dir))):
+        print(path)
@@ -0,0 +1,114 @@
+'''
+Word-level memoisation of the conversions.
+
+Natural text is highly Zipfian, so most of its words would be already converted before.
+Texts are split at the safe boundaries (`SAFE_SPLIT_REGEX`, i.e. whitespace runs not touched by any multi-word rule),
+and each unique piece is converted only once, through a bounded LRU cache.
+The output is identical to converting the whole text.
+'''
+import threading
+from collections import OrderedDict
+
+from .common import SAFE_SPLIT_REGEX
+
+DEFAULT_WORD_CACHE_SIZE = 100000
+
+class LRUCache:
+    '''
+    Thread-safe dict with a maximum number of entries, dropping the least recently used ones.
+    With `maxsize=None`, it is unbounded (for eg., to convert each unique word only once within a single call).
+    '''
+    def __init__(self, maxsize=DEFAULT_WORD_CACHE_SIZE):
+        if maxsize is not None and maxsize < 1:
+            raise ValueError('maxsize should be positive, got %r' % maxsize)
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def get_many(self, keys):
+        '''
+        Returns the dict of cached values for the given keys, and the list of (unique) missing keys.
+        Repeated occurrences of a missing key count as hits, since it gets converted only once.
+        '''
+        found = {}
+        missing = {}
+        with self.lock:
+            for key in keys:
+                if key in found or key in missing:
+                    self.hits += 1
+                elif key in self.data:
+                    self.data.move_to_end(key)
+                    found[key] = self.data[key]
+                    self.hits += 1
+                else:
+                    missing[key] = None
+                    self.misses += 1
+        return found, list(missing)
+
+    def put_many(self, items):
+        with self.lock:
+            for key, value in items:
+                self.data[key] = value
+                self.data.move_to_end(key)
+            while self.maxsize is not None and len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self.data),
+            'maxsize': self.maxsize,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+class WordCachedTransliterator:
+    '''
+    Wraps a batch conversion function (for eg., `HindustaniTransliterator().transliterate_from_urdu_to_hindi_batch`),
+    so that each unique piece of the texts is converted at most once.
+    A `namespace` (for eg., the script pair) prefixes the keys, to share a cache between different conversions.
+    Pass `split_regex` (with a capturing group, to keep the separators) for conversions with other safe boundaries.
+    '''
+    def __init__(self, convert_batch, cache, namespace=None, split_regex=SAFE_SPLIT_REGEX):
+        self.convert_batch = convert_batch
+        self.cache = cache
+        self.namespace = namespace
+        self.split_regex = split_regex
+
+    def convert_pieces(self, pieces):
+        '''
+        Returns the dict of converted values for all the given pieces
+        '''
+        namespace = self.namespace
+        keys = pieces if namespace is None else [(namespace, piece) for piece in pieces]
+        converted, missing_keys = self.cache.get_many(keys)
+        if missing_keys:
+            missing_pieces = missing_keys if namespace is None else [piece for _, piece in missing_keys]
+            new_items = list(zip(missing_keys, self.convert_batch(missing_pieces)))
+            self.cache.put_many(new_items)
+            converted.update(new_items)
+        if namespace is not None:
+            converted = {piece: value for (_, piece), value in converted.items()}
+        return converted
+
+    def transliterate(self, text):
+        pieces = self.split_regex.split(text)
+        converted = self.convert_pieces(pieces)
+        return ''.join(map(converted.__getitem__, pieces))
+
+    def transliterate_batch(self, texts):
+        pieces_list = [self.split_regex.split(text) for text in texts]
+        converted = self.convert_pieces([piece for pieces in pieces_list for piece in pieces])
+        return [''.join(map(converted.__getitem__, pieces)) for pieces in pieces_list]
@@ -32,6 +32,15 @@ setup(
     # packages=find_packages(exclude=("tests",)),
     include_package_data=True,
     install_requires=install_requires,
+    extras_require={
+        # Only for `lossless_converter`
+        "lossless": ["aksharamukha"],
+    },
+    entry_points={
+        "console_scripts": [
+            "indo-arabic-transliterate=indo_arabic_transliteration.cli:main",
+        ],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "Operating System :: OS Independent",
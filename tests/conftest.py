@@ -0,0 +1,6 @@
+import os
+
+from indo_arabic_transliteration.table_cache import CACHE_DIR_ENV_VAR
+
+# Build the tables from the CSVs, instead of reading (or writing) the user's cache
+os.environ[CACHE_DIR_ENV_VAR] = ''
@@ -0,0 +1,60 @@
+'''
+Writes the golden outputs of `test_differential.py`: the conversions of its texts by a reference converter,
+i.e. the package in the given folder (for eg., a checkout of the release before the faster conversion paths).
+Rerun only when the output of the rules is changed on purpose.
+
+Usage:
+    python -m tests.make_golden /path/to/reference/checkout
+'''
+import os
+import sys
+import json
+import subprocess
+
+from .texts import generate_texts
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+PAIRS = [('hi-IN', 'ur-PK'), ('ur-PK', 'hi-IN'), ('pa-IN', 'pa-PK'), ('pa-PK', 'pa-IN'), ('sd-IN', 'sd-PK'), ('sd-PK', 'sd-IN')]
+NUM_TEXTS = 300
+# Lines joined into the document typed by `test_incremental_typing()`
+NUM_DOCUMENT_LINES = 30
+
+# Run in the reference folder, with only the API common to all the versions
+CONVERT_CODE = '''
+import sys, json
+from indo_arabic_transliteration.mapper import script_convert
+inputs = json.loads(sys.stdin.read())
+json.dump([[script_convert(text, *pair) for text in texts] for pair, texts in inputs], sys.stdout)
+'''
+
+def get_golden_texts(script):
+    texts = generate_texts(script, NUM_TEXTS) + ['', ' ', '\x00', 'a\x00b']
+    return texts + ['\n'.join(texts[:NUM_DOCUMENT_LINES])]
+
+def get_golden_path(pair):
+    return os.path.join(GOLDEN_DIR, '%s_%s.json' % pair)
+
+def load_golden(pair):
+    '''
+    Returns the texts of the given pair of scripts, and their golden conversions
+    '''
+    with open(get_golden_path(pair), encoding='utf-8') as golden_file:
+        items = json.load(golden_file)
+    return [text for text, result in items], [result for text, result in items]
+
+def make_golden(reference_dir):
+    inputs = [(pair, get_golden_texts(pair[0])) for pair in PAIRS]
+    process = subprocess.run([sys.executable, '-c', CONVERT_CODE], cwd=reference_dir, input=json.dumps(inputs), capture_output=True,
+                             encoding='utf-8', check=True, env=dict(os.environ, PYTHONIOENCODING='utf-8'))
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+    for (pair, texts), results in zip(inputs, json.loads(process.stdout)):
+        with open(get_golden_path(pair), 'w', encoding='utf-8', newline='\n') as golden_file:
+            # One (text, result) per line, for readable diffs
+            golden_file.write('[\n' + ',\n'.join(json.dumps(item, ensure_ascii=False) for item in zip(texts, results)) + '\n]\n')
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Write the golden outputs of the differential tests')
+    parser.add_argument('reference_dir', help='Folder containing the reference `indo_arabic_transliteration` package')
+    args = parser.parse_args()
+    make_golden(args.reference_dir)
@@ -0,0 +1,51 @@
+import io
+
+import pytest
+
+from indo_arabic_transliteration.cli import iter_line_records, transliterate_records, main
+from indo_arabic_transliteration.mapper import script_convert
+from .texts import load_corpus
+
+def convert_lines(text, from_script, to_script, max_line_chars, max_buffer_chars=None):
+    records = iter_line_records(io.StringIO(text), max_line_chars, max_buffer_chars)
+    return ''.join(transliterate_records(records, from_script, to_script))
+
+def test_no_split_before_unread_text():
+    # The whitespace at the end of the first chunk is followed by ؤ, which is not known when it is read
+    records = iter_line_records(io.StringIO('ابب کتابو ؤا کتاب'), 10)
+    assert [texts for texts, render in records] == [['ابب'], [' کتابو ؤا کتاب']]
+
+def test_no_split_within_word():
+    records = iter_line_records(io.StringIO('ابب کتابوکتابوکتابو کتاب'), 10)
+    assert [texts for texts, render in records] == [['ابب'], [' کتابوکتابوکتابو کتاب']]
+
+@pytest.mark.parametrize('from_script, to_script', [('ur-PK', 'hi-IN'), ('sd-PK', 'sd-IN'), ('hi-IN', 'ur-PK')])
+@pytest.mark.parametrize('max_line_chars', [1, 2, 7, 10, 33])
+def test_same_as_whole_lines(from_script, to_script, max_line_chars):
+    lines = load_corpus(from_script) + ['ابب کتابو ؤا کتاب', 'و ؤ  ئ ۓ  ء م ۾ ۽', 'کتاب ﺋے', 'ڪتاب ﻡ ڪتاب', '']
+    text = '\n'.join(lines) + '\r\n' + lines[0]
+    expected = '\n'.join(script_convert(line, from_script, to_script) for line in lines) + '\r\n' + script_convert(lines[0], from_script, to_script)
+    # The buffer has to fit the longest run without any safe boundary
+    assert convert_lines(text, from_script, to_script, max_line_chars, max_buffer_chars=64) == expected
+
+def test_forced_split_at_whitespace():
+    # No safe boundary at all (every whitespace run is next to ۾), hence cut at the last whitespace once the buffer is full
+    records = iter_line_records(io.StringIO('ڪتاب ۾ ڪتاب ۾ ڪتاب ۾ ڪتاب'), 4, 12)
+    assert [texts for texts, render in records] == [['ڪتاب ۾ ڪتاب'], [' ۾ ڪتاب ۾'], [' ڪتاب']]
+
+def test_forced_split_within_word():
+    records = iter_line_records(io.StringIO('ک' * 25), 4, 8)
+    assert [texts for texts, render in records] == [['ک' * 8], ['ک' * 8], ['ک' * 8], ['ک']]
+
+def test_bounded_buffer():
+    text = ('ڪتاب ۾ ' * 1000) + 'ک' * 5000
+    pieces = [texts[0] for texts, render in iter_line_records(io.StringIO(text), 10)]
+    assert ''.join(pieces) == text
+    assert max(map(len, pieces)) <= 4 * 10 + 10
+
+def test_main(tmp_path):
+    lines = load_corpus('ur-PK')
+    input_path, output_path = tmp_path / 'input.txt', tmp_path / 'output.txt'
+    input_path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    main(['-f', 'ur-PK', '-t', 'hi-IN', '--max-line-chars', '10', str(input_path), '-o', str(output_path)])
+    assert output_path.read_text(encoding='utf-8') == ''.join(script_convert(line, 'ur-PK', 'hi-IN') + '\n' for line in lines)
@@ -0,0 +1,61 @@
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from indo_arabic_transliteration.mapper import script_convert
+from indo_arabic_transliteration.dataframe import transliterate_series, transliterate_arrow
+from .texts import generate_texts
+
+PAIR = ('ur-PK', 'hi-IN')
+
+def get_column():
+    texts = generate_texts('ur-PK', 20)
+    return [texts[i % 7] if i % 5 else None for i in range(60)]
+
+def convert_values(values):
+    return [None if value is None else script_convert(value, *PAIR) for value in values]
+
+@pytest.mark.parametrize('dtype', [object, 'string'])
+def test_series(dtype):
+    column = get_column() + [3]
+    if dtype == 'string':
+        column = column[:-1]
+    series = pd.Series(column, index=range(100, 100 + len(column)), name='name', dtype=dtype)
+    result = transliterate_series(series, *PAIR)
+    assert result.dtype == series.dtype
+    assert result.name == 'name' and result.index.equals(series.index)
+    expected = [value if not isinstance(value, str) else script_convert(value, *PAIR) for value in column]
+    assert [None if pd.isna(value) else value for value in result] == expected
+
+@pytest.mark.parametrize('value_type', [pa.string(), pa.large_string()])
+def test_arrow(value_type):
+    column = get_column()
+    array = pa.array(column, type=value_type)
+    result = transliterate_arrow(array, *PAIR)
+    assert result.type == value_type
+    assert result.to_pylist() == convert_values(column)
+
+def test_arrow_dictionary():
+    column = get_column()
+    array = pa.array(column).dictionary_encode()
+    result = transliterate_arrow(array, *PAIR)
+    assert result.type == array.type
+    assert result.indices.equals(array.indices)
+    assert result.to_pylist() == convert_values(column)
+
+@pytest.mark.parametrize('dictionary_encode', [False, True])
+def test_arrow_chunked(dictionary_encode):
+    column = get_column()
+    chunks = [pa.array(values, type=pa.string()) for values in (column[:25], [], column[25:])]
+    if dictionary_encode:
+        chunks = [chunk.dictionary_encode() for chunk in chunks]
+    array = pa.chunked_array(chunks)
+    result = transliterate_arrow(array, *PAIR)
+    assert isinstance(result, pa.ChunkedArray)
+    assert result.type == array.type
+    assert [len(chunk) for chunk in result.chunks] == [25, 0, 35]
+    assert result.to_pylist() == convert_values(column)
+
+def test_arrow_not_strings():
+    with pytest.raises(TypeError):
+        transliterate_arrow(pa.array([1, 2]), *PAIR)
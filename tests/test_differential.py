@@ -0,0 +1,122 @@
+'''
+Differential tests of the faster conversion paths, against the golden outputs of the reference converter (see `make_golden.py`):
+per-text conversion, compiled translators, word cache, persistent cache, thread pool, incremental edits and script-run segmentation.
+The lossless batch is compared with its per-text conversion.
+'''
+import random
+from importlib import import_module
+
+import pytest
+
+from indo_arabic_transliteration import mapper
+from indo_arabic_transliteration.mapper import DELEGATES, CONVERTER_CLASSES, script_convert, script_convert_batch
+from indo_arabic_transliteration.parallel import threaded_script_convert
+from indo_arabic_transliteration.incremental import IncrementalTransliterator
+from indo_arabic_transliteration.persistent_cache import PersistentCache
+from indo_arabic_transliteration import lossless_converter
+from .texts import generate_texts, load_corpus
+from .make_golden import PAIRS, NUM_DOCUMENT_LINES, load_golden
+
+@pytest.fixture(scope='module')
+def expected():
+    '''
+    Returns the texts of each pair of scripts, and their golden conversions
+    '''
+    mapper.disable_word_cache()
+    return {pair: load_golden(pair) for pair in PAIRS}
+
+@pytest.fixture
+def word_cache():
+    yield mapper.enable_word_cache
+    mapper.disable_word_cache()
+
+def test_pairs():
+    assert sorted(PAIRS) == sorted(DELEGATES)
+
+@pytest.mark.parametrize('pair', PAIRS)
+def test_script_convert(expected, pair):
+    texts, results = expected[pair]
+    assert [script_convert(text, *pair) for text in texts] == results
+
+@pytest.mark.parametrize('pair', PAIRS)
+def test_batch(expected, pair):
+    texts, results = expected[pair]
+    assert script_convert_batch(texts, *pair) == results
+
+@pytest.mark.parametrize('pair', PAIRS)
+def test_compiled(expected, pair):
+    texts, results = expected[pair]
+    delegate = DELEGATES[pair]
+    module_name, class_name = CONVERTER_CLASSES[delegate.language]
+    converter = getattr(import_module(module_name, 'indo_arabic_transliteration'), class_name)(compiled=True)
+    transliterate_batch = getattr(converter, delegate.method_name + '_batch')
+    assert transliterate_batch(texts) == results
+    assert [transliterate_batch([text])[0] for text in texts] == results
+
+@pytest.mark.parametrize('per_pair', [False, True])
+def test_word_cache(expected, word_cache, per_pair):
+    word_cache(maxsize=50, per_pair=per_pair) # Small enough to evict
+    for _ in range(2):
+        for pair in PAIRS:
+            texts, results = expected[pair]
+            assert script_convert_batch(texts, *pair) == results
+            assert [script_convert(text, *pair) for text in texts[:50]] == results[:50]
+    stats = mapper.get_word_cache_stats()[PAIRS[0]]
+    assert stats['hits'] and stats['evictions']
+
+def test_persistent_cache(expected, word_cache, tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    # Second round from the on-disk cache alone, as in a new process
+    for _ in range(2):
+        word_cache(maxsize=1000, persistent_cache=PersistentCache(path))
+        for pair in PAIRS:
+            texts, results = expected[pair]
+            assert script_convert_batch(texts, *pair) == results
+    assert PersistentCache(path).stats()
+
+@pytest.mark.parametrize('pair', [('hi-IN', 'ur-PK'), ('pa-IN', 'pa-PK')])
+def test_lossless_batch(pair):
+    texts = generate_texts(pair[0], 20) + ['', '\n']
+    results = [script_convert(text, *pair, with_diacritics=True) for text in texts]
+    assert script_convert_batch(texts, *pair, with_diacritics=True) == results
+    lossless_converter.enable_word_cache(100)
+    try:
+        assert script_convert_batch(texts, *pair, with_diacritics=True) == results
+        assert script_convert_batch(texts[::-1], *pair, with_diacritics=True) == results[::-1]
+    finally:
+        lossless_converter.disable_word_cache()
+
+@pytest.mark.parametrize('pair', PAIRS)
+def test_thread_pool(expected, pair):
+    texts, results = expected[pair]
+    assert list(threaded_script_convert(iter(texts), *pair, workers=4, chunksize=7)) == results
+    assert sorted(threaded_script_convert(texts, *pair, workers=4, chunksize=7, ordered=False)) == sorted(results)
+
+@pytest.mark.parametrize('pair', PAIRS)
+def test_incremental_typing(expected, pair):
+    texts, results = expected[pair]
+    text = '\n'.join(texts[:NUM_DOCUMENT_LINES])
+    session = IncrementalTransliterator(*pair)
+    # Typed one character at a time, with some characters deleted again
+    rng = random.Random(0)
+    for end in range(1, len(text) + 1):
+        session.edit(end - 1, 0, text[end-1])
+        if rng.random() < 0.1:
+            session.edit(end - 1, 1)
+            session.edit(end - 1, 0, text[end-1])
+        if end % 50 == 0:
+            assert session.output == script_convert(text[:end], *pair)
+    assert session.output == dict(zip(texts, results))[text]
+
+@pytest.mark.parametrize('pair', PAIRS)
+def test_segmentation(pair):
+    # Text only in the source script goes through the whole pipeline, as before the segmentation
+    delegate = DELEGATES[pair]
+    transliterate = getattr(mapper.get_converter(delegate.language), delegate.method_name)
+    texts = load_corpus(pair[0]) + generate_texts(pair[0], 100, extra_ratio=0)
+    assert [script_convert(text, *pair) for text in texts] == [transliterate(text) for text in texts]
+
+    # The words in other scripts are kept as they are
+    texts = generate_texts(pair[0], 100, extra_ratio=0.5)
+    for text, result in zip(texts, script_convert_batch(texts, *pair)):
+        assert result.count('Hello') == text.count('Hello') and result.count('world') == text.count('world')
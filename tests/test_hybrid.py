@@ -0,0 +1,68 @@
+'''
+Tests of the routing of the pieces between the rules and the backend, with a stand-in backend.
+'''
+import pytest
+
+from indo_arabic_transliteration.hybrid import HybridTransliterator, hybrid_script_convert, hybrid_script_convert_batch
+from indo_arabic_transliteration.mapper import script_convert
+
+class StandInBackend:
+    '''
+    Wraps each text in brackets, and records its calls
+    '''
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, from_script, to_script, **kwargs):
+        self.calls.append((texts, from_script, to_script, kwargs))
+        return ['[%s]' % text for text in texts]
+
+class FailingBackend:
+    def __call__(self, texts, from_script, to_script, **kwargs):
+        raise ConnectionError('Backend not reachable')
+
+@pytest.fixture
+def backend():
+    return StandInBackend()
+
+def test_routing(backend):
+    # بولی has a medial ی read as a vowel, ڪ is a Sindhi letter (left unconverted by the Urdu rules)
+    texts = ['کتاب بولی', 'بولی\nڪ کتاب', 'کتاب']
+    transliterator = HybridTransliterator('ur-PK', 'hi-IN', backend, cache=None)
+    assert transliterator.transliterate_batch(texts) == [
+        script_convert('کتاب', 'ur-PK', 'hi-IN') + ' [بولی]',
+        '[بولی]\n[ڪ] ' + script_convert('کتاب', 'ur-PK', 'hi-IN'),
+        script_convert('کتاب', 'ur-PK', 'hi-IN'),
+    ]
+    # De-duplicated, in a single batch
+    assert backend.calls == [(['بولی', 'ڪ'], 'ur-PK', 'hi-IN', {'cache': None})]
+    assert transliterator.stats() == {'pieces': 5, 'flagged_pieces': 2, 'flagged_fraction': 2 / 5}
+
+@pytest.mark.parametrize('from_script, to_script, text', [('ur-PK', 'hi-IN', 'خوشگوار'), ('pa-PK', 'pa-IN', 'دوست'), ('sd-PK', 'sd-IN', 'قديم')])
+def test_medial_vowels(backend, from_script, to_script, text):
+    assert hybrid_script_convert(text, from_script, to_script, backend) == '[%s]' % text
+    assert backend.calls == [([text], from_script, to_script, {})]
+
+@pytest.mark.parametrize('from_script, to_script, text', [('ur-PK', 'hi-IN', 'پاکستان کا ملک'), ('pa-PK', 'pa-IN', 'پنجاب'), ('sd-PK', 'sd-IN', 'ڪتاب')])
+def test_not_flagged(backend, from_script, to_script, text):
+    assert hybrid_script_convert_batch([text, '', ' \n'], from_script, to_script, backend) == [script_convert(text, from_script, to_script), '', ' \n']
+    assert backend.calls == []
+
+def test_backend_error():
+    with pytest.raises(ConnectionError):
+        hybrid_script_convert('کتاب بولی', 'ur-PK', 'hi-IN', FailingBackend())
+    # The rule-based conversion is kept
+    assert hybrid_script_convert('کتاب بولی', 'ur-PK', 'hi-IN', FailingBackend(), fallback_on_error=True) == script_convert('کتاب بولی', 'ur-PK', 'hi-IN')
+
+@pytest.mark.parametrize('from_script, to_script', [('hi-IN', 'ur-PK'), ('pa-IN', 'pa-PK'), ('sd-IN', 'sd-PK')])
+def test_reverse_pairs(backend, from_script, to_script):
+    with pytest.raises(ValueError):
+        HybridTransliterator(from_script, to_script, backend)
+    assert backend.calls == []
+
+def test_rules_unchanged(backend):
+    # The watched passes are of a separate converter
+    text = 'کتاب بولی'
+    expected = script_convert(text, 'ur-PK', 'hi-IN')
+    hybrid_script_convert(text, 'ur-PK', 'hi-IN', backend)
+    assert script_convert(text, 'ur-PK', 'hi-IN') == expected
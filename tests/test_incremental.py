@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from indo_arabic_transliteration import incremental
+from indo_arabic_transliteration.incremental import IncrementalTransliterator
+from indo_arabic_transliteration.mapper import script_convert
+from .texts import generate_texts
+
+PAIRS = [('ur-PK', 'hi-IN'), ('hi-IN', 'ur-PK'), ('sd-PK', 'sd-IN')]
+
+def generate_edits(text, snippets, rng):
+    '''
+    Yields random (offset, deleted, inserted) edits, typing and deleting characters or pasting snippets
+    '''
+    for _ in range(200):
+        offset = rng.randint(0, len(text))
+        kind = rng.random()
+        if kind < 0.4:
+            edit = (offset, 0, rng.choice(rng.choice(snippets) or ' '))
+        elif kind < 0.7:
+            edit = (offset, min(rng.randint(1, 3), len(text) - offset), '')
+        elif kind < 0.9:
+            edit = (offset, min(rng.randint(0, 40), len(text) - offset), rng.choice(snippets))
+        else:
+            edit = (offset, rng.randint(0, len(text) - offset), rng.choice(['', ' ', '\n', rng.choice(snippets)]))
+        offset, deleted, inserted = edit
+        yield edit
+        text = text[:offset] + inserted + text[offset+deleted:]
+
+@pytest.mark.parametrize('block_size', [2, 5, 256])
+@pytest.mark.parametrize('pair', PAIRS)
+def test_same_as_whole_text(monkeypatch, pair, block_size):
+    monkeypatch.setattr(incremental, 'BLOCK_SIZE', block_size)
+    rng = random.Random(block_size)
+    snippets = generate_texts(pair[0], 30, seed=block_size)
+    text = ' '.join(snippets[:10])
+    session = IncrementalTransliterator(*pair, text)
+    output = session.output
+    for offset, deleted, inserted in generate_edits(text, snippets, rng):
+        change = session.edit(offset, text[offset:offset+deleted] if rng.random() < 0.5 else deleted, inserted)
+        text = text[:offset] + inserted + text[offset+deleted:]
+        output = output[:change.offset] + change.inserted + output[change.offset+len(change.deleted):]
+        assert session.text == text
+        assert session.output == output == script_convert(text, *pair)
+    assert all(len(block.pieces) <= block_size for block in session.blocks)
+
+@pytest.mark.parametrize('text', ['کتاب ﺋے', 'کتاب ﺅ', 'کتاب ـئے', 'کتاب ﮮ'])
+def test_presentation_forms(text):
+    # The space before the hamza-combo is removed by the conversion, hence it is not a safe boundary
+    session = IncrementalTransliterator('ur-PK', 'hi-IN', text)
+    assert session.output == script_convert(text, 'ur-PK', 'hi-IN')
+    session = IncrementalTransliterator('ur-PK', 'hi-IN')
+    for end in range(1, len(text) + 1):
+        session.update(text[:end])
+    assert session.output == script_convert(text, 'ur-PK', 'hi-IN')
+
+def test_presentation_form_hamza_joined():
+    assert IncrementalTransliterator('ur-PK', 'hi-IN', 'کتاب ﺋے').output == 'कताबए'
+
+def test_update():
+    pair = ('ur-PK', 'hi-IN')
+    texts = generate_texts(pair[0], 20)
+    session = IncrementalTransliterator(*pair)
+    for text in texts + [texts[0] + texts[1], '']:
+        session.update(text)
+        assert session.output == script_convert(text, *pair)
+
+def test_invalid_edits():
+    session = IncrementalTransliterator('ur-PK', 'hi-IN', 'کتاب')
+    with pytest.raises(ValueError):
+        session.edit(3, 2)
+    with pytest.raises(ValueError):
+        session.edit(0, 'x')
+    assert session.text == 'کتاب'
@@ -0,0 +1,49 @@
+'''
+Differential test of InfixTranslator against the consonant-pair map it replaced,
+i.e. a StringTranslator over every consonant+infix+consonant combination.
+'''
+import random
+
+import pytest
+
+from indo_arabic_transliteration.base import read_mapping_file
+from indo_arabic_transliteration.common import DEVANAGARI_MEDIAL_VOWELS_MAP
+from indo_arabic_transliteration.str_mapper import StringTranslator, InfixTranslator
+from indo_arabic_transliteration.table_cache import DATA_DIR
+
+NUM_WORDS = 10000 # The old map's regex (of ~13k alternatives) is slow, a few seconds per pass
+
+def get_devanagari_consonants(map_file):
+    # Same letters as `maps['devanagari_consonants']` in `BaseIndoArabicTransliterator.load_maps()`
+    return [devanagari_letter for arabic_letter, roman_letter, devanagari_letter in read_mapping_file(DATA_DIR + map_file)
+            if arabic_letter not in {'ی', 'و', 'ھ'}]
+
+def build_consonant_pairs_map(consonants):
+    # As built before InfixTranslator, with len(consonants)^2 keys per infix
+    pairs_map = {}
+    for consonant_i in consonants:
+        for consonant_j in consonants:
+            for infix, replacement in DEVANAGARI_MEDIAL_VOWELS_MAP.items():
+                pairs_map[consonant_i+infix+consonant_j] = consonant_i+replacement+consonant_j
+    return pairs_map
+
+def generate_words(consonants, num_words, seed=0):
+    rng = random.Random(seed)
+    letters = consonants + list(DEVANAGARI_MEDIAL_VOWELS_MAP) + list(DEVANAGARI_MEDIAL_VOWELS_MAP.values()) + ['ा', 'ि', '्', 'ं', 'अ']
+    return [''.join(rng.choice(letters) for _ in range(rng.randint(1, 8))) for _ in range(num_words)]
+
+@pytest.mark.parametrize('map_file', ['hindustani_consonants.csv', 'sindhi_consonants.csv'])
+def test_same_as_consonant_pairs_map(map_file):
+    consonants = get_devanagari_consonants(map_file)
+    old_translator = StringTranslator(build_consonant_pairs_map(consonants))
+    new_translator = InfixTranslator(DEVANAGARI_MEDIAL_VOWELS_MAP, consonants)
+
+    words = generate_words(consonants, NUM_WORDS)
+    # No boundaries are involved, hence the words are checked in texts of many words
+    for text in [' '.join(words[i:i+50]) for i in range(0, len(words), 50)]:
+        old_result = old_translator.translate(text)
+        new_result = new_translator.translate(text)
+        assert new_result == old_result
+        # Applied twice by the transliterators, to resolve the overlapping matches
+        assert new_translator.translate(new_result) == old_translator.translate(old_result)
+        assert new_translator.reverse_translate(text) == old_translator.reverse_translate(text)
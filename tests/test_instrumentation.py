@@ -0,0 +1,91 @@
+import re
+
+import pytest
+
+from indo_arabic_transliteration.hindustani import HindustaniTransliterator
+from indo_arabic_transliteration.instrumentation import Instrumentation, METRIC_PREFIX, enable_instrumentation, disable_instrumentation, get_instrumentation
+from indo_arabic_transliteration.mapper import get_converter, script_convert
+from indo_arabic_transliteration.str_mapper import StringTranslator, CompiledStringTranslator
+from .texts import generate_texts
+
+def test_self_seconds():
+    converter = HindustaniTransliterator()
+    texts = generate_texts('ur-PK', 50)
+    expected = converter.transliterate_from_urdu_to_hindi_batch(texts)
+
+    instrumentation = Instrumentation(count_keys=False, count_matches=False)
+    instrumentation.instrument(converter)
+    labels = ('HindustaniTransliterator', 'batch')
+    assert instrumentation.time_stage(labels, converter.transliterate_from_urdu_to_hindi_batch, texts) == expected
+    assert not instrumentation.match_counts
+
+    # The self times add up to the time of the outermost stage
+    total_seconds = instrumentation.stage_seconds[labels].sum
+    assert abs(sum(instrumentation.stage_self_seconds.values()) - total_seconds) < 1e-6
+    assert 0 < instrumentation.stage_self_seconds[labels] < total_seconds
+    assert instrumentation.stage_seconds[('HindustaniTransliterator', 'arabic_normalize')].count > 0
+
+    instrumentation.uninstrument(converter)
+    assert not vars(converter).get('arabic_normalize')
+
+class StandInConverter:
+    def __init__(self, translator_class):
+        self.converter = translator_class({'ab': 'X', 'c': 'Y', 'd': 'Z', '"': 'Q'})
+
+    def transliterate_from_abc_to_xyz(self, text):
+        return self.converter.translate(text)
+
+@pytest.mark.parametrize('translator_class', [StringTranslator, CompiledStringTranslator])
+def test_key_hits(translator_class):
+    converter = StandInConverter(translator_class)
+    instrumentation = Instrumentation()
+    instrumentation.instrument(converter)
+    assert converter.transliterate_from_abc_to_xyz('abcab ab"') == 'XYX XQ'
+    assert converter.converter.reverse_translate('XZ') == 'abd'
+
+    forward, reverse = ('StandInConverter', 'converter', 'forward'), ('StandInConverter', 'converter', 'reverse')
+    assert instrumentation.key_hits == {forward: {'ab': 3, 'c': 1, '"': 1}, reverse: {'X': 1, 'Z': 1}}
+    assert instrumentation.match_counts == {forward: 5, reverse: 2}
+    assert instrumentation.stage_seconds[('StandInConverter', 'transliterate_from_abc_to_xyz')].count == 1
+    assert instrumentation.get_unused_keys() == {forward: ['d'], reverse: ['Y', 'Q']}
+
+def test_to_prometheus():
+    converter = StandInConverter(StringTranslator)
+    instrumentation = Instrumentation(buckets=(1e-3, float('inf')))
+    instrumentation.instrument(converter)
+    converter.transliterate_from_abc_to_xyz('ab"')
+    converter.transliterate_from_abc_to_xyz('c')
+    lines = instrumentation.to_prometheus().splitlines()
+
+    sample_regex = re.compile(r'%s_[a-z_]+\{([a-z]+="([^"\\]|\\.)*",?)+\} [0-9.e+-]+' % METRIC_PREFIX)
+    assert all(line.startswith('# ') or sample_regex.fullmatch(line) for line in lines)
+    assert '# TYPE %s_stage_seconds histogram' % METRIC_PREFIX in lines
+    labels = 'converter="StandInConverter",stage="converter.forward"'
+    assert '%s_stage_seconds_bucket{%s,le="+Inf"} 2' % (METRIC_PREFIX, labels) in lines
+    assert '%s_stage_seconds_count{%s} 2' % (METRIC_PREFIX, labels) in lines
+    labels = 'converter="StandInConverter",translator="converter",direction="forward"'
+    assert '%s_matches_total{%s} 3' % (METRIC_PREFIX, labels) in lines
+    assert '%s_key_hits_total{%s,key="ab"} 1' % (METRIC_PREFIX, labels) in lines
+    assert '%s_key_hits_total{%s,key="\\""} 1' % (METRIC_PREFIX, labels) in lines
+
+def test_disable_restores_converters():
+    converter = get_converter('hindustani')
+    attributes = dict(vars(converter))
+    text = 'کتاب کا نام'
+    expected = script_convert(text, 'ur-PK', 'hi-IN')
+
+    instrumentation = enable_instrumentation()
+    try:
+        assert converter.transliterate_from_urdu_to_hindi is not attributes.get('transliterate_from_urdu_to_hindi')
+        assert script_convert(text, 'ur-PK', 'hi-IN') == expected
+        assert instrumentation.stage_seconds[('HindustaniTransliterator', 'transliterate_from_urdu_to_hindi')].count == 1
+        assert instrumentation.match_counts
+    finally:
+        disable_instrumentation()
+
+    assert vars(converter).keys() == attributes.keys()
+    assert all(vars(converter)[name] is value for name, value in attributes.items())
+    assert get_instrumentation() is None
+    # No longer recorded
+    script_convert(text, 'ur-PK', 'hi-IN')
+    assert instrumentation.stage_seconds[('HindustaniTransliterator', 'transliterate_from_urdu_to_hindi')].count == 1
@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+from indo_arabic_transliteration.base import ARABIC_TO_DEVANAGARI, DEVANAGARI_TO_ARABIC
+from indo_arabic_transliteration.hindustani import HindustaniTransliterator, WORDS_MAP_FILES
+from indo_arabic_transliteration.sindhi import SindhiTransliterator
+from indo_arabic_transliteration.table_cache import DATA_DIR
+
+def write_lexicon(tmp_path, rows):
+    '''
+    Returns the path (relative to the data folder) of a mapping file with the given (arabic, roman, devanagari) words
+    '''
+    path = tmp_path / 'words.csv'
+    path.write_text('\n'.join(','.join(column) for column in zip(*rows)), encoding='utf-8')
+    return os.path.relpath(str(path), DATA_DIR)
+
+@pytest.mark.parametrize('compiled', [False, True])
+def test_hindi_to_urdu(tmp_path, compiled):
+    map_file = write_lexicon(tmp_path, [('نہیں', 'nahīṃ', 'नहीं'), ('کو', 'ko', 'को')])
+    default_converter = HindustaniTransliterator(compiled=compiled)
+    converter = HindustaniTransliterator(compiled=compiled, words_map_files=dict(WORDS_MAP_FILES, **{DEVANAGARI_TO_ARABIC: [map_file]}))
+
+    assert converter.transliterate_from_hindi_to_urdu('नहीं') == 'نہیں'
+    text = 'वह नहीं, को\nनहींतो अनको'
+    words = converter.transliterate_from_hindi_to_urdu(text).split()
+    default_words = default_converter.transliterate_from_hindi_to_urdu(text).split()
+    assert words[1:3] == ['نہیں،', 'کو']
+    # Not within other words
+    assert [words[0]] + words[3:] == [default_words[0]] + default_words[3:]
+    assert converter.transliterate_from_hindi_to_urdu_batch([text, 'को']) == [converter.transliterate_from_hindi_to_urdu(text), 'کو']
+    # The other direction is unchanged
+    assert converter.transliterate_from_urdu_to_hindi('نہیں کو') == default_converter.transliterate_from_urdu_to_hindi('نہیں کو')
+
+def test_sindhi(tmp_path):
+    map_file = write_lexicon(tmp_path, [('ڪتاب', 'kitāb', 'किताब')])
+    converter = SindhiTransliterator(words_map_files={ARABIC_TO_DEVANAGARI: [map_file], DEVANAGARI_TO_ARABIC: [map_file]})
+    assert converter.transliterate_from_sindhi_to_devanagari('ڪتاب ڪتابن') == 'किताब ' + SindhiTransliterator().transliterate_from_sindhi_to_devanagari('ڪتابن')
+    assert converter.transliterate_from_devanagari_to_sindhi('किताब') == 'ڪتاب'
+
+def test_not_a_word(tmp_path):
+    map_file = write_lexicon(tmp_path, [('نہیں ہے', 'nahīṃ hai', 'नहीं है')])
+    with pytest.raises(ValueError):
+        HindustaniTransliterator(words_map_files={DEVANAGARI_TO_ARABIC: [map_file]})
@@ -0,0 +1,47 @@
+'''
+Tests of the splitting and memoisation around the models, with a stand-in model (so without `indictrans`).
+'''
+import pytest
+
+from indo_arabic_transliteration import ml_based
+
+PAIR = ('ur-PK', 'hi-IN')
+
+class StandInModel:
+    '''
+    Converts to upper-case, and records its inputs
+    '''
+    def __init__(self):
+        self.inputs = []
+
+    def transform(self, text):
+        self.inputs.append(text)
+        return text.upper()
+
+@pytest.fixture
+def model(monkeypatch):
+    model = StandInModel()
+    monkeypatch.setitem(ml_based.MODELS, PAIR, model)
+    yield model
+    ml_based.disable_word_cache()
+
+def test_whole_text_with_word_cache(model):
+    ml_based.enable_word_cache(10)
+    text = 'ab cd\nab'
+    assert ml_based.ml_transliterate(text, *PAIR) == 'AB CD\nAB'
+    assert model.inputs == [text]
+    assert ml_based.get_word_cache_stats()[PAIR]['size'] == 0
+
+def test_batch_unique_words(model):
+    texts = ['ab  cd', 'cd ab\tef', '', ' ']
+    assert ml_based.ml_transliterate_batch(texts, *PAIR) == [text.upper() for text in texts]
+    assert model.inputs == ['ab\ncd\nef']
+    # Nothing is kept across the calls, without the word cache
+    ml_based.ml_transliterate_batch(['ab'], *PAIR)
+    assert model.inputs[-1] == 'ab'
+
+def test_batch_word_cache(model):
+    ml_based.enable_word_cache(10)
+    ml_based.ml_transliterate_batch(['ab cd'], *PAIR)
+    assert ml_based.ml_transliterate_batch(['cd ef ab'], *PAIR) == ['CD EF AB']
+    assert model.inputs == ['ab\ncd', 'ef']
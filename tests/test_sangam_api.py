@@ -0,0 +1,128 @@
+'''
+Tests of SangamClient against a local stand-in of the Sangam server.
+'''
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from indo_arabic_transliteration.sangam_api import SangamClient, ENDPOINT_NAMES, DEFAULT_MAX_CONCURRENCY, CLIENTS, get_client, close_clients, online_transliterate, online_transliterate_batch
+
+class StandInServer(ThreadingHTTPServer):
+    '''
+    Converts each line of the input to upper-case, after failing with the queued error statuses (if any).
+    With `drop_separators`, the lines of multi-line inputs are returned joined by spaces.
+    '''
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.lock = threading.Lock()
+        self.inputs = []
+        self.error_statuses = []
+        self.drop_separators = False
+
+    @property
+    def base_url(self):
+        return 'http://127.0.0.1:%d/' % self.server_address[1]
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with server.lock:
+            server.inputs.append((self.path, body['input']))
+            status = server.error_statuses.pop(0) if server.error_statuses else 200
+        if status != 200:
+            self.send_response(status)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        result = body['input'].upper()
+        if server.drop_separators:
+            result = result.replace('\n', ' ')
+        payload = json.dumps({'d': result}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    server = StandInServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    close_clients()
+    server.shutdown()
+    server.server_close()
+
+def test_batch_split_into_requests(server):
+    texts = ['text %d' % (i % 30) for i in range(60)] + ['', ' ']
+    results = online_transliterate_batch(texts, 'ur-PK', 'hi-IN', base_url=server.base_url, max_request_chars=40, max_concurrency=4)
+    assert results == [text.upper() for text in texts]
+
+    # Unique non-blank texts only, packed one per line into requests of at most `max_request_chars`
+    assert all(path == '/' + ENDPOINT_NAMES[('ur-PK', 'hi-IN')] for path, text in server.inputs)
+    assert all(len(text) <= 40 for path, text in server.inputs)
+    sent_texts = [line for path, text in server.inputs for line in text.split('\n')]
+    assert sorted(sent_texts) == sorted('text %d' % i for i in range(30))
+    assert 1 < len(server.inputs) < 30
+
+@pytest.mark.parametrize('status', [503, 429])
+def test_retry_on_server_errors(server, status):
+    server.error_statuses = [status, status]
+    results = online_transliterate_batch(['a', 'b'], 'hi-IN', 'ur-PK', base_url=server.base_url, backoff_base=0)
+    assert results == ['A', 'B']
+    assert len(server.inputs) == 3
+
+def test_no_retry_on_client_errors(server):
+    server.error_statuses = [400]
+    with pytest.raises(requests.exceptions.HTTPError):
+        online_transliterate_batch(['a'], 'hi-IN', 'ur-PK', base_url=server.base_url, backoff_base=0)
+    assert len(server.inputs) == 1
+
+def test_retries_exhausted(server):
+    server.error_statuses = [503] * 3
+    with SangamClient(base_url=server.base_url, retry_attempts=3, backoff_base=0) as client:
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.post(client.get_api_url('hi-IN', 'ur-PK'), 'a')
+    assert len(server.inputs) == 3
+
+def test_fallback_per_line(server):
+    server.drop_separators = True
+    texts = ['a', 'b', 'c', 'multi\nline']
+    results = online_transliterate_batch(texts, 'sd-PK', 'sd-IN', base_url=server.base_url, backoff_base=0)
+    # The text with the separator is sent alone, hence its lines are joined by the server
+    assert results == ['A', 'B', 'C', 'MULTI LINE']
+    # One packed request, then one request per text of the pack, and the text sent alone
+    assert sorted(text for path, text in server.inputs) == sorted(['a\nb\nc', 'a', 'b', 'c', 'multi\nline'])
+
+def test_shared_clients(server):
+    client = get_client(base_url=server.base_url, retry_attempts=3)
+    assert get_client(base_url=server.base_url, retry_attempts=3) is client
+    assert get_client(base_url=server.base_url, retry_attempts=3, max_concurrency=DEFAULT_MAX_CONCURRENCY) is client
+    assert get_client(base_url=server.base_url) is not client
+
+    assert online_transliterate_batch(['a'], 'hi-IN', 'ur-PK', base_url=server.base_url, retry_attempts=3) == ['A']
+    assert online_transliterate_batch(['b'], 'hi-IN', 'ur-PK', base_url=server.base_url, retry_attempts=3) == ['B']
+    # Still open, and no other client was built for the same options
+    assert not client.executor._shutdown
+    assert sum(shared.base_url == server.base_url for shared in CLIENTS.values()) == 2
+
+    close_clients()
+    assert client.executor._shutdown
+    assert not CLIENTS
+
+def test_own_client(server):
+    with SangamClient(base_url=server.base_url) as client:
+        assert online_transliterate('a', 'hi-IN', 'ur-PK', client=client) == 'A'
+        assert online_transliterate_batch(['b', 'c'], 'hi-IN', 'ur-PK', client=client) == ['B', 'C']
+        assert not client.executor._shutdown
+    assert not CLIENTS
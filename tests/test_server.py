@@ -0,0 +1,136 @@
+'''
+Load tests of the local HTTP service, against a server on a free local port.
+'''
+import json
+import time
+import asyncio
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from indo_arabic_transliteration.mapper import script_convert
+from indo_arabic_transliteration.server import TransliterationServer
+from indo_arabic_transliteration.instrumentation import METRIC_PREFIX
+from .texts import generate_texts
+
+PAIR_LABELS = 'pair="ur-PK>hi-IN",backend="rules"'
+
+@pytest.fixture
+def start_server():
+    '''
+    Starts a server (by the given arguments) with its event loop in a thread
+    '''
+    servers = []
+    def start(**kwargs):
+        server = TransliterationServer(port=0, workers=4, **kwargs)
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(server.start())
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        servers.append((server, loop, thread))
+        return server
+    yield start
+    for server, loop, thread in servers:
+        loop.call_soon_threadsafe(server.close)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+def request(server, method, path, body=None):
+    '''
+    Returns (status, headers, body) of the response
+    '''
+    connection = http.client.HTTPConnection('127.0.0.1', server.port, timeout=30)
+    try:
+        connection.request(method, path, body)
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        connection.close()
+
+def post_texts(server, texts, from_script='ur-PK', to_script='hi-IN'):
+    body = json.dumps({'from': from_script, 'to': to_script, 'texts': texts}).encode('utf-8')
+    status, headers, body = request(server, 'POST', '/transliterate', body)
+    return status, headers, json.loads(body)
+
+def get_metrics(server):
+    '''
+    Returns the values of the metrics, by their names with the labels
+    '''
+    status, headers, body = request(server, 'GET', '/metrics')
+    assert status == 200
+    metrics = {}
+    for line in body.decode('utf-8').splitlines():
+        if not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            metrics[name] = float(value)
+    return metrics
+
+def test_coalesced_batches(start_server):
+    server = start_server(batch_window=0.5)
+    requests_texts = [generate_texts('ur-PK', 5, seed=seed) for seed in range(16)]
+    with ThreadPoolExecutor(len(requests_texts)) as executor:
+        responses = list(executor.map(lambda texts: post_texts(server, texts), requests_texts))
+
+    for texts, (status, headers, response) in zip(requests_texts, responses):
+        assert status == 200
+        assert response['texts'] == [script_convert(text, 'ur-PK', 'hi-IN') for text in texts]
+
+    metrics = get_metrics(server)
+    num_batches = metrics['%s_server_batch_texts_count{%s}' % (METRIC_PREFIX, PAIR_LABELS)]
+    assert metrics['%s_server_batch_texts_sum{%s}' % (METRIC_PREFIX, PAIR_LABELS)] == 16 * 5
+    assert num_batches < len(requests_texts) / 2
+    assert metrics['%s_server_requests_total{%s,status="200"}' % (METRIC_PREFIX, PAIR_LABELS)] == 16
+    assert metrics['%s_server_texts_total{%s}' % (METRIC_PREFIX, PAIR_LABELS)] == 16 * 5
+    assert metrics['%s_server_chars_total{%s}' % (METRIC_PREFIX, PAIR_LABELS)] == sum(len(text) for texts in requests_texts for text in texts)
+    assert metrics['%s_server_latency_seconds_count' % METRIC_PREFIX] == 16
+    assert metrics['%s_server_pending_texts' % METRIC_PREFIX] == 0
+
+def test_full_batch_not_delayed(start_server):
+    server = start_server(batch_window=60, max_batch_texts=10)
+    texts = generate_texts('ur-PK', 10)
+    status, headers, response = post_texts(server, texts)
+    assert status == 200
+    assert response['texts'] == [script_convert(text, 'ur-PK', 'hi-IN') for text in texts]
+
+def test_backpressure(start_server):
+    server = start_server(batch_window=1, max_pending_texts=5)
+    texts = generate_texts('ur-PK', 4)
+    with ThreadPoolExecutor(1) as executor:
+        waiting = executor.submit(post_texts, server, texts)
+        deadline = time.monotonic() + 10
+        while server.metrics.pending_texts < len(texts):
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+        # The texts waiting in the batch, and these, are more than `max_pending_texts`
+        status, headers, response = post_texts(server, ['a', 'b'])
+        assert status == 503
+        assert headers['Retry-After'] == '1'
+        # Within the limit
+        status, headers, response = post_texts(server, ['a'])
+        assert status == 200
+        assert waiting.result()[0] == 200
+
+    metrics = get_metrics(server)
+    assert metrics['%s_server_requests_total{%s,status="503"}' % (METRIC_PREFIX, PAIR_LABELS)] == 1
+    assert metrics['%s_server_requests_total{%s,status="200"}' % (METRIC_PREFIX, PAIR_LABELS)] == 2
+    assert metrics['%s_server_texts_total{%s}' % (METRIC_PREFIX, PAIR_LABELS)] == 5
+    assert metrics['%s_server_pending_texts' % METRIC_PREFIX] == 0
+
+def test_oversized_body(start_server):
+    server = start_server(max_request_bytes=100)
+    status, headers, body = request(server, 'POST', '/transliterate', json.dumps({'from': 'ur-PK', 'to': 'hi-IN', 'texts': ['a' * 200]}))
+    assert status == 413
+    # Rejected before it is parsed, hence not counted by the pair
+    assert not any(name.startswith('%s_server_requests_total' % METRIC_PREFIX) for name in get_metrics(server))
+
+def test_invalid_requests(start_server):
+    server = start_server()
+    assert request(server, 'POST', '/transliterate', b'{')[0] == 400
+    assert post_texts(server, ['a'], 'ur-PK', 'xx')[0] == 400
+    assert request(server, 'GET', '/transliterate')[0] == 405
+    assert request(server, 'GET', '/unknown')[0] == 404
+    assert request(server, 'GET', '/health')[0] == 200
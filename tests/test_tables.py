@@ -0,0 +1,20 @@
+import pytest
+
+from indo_arabic_transliteration.hindustani import HindustaniTransliterator
+from indo_arabic_transliteration.punjabi import PunjabiTransliterator
+from indo_arabic_transliteration.table_cache import build_artifacts
+
+@pytest.mark.parametrize('compiled', [False, True])
+def test_punjabi_shares_hindustani_tables(compiled):
+    hindustani, punjabi = HindustaniTransliterator(compiled=compiled), PunjabiTransliterator(compiled=compiled)
+    assert punjabi.get_tables_key() == hindustani.get_tables_key()
+    for name in ('arabic_to_devanagari_map_pass1', 'arabic_to_devanagari_converter_pass1', 'arabic_to_devanagari_words_converter'):
+        assert getattr(punjabi, name) is getattr(hindustani, name)
+    assert not hasattr(hindustani, 'gurmukhi_to_devanagari_converter')
+    assert punjabi.gurmukhi_to_devanagari_converter is PunjabiTransliterator(compiled=compiled).gurmukhi_to_devanagari_converter
+    assert punjabi.transliterate_from_gurmukhi_to_shahmukhi('ਪੰਜਾਬੀ ਕਿਤਾਬ') == hindustani.transliterate_from_hindi_to_urdu(punjabi.transliterate_from_gurmukhi_to_devanagari('ਪੰਜਾਬੀ ਕਿਤਾਬ'))
+
+def test_build_artifacts(tmp_path):
+    paths = build_artifacts(str(tmp_path))
+    # One artifact per layer, the shared Hindustani tables are written only once
+    assert len(set(paths)) == len(paths) - 2
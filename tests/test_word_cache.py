@@ -0,0 +1,35 @@
+import pytest
+
+from indo_arabic_transliteration.mapper import script_convert, script_convert_batch, enable_word_cache, disable_word_cache
+from indo_arabic_transliteration.word_cache import LRUCache
+
+def test_eviction():
+    cache = LRUCache(2)
+    cache.put_many([('a', 1), ('b', 2)])
+    assert cache.get_many(['a']) == ({'a': 1}, [])
+    cache.put_many([('c', 3)])
+    assert cache.get_many(['a', 'b', 'c', 'b']) == ({'a': 1, 'c': 3}, ['b'])
+    assert cache.stats()['evictions'] == 1
+
+def test_unbounded():
+    cache = LRUCache(maxsize=None)
+    cache.put_many((str(i), i) for i in range(1000))
+    assert len(cache) == 1000
+    assert cache.stats()['evictions'] == 0
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        LRUCache(0)
+
+# Spaces before the (presentation forms of) hamza-combos are removed, and the isolated Sindhi letters read the spaces around them
+SPACE_SENSITIVE_TEXTS = ['کتاب ﺋے', 'کتاب ﺌے', 'کتاب ﺅ', 'کتاب ـئے', 'کتاب ﮮ', 'ڪتاب ﻡ ڪتاب', 'ڪتاب ﺀ ڪتاب', 'ڪتابـ م ڪتاب']
+
+@pytest.mark.parametrize('pair', [('ur-PK', 'hi-IN'), ('sd-PK', 'sd-IN'), ('pa-PK', 'pa-IN')])
+def test_same_output_as_uncached(pair):
+    expected = [script_convert(text, *pair) for text in SPACE_SENSITIVE_TEXTS]
+    enable_word_cache()
+    try:
+        assert [script_convert(text, *pair) for text in SPACE_SENSITIVE_TEXTS] == expected
+        assert script_convert_batch(SPACE_SENSITIVE_TEXTS, *pair) == expected
+    finally:
+        disable_word_cache()
@@ -0,0 +1,45 @@
+'''
+Texts of each script for the tests: the lines of the benchmark corpora, and random mixes of their words
+with Latin words, digits, punctuations, whitespace and the letters read differently next to whitespace.
+'''
+import os
+import random
+
+CORPORA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'corpora')
+EXTRA_WORDS = ['Hello', 'world', 'x1', 'h1', '2024', 'https://example.com/a?b=1', '😀', ',', '?', '.', '|', "''", '—', '“ok”']
+SPACES = [' ', ' ', ' ', '  ', '\n', '\t', '\u00a0', '\r\n', ' \n ', '\u2009']
+
+# Hamza-combos and isolated letters (read together with the whitespace next to them), their presentation forms,
+# and the Devanagari letters they give (for the other direction)
+ARABIC_EDGE_WORDS = ['ؤ', 'ئ', 'ۓ', 'ء', 'م', 'ئے', 'آؤ', 'ﺋے', 'ﺌے', 'ﺅ', 'ﺆ', 'ـئے', 'ﮮ', 'ﻡ', 'ﺀ', 'ﺁ']
+DEVANAGARI_EDGE_WORDS = ['में', 'ऐं', 'ए', 'ओ', 'ॽ', 'क़', 'क\u093c', 'ऋ', 'ॐ']
+EDGE_WORDS = {
+    'ur-PK': ARABIC_EDGE_WORDS,
+    'pa-PK': ARABIC_EDGE_WORDS,
+    'sd-PK': ARABIC_EDGE_WORDS + ['۾', '۽', 'ڪ', 'ﮒ'],
+    'hi-IN': DEVANAGARI_EDGE_WORDS,
+    'sd-IN': DEVANAGARI_EDGE_WORDS + ['ॻ', 'ॼ'],
+    'pa-IN': ['ਖ਼', 'ਖ\u0a3c', 'ੱਕ', 'ਅੰ', 'ੲਿ', 'ੳੁ'],
+}
+
+def load_corpus(script):
+    with open(os.path.join(CORPORA_DIR, script + '.txt'), encoding='utf-8') as corpus_file:
+        return corpus_file.read().splitlines()
+
+def generate_texts(script, num_texts, seed=0, max_words=12, extra_ratio=0.2, edge_ratio=0.1):
+    rng = random.Random(seed)
+    words = [word for line in load_corpus(script) for word in line.split()]
+    texts = []
+    for _ in range(num_texts):
+        parts = []
+        for _ in range(rng.randint(0, max_words)):
+            choice = rng.random()
+            if choice < extra_ratio:
+                parts.append(rng.choice(EXTRA_WORDS))
+            elif choice < extra_ratio + edge_ratio:
+                parts.append(rng.choice(EDGE_WORDS[script]))
+            else:
+                parts.append(rng.choice(words))
+            parts.append(rng.choice(SPACES))
+        texts.append(''.join(parts[:-1]))
+    return texts